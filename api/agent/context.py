@@ -0,0 +1,191 @@
+"""
+Context Builder - Bounded conversation context for the agent prompt.
+
+Instead of pasting the whole conversation into every Gemini prompt, the
+prompt gets:
+1. A rule-based summary of what the scammer has done so far (who they
+   claim to be, threats, what they asked for, details they shared),
+   built from the session's to_llm_context() intel. Facts are only ever
+   appended, so the summary is maintained incrementally.
+2. The latest K messages, rendered once into an append-only buffer.
+
+Both are fitted into a token budget, so prompt size stays flat however
+long the conversation runs.
+"""
+
+import os
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Deque, List, Optional, Set, Tuple
+
+from ..intelligence.session_store import SessionIntelligence
+
+# Rough token estimate for Latin-script chat text (no tokenizer dependency)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate number of LLM tokens in a text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@dataclass
+class ConversationContext:
+    """Per-session builder state."""
+    rendered: Deque[str]                   # "sender: text" of the latest messages
+    rendered_count: int = 0                # Messages rendered so far
+    last_fingerprint: bytes = b""          # Fingerprint of the last rendered message
+    facts: List[str] = field(default_factory=list)      # Summary lines, append-only
+    fact_keys: Set[str] = field(default_factory=set)
+
+
+class ContextBuilder:
+    """
+    Builds the conversation part of the agent prompt.
+
+    Builder state is cached per session (LRU bounded). It is checked
+    against the session's message fingerprints and rebuilt when the session
+    was reset or replayed, or was served by another worker in between.
+    """
+
+    def __init__(
+        self,
+        window: Optional[int] = None,
+        token_budget: Optional[int] = None,
+        max_sessions: Optional[int] = None,
+    ):
+        """
+        Args:
+            window: Latest messages shown verbatim (default: AGENT_CONTEXT_MESSAGES or 8)
+            token_budget: Token budget of the whole context (default: AGENT_CONTEXT_TOKENS or 600)
+            max_sessions: Sessions whose builder state is cached (default: SESSION_MAX or 10000)
+        """
+        self.window = max(1, window or int(os.getenv("AGENT_CONTEXT_MESSAGES", "8")))
+        self.token_budget = token_budget or int(os.getenv("AGENT_CONTEXT_TOKENS", "600"))
+        self.max_sessions = max_sessions or int(os.getenv("SESSION_MAX", "10000"))
+        self._states: "OrderedDict[str, ConversationContext]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def build(self, session: SessionIntelligence) -> str:
+        """Summary plus latest messages of a session, within the token budget."""
+        state = self._state_for(session)
+        self._render_new(state, session)
+        self._update_summary(state, session)
+        return self._fit(state)
+
+    def forget(self, session_id: str) -> None:
+        """Drop the cached state of a session."""
+        with self._lock:
+            self._states.pop(session_id, None)
+
+    # === STATE ===
+
+    def _state_for(self, session: SessionIntelligence) -> ConversationContext:
+        """Cached state of a session, reset if it no longer matches the session's history."""
+        log = session.log
+        with self._lock:
+            state = self._states.get(session.session_id)
+            if state is not None:
+                count = state.rendered_count
+                if count > len(log) or (count and log.fingerprint(count - 1) != state.last_fingerprint):
+                    state = None  # Session was reset or replayed
+            if state is None:
+                state = ConversationContext(rendered=deque(maxlen=self.window))
+            self._states[session.session_id] = state
+            self._states.move_to_end(session.session_id)
+            while len(self._states) > self.max_sessions:
+                self._states.popitem(last=False)
+        return state
+
+    def _render_new(self, state: ConversationContext, session: SessionIntelligence) -> None:
+        """Append messages added since the last build to the rendered buffer."""
+        log = session.log
+        if state.rendered_count == len(log):
+            return
+        # Only the last `window` new messages can end up in the buffer
+        start = max(state.rendered_count, len(log) - self.window)
+        for msg in log.since(start):
+            state.rendered.append(f"{msg.sender}: {' '.join(msg.text.split())}")
+        state.rendered_count = len(log)
+        state.last_fingerprint = log.fingerprint(len(log) - 1)
+
+    # === SUMMARY ===
+
+    def _update_summary(self, state: ConversationContext, session: SessionIntelligence) -> None:
+        """Append summary lines for intel not summarized yet."""
+        for key, line in self._facts(session.to_llm_context()):
+            if key not in state.fact_keys:
+                state.fact_keys.add(key)
+                state.facts.append(line)
+
+    @staticmethod
+    def _facts(context: dict) -> List[Tuple[str, str]]:
+        """(key, summary line) for every fact in a to_llm_context() dict."""
+        tactics, intel = context["tactics"], context["intel"]
+        facts = []
+        if tactics["impersonating"]:
+            facts.append((f"as:{tactics['impersonating']}", f"They claim to be from {tactics['impersonating']}"))
+        for threat in tactics["threats"]:
+            facts.append((f"threat:{threat}", f"They threatened: {threat}"))
+        for ask in tactics["asksFor"]:
+            facts.append((f"ask:{ask}", f"They asked for your {ask}"))
+        for label, key in (("UPI ID", "upiIds"), ("phone number", "phoneNumbers"),
+                           ("bank account", "bankAccounts"), ("email", "emails")):
+            for value in intel[key]:
+                facts.append((f"{key}:{value}", f"They gave a {label}: {value}"))
+        for link in intel["riskyLinks"]:
+            facts.append((f"link:{link}", f"They sent a link: {link}"))
+        return facts
+
+    # === BUDGET ===
+
+    def _fit(self, state: ConversationContext) -> str:
+        """
+        Render the context within the token budget.
+
+        The summary may use up to half of the budget. It is filled from the
+        newest fact backwards and printed in chronological order; older facts
+        that do not fit are folded into a count line. The rest goes to the
+        latest messages, newest first; the newest message is always
+        included, truncated if needed.
+        """
+        budget = self.token_budget
+        summary: List[str] = []
+        if state.facts:
+            title = "What they have said and done so far:"
+            # Reserve room for the longest count line variant
+            used = estimate_tokens(title) + 1
+            used += estimate_tokens(f"- ({len(state.facts)} earlier facts omitted)") + 1
+            kept: List[str] = []
+            for fact in reversed(state.facts):
+                line = f"- {fact}"
+                cost = estimate_tokens(line) + 1
+                if used + cost > budget // 2:
+                    break
+                kept.append(line)
+                used += cost
+            if kept:
+                omitted = len(state.facts) - len(kept)
+                summary.append(title)
+                if omitted:
+                    summary.append(f"- ({omitted} earlier facts omitted)")
+                summary.extend(reversed(kept))
+        remaining = budget - sum(estimate_tokens(line) + 1 for line in summary)
+
+        recent: List[str] = []
+        # Reserve room for the longest header variant
+        remaining -= estimate_tokens(f"Latest messages ({state.rendered_count} earlier not shown):") + 1
+        for line in reversed(state.rendered):
+            cost = estimate_tokens(line) + 1
+            if cost > remaining:
+                if not recent and remaining > 0:
+                    recent.append(line[:max(remaining - 1, 0) * CHARS_PER_TOKEN] + "...")
+                break
+            recent.append(line)
+            remaining -= cost
+        recent.reverse()
+
+        hidden = state.rendered_count - len(recent)
+        header = f"Latest messages ({hidden} earlier not shown):" if hidden else "Latest messages:"
+        return "\n".join(summary + [header] + recent)
@@ -0,0 +1,268 @@
+"""
+LLM Backends - Pluggable model providers for the agent.
+
+- gemini: Google Gemini through google-generativeai (GEMINI_API_KEY)
+- openai: any OpenAI-compatible chat completions endpoint (OpenAI, vLLM,
+  Ollama, LM Studio, ...) through the openai package
+- stub:   offline, deterministic persona replies with configurable latency,
+          for load tests and profiling without a key or network
+
+Selected with LLM_BACKEND; see backend_from_env(). The provider SDKs are
+imported when a backend first needs its client, not at import time.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import AsyncIterator, Optional
+
+from ..optional import installed
+
+logger = logging.getLogger(__name__)
+
+GENAI_AVAILABLE = installed("google.generativeai")
+OPENAI_AVAILABLE = installed("openai")
+
+
+class LLMBackend:
+    """
+    Base class: prompt in, reply text out.
+
+    Subclasses implement generate(); generate_async() defaults to running
+    it in a thread and stream_async() to yielding the whole reply at once.
+    `missing` names what is not configured (None = ready).
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.missing: Optional[str] = None
+
+    @property
+    def available(self) -> bool:
+        return self.missing is None
+
+    def generate(self, prompt: str, temperature: float = 0.7, max_tokens: int = 150) -> str:
+        raise NotImplementedError
+
+    async def generate_async(self, prompt: str, temperature: float = 0.7, max_tokens: int = 150) -> str:
+        return await asyncio.to_thread(self.generate, prompt, temperature, max_tokens)
+
+    async def stream_async(self, prompt: str, temperature: float = 0.7, max_tokens: int = 150) -> AsyncIterator[str]:
+        """Reply text in chunks as the model produces them."""
+        yield await self.generate_async(prompt, temperature, max_tokens)
+
+    def close(self) -> None:
+        pass
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini via the google-generativeai SDK."""
+
+    name = "gemini"
+
+    def __init__(self, model: str = "gemini-2.0-flash", api_key: Optional[str] = None):
+        super().__init__()
+        self.model_name = model
+        self.api_key = api_key
+        self._model = None
+        self._lock = threading.Lock()
+        if not GENAI_AVAILABLE:
+            self.missing = "google-generativeai"
+            return
+        if not api_key:
+            self.missing = "GEMINI_API_KEY"
+            logger.warning("GEMINI_API_KEY not found in environment variables.")
+
+    @property
+    def model(self):
+        """The GenerativeModel, created (and the SDK imported) on first use."""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    import google.generativeai as genai
+                    genai.configure(api_key=self.api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def _config(self, temperature: float, max_tokens: int) -> dict:
+        return {"temperature": temperature, "max_output_tokens": max_tokens}
+
+    def generate(self, prompt: str, temperature: float = 0.7, max_tokens: int = 150) -> str:
+        response = self.model.generate_content(prompt, generation_config=self._config(temperature, max_tokens))
+        return response.text.strip()
+
+    async def generate_async(self, prompt: str, temperature: float = 0.7, max_tokens: int = 150) -> str:
+        response = await self.model.generate_content_async(
+            prompt, generation_config=self._config(temperature, max_tokens)
+        )
+        return response.text.strip()
+
+    async def stream_async(self, prompt: str, temperature: float = 0.7, max_tokens: int = 150) -> AsyncIterator[str]:
+        response = await self.model.generate_content_async(
+            prompt, generation_config=self._config(temperature, max_tokens), stream=True
+        )
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class OpenAIBackend(LLMBackend):
+    """OpenAI-compatible chat completions endpoint."""
+
+    name = "openai"
+
+    def __init__(self, model: str = "gpt-4o-mini", api_key: Optional[str] = None, base_url: Optional[str] = None):
+        """
+        Args:
+            model: Model name as the endpoint knows it
+            api_key: API key (local servers usually accept any value)
+            base_url: Endpoint, e.g. http://localhost:11434/v1 (None = api.openai.com)
+        """
+        super().__init__()
+        self.model_name = model
+        # Retries are the LLMClient's job (deadline + hedging)
+        self._options = {"api_key": api_key or "not-needed", "base_url": base_url, "max_retries": 0}
+        self._client = None
+        self._async_client = None
+        if not OPENAI_AVAILABLE:
+            self.missing = "openai"
+            return
+        if not api_key and not base_url:
+            self.missing = "OPENAI_API_KEY"
+            logger.warning("OPENAI_API_KEY not found in environment variables.")
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(**self._options)
+        return self._client
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            from openai import AsyncOpenAI
+            self._async_client = AsyncOpenAI(**self._options)
+        return self._async_client
+
+    def _messages(self, prompt: str) -> list:
+        return [{"role": "user", "content": prompt}]
+
+    def generate(self, prompt: str, temperature: float = 0.7, max_tokens: int = 150) -> str:
+        response = self.client.chat.completions.create(
+            model=self.model_name, messages=self._messages(prompt),
+            temperature=temperature, max_tokens=max_tokens,
+        )
+        return (response.choices[0].message.content or "").strip()
+
+    async def generate_async(self, prompt: str, temperature: float = 0.7, max_tokens: int = 150) -> str:
+        response = await self.async_client.chat.completions.create(
+            model=self.model_name, messages=self._messages(prompt),
+            temperature=temperature, max_tokens=max_tokens,
+        )
+        return (response.choices[0].message.content or "").strip()
+
+    async def stream_async(self, prompt: str, temperature: float = 0.7, max_tokens: int = 150) -> AsyncIterator[str]:
+        stream = await self.async_client.chat.completions.create(
+            model=self.model_name, messages=self._messages(prompt),
+            temperature=temperature, max_tokens=max_tokens, stream=True,
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+
+
+class StubBackend(LLMBackend):
+    """
+    Offline deterministic backend.
+
+    The reply and the simulated latency are derived from a hash of the
+    prompt, so identical runs produce identical replies and timings.
+    """
+
+    name = "stub"
+
+    REPLIES = (
+        "oh no, what happened? is my account safe?",
+        "ok sir, what i have to do now",
+        "where specifically do i send? do you have a upi id?",
+        "my upi app is not working. can you give account number and ifsc?",
+        "is there a website i can visit to fix this?",
+        "sorry sir, my phone is very slow. please tell once more",
+        "is this the code? 4821",
+    )
+
+    def __init__(self, latency: float = 0.2, jitter: float = 0.0):
+        """
+        Args:
+            latency: Seconds every reply takes
+            jitter: Extra 0..jitter seconds, fixed per prompt
+        """
+        super().__init__()
+        self.latency = latency
+        self.jitter = jitter
+
+    def _reply(self, prompt: str):
+        """(reply, delay) for a prompt."""
+        seed = int.from_bytes(hashlib.blake2b(prompt.encode("utf-8", "surrogatepass"), digest_size=8).digest(), "big")
+        delay = self.latency + self.jitter * ((seed >> 16) % 1000) / 1000
+        return self.REPLIES[seed % len(self.REPLIES)], delay
+
+    def generate(self, prompt: str, temperature: float = 0.7, max_tokens: int = 150) -> str:
+        reply, delay = self._reply(prompt)
+        if delay:
+            time.sleep(delay)
+        return reply
+
+    async def generate_async(self, prompt: str, temperature: float = 0.7, max_tokens: int = 150) -> str:
+        reply, delay = self._reply(prompt)
+        if delay:
+            await asyncio.sleep(delay)
+        return reply
+
+    async def stream_async(self, prompt: str, temperature: float = 0.7, max_tokens: int = 150) -> AsyncIterator[str]:
+        """Word by word: the first word after half the delay, the rest spread over the other half."""
+        reply, delay = self._reply(prompt)
+        words = reply.split(" ")
+        await asyncio.sleep(delay / 2)
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(delay / 2 / max(len(words) - 1, 1))
+            yield word if i == 0 else " " + word
+
+
+LLM_BACKENDS = ("gemini", "openai", "stub")
+
+
+def backend_from_env() -> LLMBackend:
+    """
+    Build the backend selected by LLM_BACKEND (default gemini).
+
+    gemini: GEMINI_API_KEY, LLM_MODEL (gemini-2.0-flash)
+    openai: OPENAI_API_KEY, OPENAI_BASE_URL, LLM_MODEL (gpt-4o-mini)
+    stub:   LLM_STUB_LATENCY (0.2 s), LLM_STUB_JITTER (0 s)
+    """
+    kind = os.getenv("LLM_BACKEND", "gemini").lower()
+    model = os.getenv("LLM_MODEL")
+    if kind == "openai":
+        return OpenAIBackend(
+            model=model or "gpt-4o-mini",
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=os.getenv("OPENAI_BASE_URL") or None,
+        )
+    if kind == "stub":
+        return StubBackend(
+            latency=float(os.getenv("LLM_STUB_LATENCY", "0.2")),
+            jitter=float(os.getenv("LLM_STUB_JITTER", "0")),
+        )
+    if kind != "gemini":
+        logger.warning(f"Unknown LLM_BACKEND '{kind}', using 'gemini'.")
+    return GeminiBackend(model=model or "gemini-2.0-flash", api_key=os.getenv("GEMINI_API_KEY"))
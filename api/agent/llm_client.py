@@ -0,0 +1,325 @@
+"""
+LLM Client - Deadlines, hedging and rate limiting around model calls.
+
+Wraps a model's generate function so one slow upstream call cannot stall
+a worker:
+- Every call has a deadline; on timeout the caller gets None and answers
+  with a template reply instead
+- Optional hedging: if a call is slower than the recent p-th latency
+  percentile, a second identical request is sent and the first answer wins
+- A semaphore caps concurrent calls, a token bucket caps calls per second
+  (waiting for either counts against the deadline)
+
+The async path is the one the server uses. The sync path (scripts, tests)
+runs calls on a bounded thread pool and does not hedge. Streaming calls
+share the deadline, slots and rate limit, but are not hedged either.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional
+
+from ..metrics import STAGE_SECONDS, timed
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter.
+
+    `rate` tokens per second refill up to `burst`; rate <= 0 disables it.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.burst = max(1, burst if burst is not None else int(rate) or 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        """Take a token if available. Returns 0, or the seconds until one is."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    async def acquire(self) -> None:
+        """Wait (without blocking the loop) until a token is available."""
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def acquire_blocking(self, timeout: Optional[float] = None) -> bool:
+        """Sleep until a token is available. False if that takes longer than timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._take()
+            if not wait:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class LatencyTracker:
+    """Recent call latencies, for the hedging delay."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """p-th percentile (0-100) of recent latencies, None until enough samples."""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+class LLMStream:
+    """
+    Reply chunks of one streaming call, bounded by the client's deadline.
+
+    Iterate with `async for`. Afterwards `complete` is True only if the
+    model finished; a stream cut off by the deadline or an error just
+    stops (with no chunks at all if nothing arrived in time).
+    """
+
+    def __init__(self, client: "LLMClient", prompt: str):
+        self.client = client
+        self.prompt = prompt
+        self.chunks: List[str] = []
+        self.complete = False
+
+    @property
+    def text(self) -> str:
+        """Everything received so far."""
+        return "".join(self.chunks).strip()
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._run()
+
+    async def _run(self) -> AsyncIterator[str]:
+        client = self.client
+        client.stats["calls"] += 1
+        with STAGE_SECONDS.time(stage="llm"):
+            async for chunk in self._chunks():
+                yield chunk
+
+    async def _chunks(self) -> AsyncIterator[str]:
+        client = self.client
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + client.deadline
+        try:
+            await asyncio.wait_for(client.bucket.acquire(), timeout=client.deadline)
+            semaphore = client._get_semaphore()
+            await asyncio.wait_for(semaphore.acquire(), timeout=max(0.0, deadline - loop.time()))
+            stream = client._stream_async(self.prompt).__aiter__()
+            try:
+                started = time.monotonic()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(stream.__anext__(), timeout=max(0.0, deadline - loop.time()))
+                    except StopAsyncIteration:
+                        break
+                    self.chunks.append(chunk)
+                    yield chunk
+                client.latency.record(time.monotonic() - started)
+                self.complete = True
+            finally:
+                semaphore.release()
+                aclose = getattr(stream, "aclose", None)
+                if aclose:
+                    await aclose()
+        except asyncio.TimeoutError:
+            client.stats["timeouts"] += 1
+            logger.warning(f"LLM stream exceeded {client.deadline}s deadline")
+        except Exception as e:
+            client.stats["errors"] += 1
+            logger.error(f"LLM API Error: {e}")
+
+
+class LLMClient:
+    """
+    Deadline-bounded, hedged, rate-limited calls to one model.
+
+    generate()/generate_async() return the model's text, or None when the
+    call timed out or failed (callers fall back to a template reply).
+    """
+
+    def __init__(
+        self,
+        generate_sync: Callable[[str], str],
+        generate_async: Callable[[str], Awaitable[str]],
+        stream_async: Optional[Callable[[str], AsyncIterator[str]]] = None,
+        deadline: float = 6.0,
+        hedge_percentile: float = 0.0,
+        max_concurrent: int = 16,
+        rate_limit: float = 0.0,
+        burst: Optional[int] = None,
+    ):
+        """
+        Args:
+            generate_sync: Blocking model call, prompt -> text
+            generate_async: Async model call, prompt -> text
+            stream_async: Streaming model call, prompt -> text chunks
+                (default: generate_async as a single chunk)
+            deadline: Seconds a call may take, including queueing
+            hedge_percentile: Latency percentile after which a hedge request
+                is sent (0 disables hedging)
+            max_concurrent: Model calls in flight at once
+            rate_limit: Model calls per second (0 = unlimited)
+            burst: Token bucket size (default: one second's worth)
+        """
+        self._generate_sync = generate_sync
+        self._generate_async = generate_async
+        self._stream_async = stream_async or self._single_chunk
+        self.deadline = deadline
+        self.hedge_percentile = hedge_percentile
+        self.max_concurrent = max_concurrent
+        self.bucket = TokenBucket(rate_limit, burst)
+        self.latency = LatencyTracker()
+        self.stats: Dict[str, int] = {"calls": 0, "timeouts": 0, "errors": 0, "hedged": 0}
+
+        self._semaphore: Optional[asyncio.Semaphore] = None  # Created on the serving loop
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="llm")
+
+    @classmethod
+    def from_env(
+        cls,
+        generate_sync: Callable[[str], str],
+        generate_async: Callable[[str], Awaitable[str]],
+        stream_async: Optional[Callable[[str], AsyncIterator[str]]] = None,
+    ) -> "LLMClient":
+        """
+        Build from environment variables: LLM_DEADLINE, LLM_HEDGE_PERCENTILE,
+        LLM_MAX_CONCURRENT, LLM_RATE_LIMIT, LLM_RATE_BURST.
+        """
+        burst = os.getenv("LLM_RATE_BURST")
+        return cls(
+            generate_sync,
+            generate_async,
+            stream_async,
+            deadline=float(os.getenv("LLM_DEADLINE", "6")),
+            hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "0")),
+            max_concurrent=int(os.getenv("LLM_MAX_CONCURRENT", "16")),
+            rate_limit=float(os.getenv("LLM_RATE_LIMIT", "0")),
+            burst=int(burst) if burst else None,
+        )
+
+    # === ASYNC PATH ===
+
+    @timed(STAGE_SECONDS, stage="llm")
+    async def generate_async(self, prompt: str) -> Optional[str]:
+        """Model reply within the deadline, or None."""
+        self.stats["calls"] += 1
+        try:
+            return await asyncio.wait_for(self._generate_hedged(prompt), timeout=self.deadline)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            logger.warning(f"LLM call exceeded {self.deadline}s deadline")
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"LLM API Error: {e}")
+        return None
+
+    def stream_async(self, prompt: str) -> LLMStream:
+        """Streaming model reply within the deadline (see LLMStream)."""
+        return LLMStream(self, prompt)
+
+    async def _single_chunk(self, prompt: str) -> AsyncIterator[str]:
+        yield await self._generate_async(prompt)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    async def _attempt(self, prompt: str) -> str:
+        """One model request, after taking a rate token and a concurrency slot."""
+        await self.bucket.acquire()
+        async with self._get_semaphore():
+            started = time.monotonic()
+            text = await self._generate_async(prompt)
+            self.latency.record(time.monotonic() - started)
+            return text
+
+    async def _generate_hedged(self, prompt: str) -> str:
+        """Run a request; send a hedge request if it is slower than usual."""
+        tasks = {asyncio.ensure_future(self._attempt(prompt))}
+        try:
+            hedge_after = self._hedge_delay()
+            if hedge_after is not None:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+                if not done:
+                    self.stats["hedged"] += 1
+                    tasks.add(asyncio.ensure_future(self._attempt(prompt)))
+
+            error: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Deadline hit or a winner found: stop whatever is still running
+            for task in tasks:
+                task.cancel()
+
+    def _hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None when hedging is off / no data yet."""
+        if self.hedge_percentile <= 0:
+            return None
+        delay = self.latency.percentile(self.hedge_percentile)
+        if delay is None or delay >= self.deadline:
+            return None
+        return delay
+
+    # === SYNC PATH ===
+
+    @timed(STAGE_SECONDS, stage="llm")
+    def generate(self, prompt: str) -> Optional[str]:
+        """Blocking model reply within the deadline, or None (no hedging)."""
+        self.stats["calls"] += 1
+        started = time.monotonic()
+        if not self.bucket.acquire_blocking(timeout=self.deadline):
+            self.stats["timeouts"] += 1
+            return None
+        future = self._pool.submit(self._generate_sync, prompt)
+        try:
+            text = future.result(timeout=max(0.0, self.deadline - (time.monotonic() - started)))
+        except FutureTimeout:
+            # The thread finishes in the background; the worker moves on
+            self.stats["timeouts"] += 1
+            logger.warning(f"LLM call exceeded {self.deadline}s deadline")
+            return None
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"LLM API Error: {e}")
+            return None
+        self.latency.record(time.monotonic() - started)
+        return text
+
+    def close(self) -> None:
+        """Stop the sync path's thread pool."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -1,35 +1,177 @@
 import os
 import logging
-import google.generativeai as genai
-from typing import Optional
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional, Tuple
 
 from ..intelligence.session_store import session_store, SessionIntelligence
 from ..intelligence.classifier import ScamClassifier
+from ..metrics import STAGE_SECONDS, timed
 from .states import StateMachine, AgentState
+from .context import ContextBuilder
+from .templates import TemplateLibrary, TEMPLATE_STATES
+from .reply_cache import ReplyCache
+from .llm_client import LLMClient
+from .llm_backends import LLMBackend, backend_from_env
 from .prompts import SYSTEM_PROMPT_TEMPLATE, STATE_INSTRUCTIONS
 
 # Configure Logger
 logger = logging.getLogger(__name__)
 
+
+@dataclass
+class ReplyPlan:
+    """A turn's reply as decided under the session lock."""
+    session: SessionIntelligence
+    state: AgentState
+    user_text: str
+    reply: Optional[str] = None   # Template / cached reply, ready to send
+    prompt: Optional[str] = None  # Set when the LLM still has to answer
+
+
 class AgentManager:
-    def __init__(self):
+    GENERATION_CONFIG = {
+        "temperature": 0.7,
+        "max_output_tokens": 150, # Keep replies short
+    }
+    
+    PERSONA = {
+        "name": "Rajesh Kumar",
+    }
+    
+    # REPLY_POLICY values:
+    # llm      - every reply comes from the LLM backend
+    # cache    - reuse replies for the same (state, normalized message, persona)
+    # hybrid   - templates for TEMPLATE_STATES, cache + LLM otherwise
+    # template - templates only, no LLM calls
+    REPLY_POLICIES = ("llm", "cache", "hybrid", "template")
+    
+    # Replies when the LLM is unusable (never cached)
+    NETWORK_FALLBACK_REPLY = "sorry network issue... one min..." # Natural fallback, if a state has no templates
+
+    def __init__(
+        self,
+        reply_policy: Optional[str] = None,
+        reply_cache: Optional[ReplyCache] = None,
+        backend: Optional[LLMBackend] = None,
+    ):
         self.state_machine = StateMachine()
         self.classifier = ScamClassifier()
+        self.context_builder = ContextBuilder()  # Bounded history + summary for the prompt
         
-        # Configure Gemini
-        self.api_key = os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
-            logger.warning("GEMINI_API_KEY not found in environment variables.")
-        else:
-            genai.configure(api_key=self.api_key)
-            
-        # Model Configuration
-        self.model = genai.GenerativeModel("gemini-2.0-flash")
+        # Reply fast paths
+        self.reply_policy = (reply_policy or os.getenv("REPLY_POLICY", "llm")).lower()
+        if self.reply_policy not in self.REPLY_POLICIES:
+            logger.warning(f"Unknown REPLY_POLICY '{self.reply_policy}', using 'llm'.")
+            self.reply_policy = "llm"
+        self.templates = TemplateLibrary(self.PERSONA["name"])
+        self.reply_cache = reply_cache
+        if self.reply_cache is None and self.reply_policy != "llm":
+            self.reply_cache = ReplyCache.from_env()
+        self.reply_stats = {"template": 0, "cache": 0, "llm": 0, "fallback": 0}
+        
+        # Model backend (LLM_BACKEND: gemini / openai / stub)
+        self.backend = backend if backend is not None else backend_from_env()
+        self.no_backend_reply = f"Error: {self.backend.missing} not configured."
+        
+        # Deadline / hedging / rate limits around the model (LLM_* env vars)
+        self.llm = LLMClient.from_env(self._backend_generate, self._backend_generate_async, self._backend_stream_async)
+
+    def plan_reply(self, session_id: str, user_text: str) -> ReplyPlan:
+        """
+        Everything of a turn that reads or writes the session: the state
+        transition, a template / cached reply, or else the prompt. Run it
+        under the session lock; the LLM call (complete_reply_async /
+        stream_reply_async) needs no lock, since it does not touch the
+        session.
+        """
+        session, state = self._prepare_turn(session_id)
+        reply = self._fast_reply(session, state, user_text)
+        prompt = self._build_prompt(session, state) if reply is None else None
+        return ReplyPlan(session, state, user_text, reply, prompt)
 
     def generate_response(self, session_id: str, user_text: str) -> str:
         """
         Main entry point for generating a response.
         """
+        plan = self.plan_reply(session_id, user_text)
+        if plan.reply is not None:
+            return plan.reply
+        self.reply_stats["llm"] += 1
+        reply = self._call_llm(plan.prompt)
+        return self._finish_llm_reply(plan.session, plan.state, plan.user_text, reply)
+
+    async def generate_response_async(self, session_id: str, user_text: str) -> str:
+        """
+        Async variant of generate_response(). The Gemini call is awaited.
+        """
+        return await self.complete_reply_async(self.plan_reply(session_id, user_text))
+
+    async def complete_reply_async(self, plan: ReplyPlan) -> str:
+        """The planned reply, calling the LLM if the plan has a prompt."""
+        if plan.reply is not None:
+            return plan.reply
+        self.reply_stats["llm"] += 1
+        reply = await self._call_llm_async(plan.prompt)
+        return self._finish_llm_reply(plan.session, plan.state, plan.user_text, reply)
+
+    async def stream_response_async(self, session_id: str, user_text: str) -> AsyncIterator[str]:
+        """
+        Streaming variant of generate_response_async(): yields the reply in
+        chunks as the LLM produces them. Template and cached replies come
+        as a single chunk.
+        """
+        async for chunk in self.stream_reply_async(self.plan_reply(session_id, user_text)):
+            yield chunk
+
+    async def stream_reply_async(self, plan: ReplyPlan) -> AsyncIterator[str]:
+        """Streaming variant of complete_reply_async()."""
+        reply = plan.reply
+        if reply is None and not self.backend.available:
+            reply = self.no_backend_reply
+        if reply is not None:
+            yield reply
+            return
+        
+        self.reply_stats["llm"] += 1
+        stream = self.llm.stream_async(plan.prompt)
+        async for chunk in stream:
+            yield chunk
+        
+        if not stream.chunks:
+            # Nothing arrived before the deadline
+            yield self._finish_llm_reply(plan.session, plan.state, plan.user_text, None)
+        elif stream.complete:
+            self._finish_llm_reply(plan.session, plan.state, plan.user_text, stream.text)
+
+    def _fast_reply(self, session: SessionIntelligence, state: AgentState, user_text: str) -> Optional[str]:
+        """Template or cached reply allowed by the reply policy, or None to call the LLM."""
+        policy = self.reply_policy
+        if policy == "template" or (policy == "hybrid" and state.value in TEMPLATE_STATES):
+            reply = self.templates.reply(state.value, session.session_id, session.message_count)
+            if reply is not None:
+                self.reply_stats["template"] += 1
+                return reply
+        
+        if self.reply_cache is not None and policy != "llm":
+            reply = self.reply_cache.get(state.value, user_text, self.PERSONA["name"])
+            if reply is not None:
+                self.reply_stats["cache"] += 1
+                return reply
+        return None
+
+    def _finish_llm_reply(self, session: SessionIntelligence, state: AgentState, user_text: str, reply: Optional[str]) -> str:
+        """Cache a model reply, or answer from the state's templates if the call timed out / failed."""
+        if reply is None:
+            self.reply_stats["fallback"] += 1
+            return self.templates.reply(state.value, session.session_id, session.message_count) or self.NETWORK_FALLBACK_REPLY
+        
+        if self.reply_cache is not None and self.reply_policy != "llm" and reply != self.no_backend_reply:
+            self.reply_cache.set(state.value, user_text, self.PERSONA["name"], reply)
+        return reply
+
+    @timed(STAGE_SECONDS, stage="state_transition")
+    def _prepare_turn(self, session_id: str) -> Tuple[SessionIntelligence, AgentState]:
+        """Advance the session's state machine for this turn."""
         session = session_store.get_or_create(session_id)
         
         # 1. Detect Intent (Session store already updates analysis when intelligence is added)
@@ -52,51 +194,65 @@ class AgentManager:
         
         # Update Session State
         session.agent_state = next_state.value
+        session_store.save(session)
         logger.info(f"Session {session_id} transition: {current_state} -> {next_state} (Intent: {current_intent})")
         
-        # 3. Construct Prompt
-        prompt = self._build_prompt(session, next_state)
-        
-        # 4. Call LLM
-        return self._call_llm(prompt)
-
-    def _call_llm(self, prompt: str) -> str:
-        """Calls Gemini API using the SDK."""
-        if not self.api_key:
-            return "Error: GEMINI_API_KEY not configured."
-            
-        try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config={
-                    "temperature": 0.7,
-                    "max_output_tokens": 150, # Keep replies short
-                }
-            )
-            return response.text.strip()
-                
-        except Exception as e:
-            logger.error(f"LLM API Error: {e}")
-            return "sorry network issue... one min..." # Natural fallback
+        return session, next_state
+
+    def _call_llm(self, prompt: str) -> Optional[str]:
+        """Calls the LLM backend within the deadline. None on timeout or error."""
+        if not self.backend.available:
+            return self.no_backend_reply
+        return self.llm.generate(prompt)
+
+    async def _call_llm_async(self, prompt: str) -> Optional[str]:
+        """Async variant of _call_llm()."""
+        if not self.backend.available:
+            return self.no_backend_reply
+        return await self.llm.generate_async(prompt)
+
+    def _backend_generate(self, prompt: str) -> str:
+        """One blocking request to the backend."""
+        return self.backend.generate(
+            prompt,
+            temperature=self.GENERATION_CONFIG["temperature"],
+            max_tokens=self.GENERATION_CONFIG["max_output_tokens"]
+        )
+
+    async def _backend_generate_async(self, prompt: str) -> str:
+        """One async request to the backend."""
+        return await self.backend.generate_async(
+            prompt,
+            temperature=self.GENERATION_CONFIG["temperature"],
+            max_tokens=self.GENERATION_CONFIG["max_output_tokens"]
+        )
+
+    async def _backend_stream_async(self, prompt: str) -> AsyncIterator[str]:
+        """One streaming request to the backend."""
+        async for chunk in self.backend.stream_async(
+            prompt,
+            temperature=self.GENERATION_CONFIG["temperature"],
+            max_tokens=self.GENERATION_CONFIG["max_output_tokens"]
+        ):
+            yield chunk
 
+    @timed(STAGE_SECONDS, stage="prompt_build")
     def _build_prompt(self, session: SessionIntelligence, state: AgentState) -> str:
         """Constructs the full prompt for the LLM."""
         
         # 1. Persona and Context
-        persona = {
-            "name": "Rajesh Kumar", 
-        }
+        persona = self.PERSONA
         
         # 2. State Instructions
         state_goal = STATE_INSTRUCTIONS.get(state.value, "Engage cautiously.")
         
-        # 3. Context Summary
-        conversation_history = "\n".join([f"{msg['sender']}: {msg['text']}" for msg in session.messages])
+        # 3. Context Summary (rolling summary + latest messages, within the token budget)
+        conversation_history = self.context_builder.build(session)
         
         situation = f"""
         You are in a conversation with a suspected scammer.
         Conversation History:
-        {conversation_history}
+{conversation_history}
         """
 
         full_prompt = SYSTEM_PROMPT_TEMPLATE.format(
@@ -0,0 +1,102 @@
+"""
+Reply Cache - Reuse LLM replies across identical scam messages.
+
+Scam blasts send the same script to thousands of numbers, usually with
+only a name, amount, link or number changed. Replies are cached under
+(state, normalized scammer message, persona), so every copy after the
+first is answered without a model round-trip. A reply is only cached if
+it does not quote any of those changing parts (no digits, links, UPI IDs /
+emails), so one scammer's identifiers are never replayed to another.
+
+Storage is a LinkCache (TTL + LRU, optional SQLite file shared by workers).
+"""
+
+import hashlib
+import os
+import re
+from typing import Optional
+
+from ..intelligence.link_cache import LinkCache
+
+
+_URL_RE = re.compile(r'(?:https?://|www\.)\S+', re.IGNORECASE)
+_HANDLE_RE = re.compile(r'\S+@\S+')  # UPI IDs and emails
+_DIGITS_RE = re.compile(r'\d+')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_message(text: str) -> str:
+    """
+    Reduce a scammer message to its script.
+
+    Lowercases, replaces links, UPI IDs / emails and digit runs with
+    placeholders and collapses whitespace.
+    """
+    text = _URL_RE.sub("<url>", text.lower())
+    text = _HANDLE_RE.sub("<id>", text)
+    text = _DIGITS_RE.sub("#", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def is_reusable(reply: str, message: str) -> bool:
+    """
+    True if a reply can be served for every message with the same script.
+
+    Rejects replies with digits, links or handles, and replies naming a
+    link / handle of the message without its scheme or @ (e.g. the bare
+    domain).
+    """
+    if _DIGITS_RE.search(reply) or _URL_RE.search(reply) or _HANDLE_RE.search(reply):
+        return False
+    lowered = reply.lower()
+    for match in _URL_RE.findall(message) + _HANDLE_RE.findall(message):
+        match = match.lower().rstrip(".,;:!?)")
+        host = re.sub(r'^(?:https?://)?(?:www\.)?', "", match).split("/")[0]
+        parts = [host] + host.split("@")
+        if any(len(part) > 3 and part in lowered for part in parts):
+            return False
+    return True
+
+
+class ReplyCache:
+    """Cached agent replies keyed by (state, normalized message, persona)."""
+
+    def __init__(self, cache: Optional[LinkCache] = None):
+        """
+        Args:
+            cache: Underlying store (default: 4096 entries, 1 hour, memory only)
+        """
+        self.cache = cache if cache is not None else LinkCache(max_entries=4096, ttl=3600.0)
+
+    @classmethod
+    def from_env(cls) -> "ReplyCache":
+        """
+        Build from environment variables: REPLY_CACHE_PATH (unset = memory
+        only), REPLY_CACHE_SIZE, REPLY_CACHE_TTL.
+        """
+        return cls(LinkCache(
+            max_entries=int(os.getenv("REPLY_CACHE_SIZE", "4096")),
+            ttl=float(os.getenv("REPLY_CACHE_TTL", "3600")),
+            path=os.getenv("REPLY_CACHE_PATH") or None,
+        ))
+
+    @staticmethod
+    def key(state: str, message: str, persona: str) -> str:
+        """Cache key of a turn; the message part is hashed to bound key size."""
+        digest = hashlib.blake2b(normalize_message(message).encode("utf-8", "surrogatepass"),
+                                 digest_size=16).hexdigest()
+        return f"reply:{persona}:{state}:{digest}"
+
+    def get(self, state: str, message: str, persona: str) -> Optional[str]:
+        """Cached reply for a turn, or None."""
+        reply = self.cache.get(self.key(state, message, persona))
+        return None if reply is LinkCache.MISS else reply
+
+    def set(self, state: str, message: str, persona: str, reply: str) -> None:
+        """Remember the reply generated for a turn (skipped if it quotes the message's specifics)."""
+        if not is_reusable(reply, message):
+            return
+        self.cache.set(self.key(state, message, persona), reply)
+
+    def close(self) -> None:
+        self.cache.close()
@@ -0,0 +1,110 @@
+"""
+Reply Templates - Canned persona replies per agent state.
+
+In states like INITIAL_CONTACT or PUSHBACK_HANDLING, STATE_INSTRUCTIONS
+already pins the reply down to a few stock lines, so these states can be
+answered without an LLM round-trip. Templates are formatted with the
+persona once, when a TemplateLibrary is built; picking a reply is then
+just an index into a tuple.
+
+Variants are chosen from a hash of (session, turn): the same turn always
+gets the same reply, consecutive turns usually get different ones.
+"""
+
+import zlib
+from typing import Dict, Optional, Tuple
+
+from .states import AgentState
+
+
+# {name}: persona name, {code}: fake 4-digit code (LEAK_FAKE_INFO)
+REPLY_TEMPLATES: Dict[str, Tuple[str, ...]] = {
+    AgentState.INITIAL_CONTACT.value: (
+        "oh no, what happened? is my account safe?",
+        "what?? who is this? what happend to my account",
+        "oh god. is everything ok with my money?",
+        "sorry who is calling? is this about my bank?",
+    ),
+    AgentState.ESTABLISH_TRUST.value: (
+        "ok sir, i am {name}. what i have to do now",
+        "yes yes i am listening. please tell slowly, i am not good with phone",
+        "ok. you are from the bank office only na?",
+        "sir i am little worried. tell me what to do step by step",
+    ),
+    AgentState.EXTRACTION_UPI.value: (
+        "ok i will pay. where specifically do i send? do you have a upi id?",
+        "my app is asking for VPA or ID. what should i type there",
+        "ok sending now... what is your upi id again? i lost it",
+        "which upi number i should pay to sir? please send it properly",
+    ),
+    AgentState.EXTRACTION_BANK.value: (
+        "sir my upi app is not working. can i do direct bank transfer? send account number",
+        "upi is showing error again. please give account number and IFSC, i will go to bank",
+        "my son says do NEFT. what is the account number and ifsc code",
+    ),
+    AgentState.EXTRACTION_LINK.value: (
+        "is there a website i can visit to fix this?",
+        "send me the link properly, i cannot find it",
+        "which site i should open sir? please send the link again",
+    ),
+    AgentState.PUSHBACK_HANDLING.value: (
+        "im sorry, my son usually helps me with this. let me try again. just tell me the number",
+        "sorry sorry sir, phone is very slow today. please dont block my account",
+        "i am trying only sir, internet is bad here. please tell once more",
+        "very sorry, i am old and not good with all this. what should i do now",
+    ),
+    AgentState.LEAK_FAKE_INFO.value: (
+        "my name is {name}, i live in mumbai. is this the code? {code}",
+        "ok i got a message with {code}. is this the code you want?",
+        "i am {name} only sir. the sms says {code}, should i tell you that?",
+    ),
+    AgentState.CONCLUDE.value: (
+        "ok sir i have done it. please check and tell me",
+        "thank you sir. i will check with my bank also and get back",
+    ),
+}
+
+# States whose STATE_INSTRUCTIONS leave little room for an LLM to add anything
+TEMPLATE_STATES = frozenset({
+    AgentState.INITIAL_CONTACT.value,
+    AgentState.PUSHBACK_HANDLING.value,
+    AgentState.LEAK_FAKE_INFO.value,
+})
+
+
+class TemplateLibrary:
+    """Persona replies per state, formatted once at construction."""
+
+    def __init__(self, persona_name: str, templates: Optional[Dict[str, Tuple[str, ...]]] = None):
+        """
+        Args:
+            persona_name: Name the persona gives when asked
+            templates: State value -> reply templates (default: REPLY_TEMPLATES)
+        """
+        self.persona_name = persona_name
+        self._replies: Dict[str, Tuple[Tuple[str, bool], ...]] = {}
+        for state, variants in (templates or REPLY_TEMPLATES).items():
+            # (text, needs_code): only {code} is filled in per turn
+            self._replies[state] = tuple(
+                (text.replace("{name}", persona_name), "{code}" in text) for text in variants
+            )
+
+    def has(self, state: str) -> bool:
+        """True if there are templates for a state."""
+        return bool(self._replies.get(state))
+
+    def reply(self, state: str, session_id: str, turn: int) -> Optional[str]:
+        """
+        Pick the template reply for one turn.
+
+        Returns:
+            Reply text, or None if the state has no templates
+        """
+        variants = self._replies.get(state)
+        if not variants:
+            return None
+        seed = zlib.crc32(f"{session_id}:{turn}".encode("utf-8", "surrogatepass"))
+        text, needs_code = variants[seed % len(variants)]
+        if needs_code:
+            text = text.replace("{code}", f"{1000 + seed % 9000}")
+        return text
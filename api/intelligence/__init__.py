@@ -3,7 +3,7 @@ Intelligence Extraction Module
 
 This module provides comprehensive intelligence extraction for scam detection:
 - Regex-based entity extraction (UPI, phone, links, etc.)
-- Enhanced URL phishing analysis
+- Enhanced URL phishing analysis (inline or deferred deep checks)
 - Scam classification and confidence scoring
 - Session-based intelligence aggregation
 """
@@ -15,6 +15,9 @@ from .patterns import (
     extract_bank_accounts,
     extract_emails,
     extract_suspicious_keywords,
+    scan_entities,
+    group_entities,
+    EntitySpan,
 )
 
 from .link_analyzer import (
@@ -26,6 +29,7 @@ from .link_analyzer import (
 from .classifier import (
     ScamClassifier,
     ScamAnalysis,
+    ClassifierState,
     ScamType,
     UrgencyLevel,
 )
@@ -38,6 +42,8 @@ from .session_store import (
     session_store,  # Global instance
 )
 
+from .deep_checks import DeepCheckScheduler
+
 
 __all__ = [
     # Patterns
@@ -47,6 +53,9 @@ __all__ = [
     "extract_bank_accounts",
     "extract_emails",
     "extract_suspicious_keywords",
+    "scan_entities",
+    "group_entities",
+    "EntitySpan",
     # Link Analysis
     "LinkAnalyzer",
     "LinkRiskReport",
@@ -54,6 +63,7 @@ __all__ = [
     # Classification
     "ScamClassifier",
     "ScamAnalysis",
+    "ClassifierState",
     "ScamType",
     "UrgencyLevel",
     # Extraction
@@ -62,4 +72,5 @@ __all__ = [
     "SessionStore",
     "SessionIntelligence",
     "session_store",
+    "DeepCheckScheduler",
 ]
@@ -9,8 +9,10 @@ This module provides:
 """
 
 from enum import Enum
-from typing import Dict, List, Optional, Set
-from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+
+from .matcher import KEYWORD_AUTOMATON, KeywordHits
 
 
 class ScamType(str, Enum):
@@ -43,7 +45,7 @@ class ScamIntent(str, Enum):
     UNKNOWN = "unknown"
 
 
-@dataclass
+@dataclass(slots=True)
 class ScamAnalysis:
     """Complete scam analysis result."""
     scam_type: ScamType
@@ -66,9 +68,39 @@ class ScamAnalysis:
         }
 
 
+_NO_HITS: tuple = ()
+
+
+@dataclass(slots=True)
+class ClassifierState:
+    """
+    Running keyword state for one conversation.
+    
+    Holds every keyword hit seen so far, per table, so a new message can be
+    folded in without rescanning the whole conversation. `tail` keeps the
+    end of the lowercased conversation text so phrases split across two
+    messages are still found. Hits are small tuples (one per session
+    adds up), and tables without hits have no entry; read them through
+    found().
+    """
+    hits: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    word_count: int = 0
+    message_count: int = 0
+    tail: str = ""
+    
+    def found(self, table: str) -> Tuple[str, ...]:
+        """Keywords of a table seen so far (empty if none)."""
+        return self.hits.get(table, _NO_HITS)
+
+
 class ScamClassifier:
     """
     Classifies scams and calculates dynamic confidence.
+    
+    Two ways to use it:
+    - classify(text, intel): one-shot analysis of a full conversation text
+    - new_state() / update_state() / classify_state(): incremental analysis,
+      O(len(message)) per message, producing the same ScamAnalysis
     """
     
     # === SCAM TYPE INDICATORS ===
@@ -186,6 +218,34 @@ class ScamClassifier:
     PROVIDE_INDICATORS = {'here is', 'sending', 'details are', 'account is', 'pay to', 'click this'}
     PUSHBACK_INDICATORS = {'why', 'no', 'cannot', 'dont', 'stop', 'hurry', 'trust me', 'do not worry'}
     
+    # === KEYWORD TABLES (substring-matched against lowercased text) ===
+    SCAM_TYPE_TABLES = {
+        ScamType.BANK_FRAUD: BANK_FRAUD_KEYWORDS,
+        ScamType.UPI_FRAUD: UPI_FRAUD_KEYWORDS,
+        ScamType.PHISHING: PHISHING_KEYWORDS,
+        ScamType.LOTTERY_SCAM: LOTTERY_KEYWORDS,
+        ScamType.JOB_SCAM: JOB_SCAM_KEYWORDS,
+        ScamType.TECH_SUPPORT: TECH_SUPPORT_KEYWORDS,
+        ScamType.LOAN_SCAM: LOAN_SCAM_KEYWORDS,
+    }
+    
+    KEYWORD_TABLES = {
+        **{scam_type.value: keywords for scam_type, keywords in SCAM_TYPE_TABLES.items()},
+        "threats": set(THREAT_PATTERNS),
+        "asks_for": set(ASKS_FOR_PATTERNS),
+        "impersonation": set(IMPERSONATION_ENTITIES),
+        "high_urgency": HIGH_URGENCY,
+        "medium_urgency": MEDIUM_URGENCY,
+        "request": REQUEST_INDICATORS,
+        "pushback": PUSHBACK_INDICATORS,
+    }
+    
+    # Longest keyword; a phrase split across two messages ends at most this far back
+    _MAX_KEYWORD_LEN = max(len(kw) for table in KEYWORD_TABLES.values() for kw in table)
+    
+    # Name prefix of this classifier's tables in the shared keyword automaton
+    TABLE_PREFIX = "classifier."
+    
     def classify(self, text: str, intel: dict) -> ScamAnalysis:
         """
         Analyze text and intelligence to classify scam.
@@ -197,28 +257,77 @@ class ScamClassifier:
         Returns:
             ScamAnalysis with type, confidence, urgency, etc.
         """
-        text_lower = text.lower()
+        state = self.new_state()
+        self.update_state(state, text)
+        return self.classify_state(state, intel)
+    
+    def new_state(self) -> ClassifierState:
+        """Create an empty incremental state for a new conversation."""
+        return ClassifierState()
+    
+    def update_state(self, state: ClassifierState, text: str) -> ClassifierState:
+        """
+        Fold one more message into an incremental state.
         
-        # Detect scam type
-        scam_type = self._detect_scam_type(text_lower, intel)
+        Equivalent to appending the text to the " "-joined conversation
+        that classify() would see, but only scans the new message (plus a
+        short tail of the previous text for phrases spanning the boundary).
+        """
+        lowered = text.lower()
+        
+        # The message itself; the scan is shared with the extractor's pass
+        self._merge_hits(state, KEYWORD_AUTOMATON.scan(lowered))
+        
+        if state.message_count:
+            # Phrases starting in the previous text end within the first
+            # _MAX_KEYWORD_LEN - 1 characters of this one
+            boundary = state.tail + " " + lowered[:self._MAX_KEYWORD_LEN - 1]
+            self._merge_hits(state, KEYWORD_AUTOMATON.scan(boundary))
+            lowered = state.tail + " " + lowered
+        
+        state.word_count += len(text.split())
+        state.message_count += 1
+        state.tail = lowered[-(self._MAX_KEYWORD_LEN - 1):]
+        return state
+    
+    def _merge_hits(self, state: ClassifierState, hits: KeywordHits) -> None:
+        """Add the classifier tables' hits from one automaton scan to the state."""
+        for name in self.KEYWORD_TABLES:
+            table = self.TABLE_PREFIX + name
+            if table in hits:
+                known = state.hits.get(name, _NO_HITS)
+                added = tuple(k for k in hits.keywords(table) if k not in known)
+                if added:
+                    state.hits[name] = known + added
+    
+    def classify_state(self, state: ClassifierState, intel: dict) -> ScamAnalysis:
+        """
+        Build a ScamAnalysis from an incremental state and current intel.
         
-        # Calculate confidence
-        confidence = self._calculate_confidence(text_lower, intel)
+        Args:
+            state: State fed with every message of the conversation
+            intel: Extracted intelligence dictionary (lists or sets)
+        """
+        # Detect scam type
+        scam_type = self._detect_scam_type(state, intel)
         
         # Detect urgency
-        urgency = self._detect_urgency(text_lower)
+        urgency = self._detect_urgency(state)
         
         # Detect impersonation
-        impersonating = self._detect_impersonation(text_lower)
+        impersonating = self._detect_impersonation(state)
         
         # Detect threats
-        threats = self._detect_threats(text_lower)
+        threats = self._detect_threats(state)
+        
+        # Calculate confidence (reuses the detections above)
+        confidence = self._calculate_confidence(intel, threats, impersonating, urgency)
         
         # Detect what scammer asks for
-        asks_for = self._detect_asks_for(text_lower)
+        asks_for = self._detect_asks_for(state)
         
         # Detect intent
-        intent = self._detect_intent(text_lower, asks_for, intel)
+        intent = self._detect_intent(state, asks_for, intel)
         
         return ScamAnalysis(
             scam_type=scam_type,
@@ -230,10 +339,10 @@ class ScamClassifier:
             intent=intent
         )
     
-    def _detect_intent(self, text: str, asks_for: List[str], intel: dict) -> ScamIntent:
+    def _detect_intent(self, state: ClassifierState, asks_for: List[str], intel: dict) -> ScamIntent:
         """Detect the intent of the message."""
         # If asking for something -> REQUEST_INFO
-        if asks_for or any(ind in text for ind in self.REQUEST_INDICATORS):
+        if asks_for or state.found("request"):
             return ScamIntent.REQUEST_INFO
             
         # If providing bank/upi details -> PROVIDE_INFO
@@ -241,43 +350,23 @@ class ScamClassifier:
             return ScamIntent.PROVIDE_INFO
             
         # If pushback language -> PUSHBACK
-        if any(ind in text for ind in self.PUSHBACK_INDICATORS):
+        if state.found("pushback"):
             return ScamIntent.PUSHBACK
             
         # Default fallback
-        if len(text.split()) < 5:
+        if state.word_count < 5:
             return ScamIntent.CHIT_CHAT
             
         return ScamIntent.UNKNOWN
     
-    def _detect_scam_type(self, text: str, intel: dict) -> ScamType:
+    def _detect_scam_type(self, state: ClassifierState, intel: dict) -> ScamType:
         """Detect the type of scam based on keywords and intel."""
+        # Keyword matching
         scores = {
-            ScamType.BANK_FRAUD: 0,
-            ScamType.UPI_FRAUD: 0,
-            ScamType.PHISHING: 0,
-            ScamType.LOTTERY_SCAM: 0,
-            ScamType.JOB_SCAM: 0,
-            ScamType.TECH_SUPPORT: 0,
-            ScamType.LOAN_SCAM: 0,
+            scam_type: len(state.found(scam_type.value))
+            for scam_type in self.SCAM_TYPE_TABLES
         }
         
-        # Keyword matching
-        for kw in self.BANK_FRAUD_KEYWORDS:
-            if kw in text: scores[ScamType.BANK_FRAUD] += 1
-        for kw in self.UPI_FRAUD_KEYWORDS:
-            if kw in text: scores[ScamType.UPI_FRAUD] += 1
-        for kw in self.PHISHING_KEYWORDS:
-            if kw in text: scores[ScamType.PHISHING] += 1
-        for kw in self.LOTTERY_KEYWORDS:
-            if kw in text: scores[ScamType.LOTTERY_SCAM] += 1
-        for kw in self.JOB_SCAM_KEYWORDS:
-            if kw in text: scores[ScamType.JOB_SCAM] += 1
-        for kw in self.TECH_SUPPORT_KEYWORDS:
-            if kw in text: scores[ScamType.TECH_SUPPORT] += 1
-        for kw in self.LOAN_SCAM_KEYWORDS:
-            if kw in text: scores[ScamType.LOAN_SCAM] += 1
-        
         # Intel-based boosting
         if intel.get("upiIds"): scores[ScamType.UPI_FRAUD] += 3
         if intel.get("phishingLinks"): scores[ScamType.PHISHING] += 3
@@ -289,7 +378,13 @@ class ScamClassifier:
             return max_type[0]
         return ScamType.UNKNOWN
     
-    def _calculate_confidence(self, text: str, intel: dict) -> int:
+    def _calculate_confidence(
+        self,
+        intel: dict,
+        threats: List[str],
+        impersonating: Optional[str],
+        urgency: UrgencyLevel
+    ) -> int:
         """
         Calculate dynamic confidence score (0-100).
         
@@ -328,16 +423,14 @@ class ScamClassifier:
         score += min(keyword_score, 25)
         
         # Threats
-        threats = self._detect_threats(text)
         if threats:
             score += 15
         
         # Impersonation
-        if self._detect_impersonation(text):
+        if impersonating:
             score += 10
         
         # Urgency
-        urgency = self._detect_urgency(text)
         if urgency == UrgencyLevel.HIGH:
             score += 10
         elif urgency == UrgencyLevel.MEDIUM:
@@ -345,34 +438,37 @@ class ScamClassifier:
         
         return min(max(score, 0), 100)
     
-    def _detect_urgency(self, text: str) -> UrgencyLevel:
+    def _detect_urgency(self, state: ClassifierState) -> UrgencyLevel:
         """Detect urgency level in message."""
-        if any(kw in text for kw in self.HIGH_URGENCY):
+        if state.found("high_urgency"):
             return UrgencyLevel.HIGH
-        if any(kw in text for kw in self.MEDIUM_URGENCY):
+        if state.found("medium_urgency"):
             return UrgencyLevel.MEDIUM
         return UrgencyLevel.LOW
     
-    def _detect_impersonation(self, text: str) -> Optional[str]:
+    def _detect_impersonation(self, state: ClassifierState) -> Optional[str]:
         """Detect if scammer is impersonating an entity."""
+        found = state.found("impersonation")
         for keyword, entity in self.IMPERSONATION_ENTITIES.items():
-            if keyword in text:
+            if keyword in found:
                 return entity
         return None
     
-    def _detect_threats(self, text: str) -> List[str]:
+    def _detect_threats(self, state: ClassifierState) -> List[str]:
         """Detect threats in message."""
-        threats = []
-        for pattern in self.THREAT_PATTERNS:
-            if pattern in text:
-                threats.append(pattern)
-        return threats
+        found = state.found("threats")
+        return [pattern for pattern in self.THREAT_PATTERNS if pattern in found]
     
-    def _detect_asks_for(self, text: str) -> List[str]:
+    def _detect_asks_for(self, state: ClassifierState) -> List[str]:
         """Detect what information scammer is asking for."""
+        found = state.found("asks_for")
         asks = []
         for pattern, label in self.ASKS_FOR_PATTERNS.items():
-            if pattern in text:
+            if pattern in found:
                 if label not in asks:
                     asks.append(label)
         return asks
+
+
+for _name, _keywords in ScamClassifier.KEYWORD_TABLES.items():
+    KEYWORD_AUTOMATON.add_table(ScamClassifier.TABLE_PREFIX + _name, _keywords)
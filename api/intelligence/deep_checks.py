@@ -0,0 +1,103 @@
+"""
+Deep Check Scheduler - Background Link Verdict Upgrades
+
+In deferred link-analysis mode a request only waits for the offline
+verdict (institutional rules, masking, typosquatting, TLD, IP). This
+scheduler runs the slow WHOIS and web reputation checks afterwards and
+hands the upgraded report to the SessionStore, which merges it into the
+session and re-runs the classifier.
+
+Checks run as tasks on the server's event loop and merge their result
+under the session lock, like a regular turn.
+"""
+
+import asyncio
+from typing import List, Set, Tuple
+
+from .extractor import IntelligenceExtractor
+from .link_analyzer import LinkAnalyzer
+
+
+class DeepCheckScheduler:
+    """
+    Runs full LinkAnalyzer checks in the background and upgrades sessions.
+
+    Key behaviors:
+    - One task per (session, URL), duplicates are ignored while in flight
+    - Concurrency bounded by a semaphore
+    - Without a running event loop the checks run inline (scripts, tests)
+    """
+
+    def __init__(self, analyzer: LinkAnalyzer, store: "SessionStore", max_concurrent: int = 8):
+        """
+        Initialize the scheduler.
+
+        Args:
+            analyzer: LinkAnalyzer used for the deep checks (shares its cache)
+            store: SessionStore receiving the upgraded reports
+            max_concurrent: Deep checks allowed to run at once
+        """
+        self.analyzer = analyzer
+        self.store = store
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._tasks: Set[asyncio.Task] = set()
+        self._inflight: Set[Tuple[str, str]] = set()
+
+    @property
+    def pending(self) -> int:
+        """Number of deep checks not finished yet."""
+        return len(self._tasks)
+
+    def schedule(self, session_id: str, urls: List[str], message_context: str = "") -> None:
+        """
+        Queue deep checks for URLs that only got an offline verdict.
+
+        Args:
+            session_id: Session the URLs were seen in
+            urls: URLs to check
+            message_context: Text of the message the URLs came from
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        for url in urls:
+            key = (session_id, url)
+            if key in self._inflight:
+                continue
+            if loop is None:
+                # No event loop: run the checks right away
+                report = self.analyzer.analyze(url, message_context=message_context)
+                self.store.upgrade_link_report(session_id, IntelligenceExtractor._report_to_dict(report))
+                continue
+            self._inflight.add(key)
+            task = loop.create_task(self._run(session_id, url, message_context))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def drain(self, timeout: float = 10.0) -> int:
+        """
+        Wait for running checks (e.g. on shutdown).
+
+        Returns:
+            Number of checks still unfinished after the timeout
+        """
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), timeout=timeout)
+        return self.pending
+
+    async def _run(self, session_id: str, url: str, message_context: str) -> None:
+        """Run one deep check and merge the result into the session."""
+        try:
+            async with self._semaphore:
+                report = await self.analyzer.analyze_async(url, message_context=message_context)
+            async with self.store.lock_async(session_id):
+                session = self.store.upgrade_link_report(session_id, IntelligenceExtractor._report_to_dict(report))
+            if session:
+                print(f"[DeepChecks] {url} -> {report.risk.value} (session {session_id}, "
+                      f"confidence {session.confidence})")
+        except Exception as e:
+            print(f"[DeepChecks] Deep check failed for {url}: {e}")
+        finally:
+            self._inflight.discard((session_id, url))
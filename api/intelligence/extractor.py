@@ -2,20 +2,16 @@
 Intelligence Extractor - Main Orchestrator
 
 This module orchestrates the extraction of scam indicators from messages.
-It uses patterns.py for regex extraction and link_analyzer.py for URL validation.
+It uses patterns.py for entity extraction and link_analyzer.py for URL validation.
 """
 
-from typing import Dict, List, Any
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Any, Optional, Tuple
 
-from .patterns import (
-    extract_urls,
-    extract_upi_ids,
-    extract_phone_numbers,
-    extract_bank_accounts,
-    extract_emails,
-    extract_suspicious_keywords
-)
-from .link_analyzer import LinkAnalyzer, RiskLevel
+from .patterns import scan_entities, group_entities
+from .link_analyzer import LinkAnalyzer, LinkRiskReport, RiskLevel
 
 
 class IntelligenceExtractor:
@@ -31,14 +27,37 @@ class IntelligenceExtractor:
     - Emails (for LLM context)
     """
     
-    def __init__(self, enable_link_analysis: bool = True):
+    LINK_MODES = ("inline", "deferred")
+    
+    def __init__(
+        self,
+        enable_link_analysis: bool = True,
+        link_deadline: Optional[float] = None,
+        max_link_workers: Optional[int] = None,
+        link_mode: Optional[str] = None,
+    ):
         """
         Initialize the extractor.
         
         Args:
             enable_link_analysis: Whether to perform deep link analysis
+            link_deadline: Seconds to wait for all URLs of one message
+                (default: LINK_ANALYSIS_DEADLINE env, 8s)
+            max_link_workers: Threads for concurrent URL analysis
+                (default: LINK_ANALYSIS_WORKERS env, 8)
+            link_mode: "inline" waits for WHOIS/web checks; "deferred" returns
+                the offline verdict and lists the URLs still needing deep checks
+                under "pendingLinks" (default: LINK_ANALYSIS_MODE env, inline)
         """
         self.link_analyzer = LinkAnalyzer() if enable_link_analysis else None
+        self.link_deadline = link_deadline if link_deadline is not None else float(
+            os.getenv("LINK_ANALYSIS_DEADLINE", "8"))
+        self.max_link_workers = max_link_workers or int(os.getenv("LINK_ANALYSIS_WORKERS", "8"))
+        self.link_mode = (link_mode or os.getenv("LINK_ANALYSIS_MODE", "inline")).lower()
+        if self.link_mode not in self.LINK_MODES:
+            raise ValueError(f"Unknown link analysis mode: {self.link_mode}")
+        self._link_pool: Optional[ThreadPoolExecutor] = None
+        self._background: set = set()  # async analyses still running past the deadline
     
     def extract(self, text: str) -> Dict[str, Any]:
         """
@@ -50,45 +69,190 @@ class IntelligenceExtractor:
         Returns:
             Dictionary with extracted intelligence
         """
-        # Extract all entities using regex
-        urls = extract_urls(text)
-        upi_ids = extract_upi_ids(text)
-        phone_numbers = extract_phone_numbers(text)
-        bank_accounts = extract_bank_accounts(text, phone_numbers)  # Pass phones to avoid false positives
-        emails = extract_emails(text)
-        keywords = extract_suspicious_keywords(text)
+        entities = self._extract_entities(text)
         
         # Analyze URLs for phishing (pass message context for institutional rules)
+        reports, pending = [], []
+        if self.link_analyzer and entities["allLinks"]:
+            if self.link_mode == "deferred":
+                reports, pending = self._analyze_links_deferred(entities["allLinks"], text)
+            else:
+                reports = self._analyze_links(entities["allLinks"], text)
+        
+        return self._build_intel(entities, reports, pending)
+    
+    async def extract_async(self, text: str) -> Dict[str, Any]:
+        """
+        Async variant of extract().
+        
+        The CPU-bound regex pass runs in the loop's executor and link
+        analysis is awaited, so the event loop never blocks on a lookup.
+        """
+        loop = asyncio.get_running_loop()
+        entities = await loop.run_in_executor(None, self._extract_entities, text)
+        
+        reports, pending = [], []
+        if self.link_analyzer and entities["allLinks"]:
+            if self.link_mode == "deferred":
+                reports, pending = self._analyze_links_deferred(entities["allLinks"], text)
+            else:
+                reports = await self._analyze_links_async(entities["allLinks"], text)
+        
+        return self._build_intel(entities, reports, pending)
+
+    async def extract_many_async(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Bulk variant of extract_async() for batches of messages.
+
+        Identical texts (scam blasts) are extracted once, the regex pass for
+        the whole batch is a single executor job, and link analysis for all
+        messages runs concurrently. Results are in input order; each
+        duplicate gets its own copy of the intel dict (and its lists), since
+        the turns it feeds may belong to different sessions.
+        """
+        unique = list(dict.fromkeys(texts))
+        loop = asyncio.get_running_loop()
+        entities_list = await loop.run_in_executor(
+            None, lambda: [self._extract_entities(text) for text in unique])
+
+        async def finish(text: str, entities: Dict[str, List[str]]) -> Dict[str, Any]:
+            reports, pending = [], []
+            if self.link_analyzer and entities["allLinks"]:
+                if self.link_mode == "deferred":
+                    reports, pending = self._analyze_links_deferred(entities["allLinks"], text)
+                else:
+                    reports = await self._analyze_links_async(entities["allLinks"], text)
+            return self._build_intel(entities, reports, pending)
+
+        intel_list = await asyncio.gather(*(finish(t, e) for t, e in zip(unique, entities_list)))
+        by_text = dict(zip(unique, intel_list))
+        results, seen = [], set()
+        for text in texts:
+            intel = by_text[text]
+            if text in seen:
+                intel = {key: list(value) for key, value in intel.items()}
+            seen.add(text)
+            results.append(intel)
+        return results
+
+    def _analyze_links(self, urls: List[str], text: str) -> List[LinkRiskReport]:
+        """
+        Analyze all URLs of a message concurrently on a bounded thread pool.
+        
+        URLs still running at the deadline get their offline verdict; their
+        lookups finish in the background and warm the link cache.
+        """
+        if self._link_pool is None:
+            self._link_pool = ThreadPoolExecutor(
+                max_workers=self.max_link_workers, thread_name_prefix="link-analysis")
+        
+        futures = [self._link_pool.submit(self.link_analyzer.analyze, url, text) for url in urls]
+        wait(futures, timeout=self.link_deadline)
+        
+        reports = []
+        for url, future in zip(urls, futures):
+            report = None
+            if future.done():
+                try:
+                    report = future.result()
+                except Exception as e:
+                    print(f"[Extractor] Link analysis failed for {url}: {e}")
+            else:
+                print(f"[Extractor] Link analysis deadline ({self.link_deadline}s) hit for {url}")
+            reports.append(report or self.link_analyzer.analyze_offline(url, message_context=text))
+        return reports
+    
+    async def _analyze_links_async(self, urls: List[str], text: str) -> List[LinkRiskReport]:
+        """Async variant of _analyze_links() using one task per URL."""
+        tasks = [
+            asyncio.ensure_future(self.link_analyzer.analyze_async(url, message_context=text))
+            for url in urls
+        ]
+        _, pending = await asyncio.wait(tasks, timeout=self.link_deadline)
+        
+        # Let late lookups finish (they populate the cache) without leaking errors
+        for task in pending:
+            self._background.add(task)
+            task.add_done_callback(self._forget_background)
+        
+        reports = []
+        for url, task in zip(urls, tasks):
+            report = None
+            if task.done():
+                try:
+                    report = task.result()
+                except Exception as e:
+                    print(f"[Extractor] Link analysis failed for {url}: {e}")
+            else:
+                print(f"[Extractor] Link analysis deadline ({self.link_deadline}s) hit for {url}")
+            reports.append(report or self.link_analyzer.analyze_offline(url, message_context=text))
+        return reports
+    
+    def _analyze_links_deferred(self, urls: List[str], text: str) -> Tuple[List[LinkRiskReport], List[str]]:
+        """Offline (or cached) verdicts now; returns the URLs that still need deep checks."""
+        reports, pending = [], []
+        for url in urls:
+            report, needs_deep_check = self.link_analyzer.analyze_deferred(url, message_context=text)
+            reports.append(report)
+            if needs_deep_check:
+                pending.append(url)
+        return reports, pending
+    
+    def _forget_background(self, task: "asyncio.Task") -> None:
+        """Drop a finished background analysis, consuming its exception."""
+        self._background.discard(task)
+        if not task.cancelled():
+            task.exception()
+    
+    def _extract_entities(self, text: str) -> Dict[str, List[str]]:
+        """Run the fused entity scanner over a message (no network access)."""
+        entities = group_entities(scan_entities(text))
+        return {
+            "allLinks": entities["url"],
+            "upiIds": entities["upi"],
+            "phoneNumbers": entities["phone"],
+            "bankAccounts": entities["bank_account"],  # Phones already filtered out
+            "emails": entities["email"],
+            "suspiciousKeywords": entities["keyword"],
+        }
+    
+    def _build_intel(self, entities: Dict[str, List[str]], reports: List[LinkRiskReport],
+                     pending: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Combine regex entities and link reports into the intel dictionary."""
         phishing_links = []
         link_reports = []
         
-        if self.link_analyzer and urls:
-            for url in urls:
-                report = self.link_analyzer.analyze(url, message_context=text)
-                link_reports.append({
-                    "url": report.url,
-                    "risk": report.risk.value,
-                    "reasons": report.reasons,
-                    "domain": report.domain,
-                    "etld_plus_one": report.etld_plus_one,
-                    "domain_age_days": report.domain_age_days,
-                    "creation_date": report.creation_date,
-                    "checks_performed": report.checks_performed
-                })
-                
-                # Add to phishing links if risky (including CRITICAL)
-                if report.risk in (RiskLevel.CRITICAL, RiskLevel.HIGH_RISK, RiskLevel.SUSPICIOUS):
-                    phishing_links.append(url)
+        for report in reports:
+            link_reports.append(self._report_to_dict(report))
+            
+            # Add to phishing links if risky (including CRITICAL)
+            if report.risk in (RiskLevel.CRITICAL, RiskLevel.HIGH_RISK, RiskLevel.SUSPICIOUS):
+                phishing_links.append(report.url)
         
         return {
-            "bankAccounts": bank_accounts,
-            "upiIds": upi_ids,
+            "bankAccounts": entities["bankAccounts"],
+            "upiIds": entities["upiIds"],
             "phishingLinks": phishing_links,
-            "phoneNumbers": phone_numbers,
-            "suspiciousKeywords": keywords,
-            "emails": emails,
-            "allLinks": urls,
-            "linkReports": link_reports  # Detailed reports for logging/LLM
+            "phoneNumbers": entities["phoneNumbers"],
+            "suspiciousKeywords": entities["suspiciousKeywords"],
+            "emails": entities["emails"],
+            "allLinks": entities["allLinks"],
+            "linkReports": link_reports,  # Detailed reports for logging/LLM
+            "pendingLinks": pending or []  # Deferred mode: deep checks still to run
+        }
+    
+    @staticmethod
+    def _report_to_dict(report: LinkRiskReport) -> Dict[str, Any]:
+        """Serialize a LinkRiskReport for the intel dictionary."""
+        return {
+            "url": report.url,
+            "risk": report.risk.value,
+            "reasons": report.reasons,
+            "domain": report.domain,
+            "etld_plus_one": report.etld_plus_one,
+            "domain_age_days": report.domain_age_days,
+            "creation_date": report.creation_date,
+            "checks_performed": report.checks_performed
         }
     
     def extract_from_history(self, messages: List[Dict]) -> Dict[str, Any]:
@@ -9,34 +9,54 @@ Enhanced Features:
 - Subdomain masking detection
 - Typosquatting detection
 - Enhanced TLD risk scoring
+- Cached WHOIS / reputation / report results (see link_cache.py)
 """
 
+import asyncio
 import re
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from datetime import datetime, timezone
-from difflib import SequenceMatcher
 from enum import Enum
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from urllib.parse import urlparse
 
-# These imports will be available after installing dependencies
-try:
+from .link_cache import LinkCache, canonicalize_url
+from .matcher import KEYWORD_AUTOMATON, KeywordHits
+from .typosquat import TyposquatIndex
+
+from ..metrics import LINK_CHECK_SECONDS, LINK_LOOKUP_FAILURES, timed
+from ..optional import installed
+
+# Optional dependencies, imported on first use (see _whois_lookup, _web_search, _tld_extract)
+WHOIS_AVAILABLE = installed("whois")
+DDGS_AVAILABLE = installed("duckduckgo_search")
+TLDEXTRACT_AVAILABLE = installed("tldextract")
+
+_tld_extractor = None
+
+
+def _tld_extract(domain: str):
+    """
+    tldextract with its bundled public suffix snapshot only: never fetches
+    the list over the network or writes a disk cache.
+    """
+    global _tld_extractor
+    if _tld_extractor is None:
+        import tldextract
+        _tld_extractor = tldextract.TLDExtract(cache_dir=None, suffix_list_urls=())
+    return _tld_extractor(domain)
+
+
+@timed(LINK_CHECK_SECONDS, check="whois")
+def _whois_lookup(domain: str):
     import whois
-    WHOIS_AVAILABLE = True
-except ImportError:
-    WHOIS_AVAILABLE = False
+    return whois.whois(domain)
 
-try:
-    from duckduckgo_search import DDGS
-    DDGS_AVAILABLE = True
-except ImportError:
-    DDGS_AVAILABLE = False
 
-try:
-    import tldextract
-    TLDEXTRACT_AVAILABLE = True
-except ImportError:
-    TLDEXTRACT_AVAILABLE = False
+@timed(LINK_CHECK_SECONDS, check="web_search")
+def _web_search(query: str, max_results: int) -> list:
+    from duckduckgo_search import DDGS
+    return list(DDGS().text(query, max_results=max_results))
 
 
 class RiskLevel(str, Enum):
@@ -129,6 +149,10 @@ class LinkAnalyzer:
         'echallan.parivahan.gov.in'
     }
     
+    # === SUBDOMAIN MASKING (trusted-looking patterns, checked in order) ===
+    MASKING_PATTERNS = ['.bank.in', '.gov.in', 'sbi', 'hdfc', 'icici',
+                        'axis', 'paytm', 'phonepe']
+    
     # === SCAM KEYWORDS for web search ===
     SCAM_KEYWORDS = {
         'scam', 'fraud', 'fake', 'phishing', 'malware', 'spam',
@@ -136,16 +160,28 @@ class LinkAnalyzer:
         'cybercrime', 'hacked', 'stolen'
     }
     
-    def __init__(self, enable_whois: bool = True, enable_web_search: bool = True):
+    # === KEYWORD TABLES (names in the shared keyword automaton) ===
+    BANK_CONTEXT_TABLE = "link.bank_context"
+    GOVT_CONTEXT_TABLE = "link.govt_context"
+    URGENCY_CONTEXT_TABLE = "link.urgency_context"
+    MASKING_TABLE = "link.masking"
+    HYPHENATED_BRAND_TABLE = "link.hyphenated_brand"
+    SCAM_REPORT_TABLE = "link.scam_report"
+    
+    def __init__(self, enable_whois: bool = True, enable_web_search: bool = True,
+                 cache: Optional[LinkCache] = None):
         """
         Initialize the LinkAnalyzer.
         
         Args:
             enable_whois: Whether to perform WHOIS lookups
             enable_web_search: Whether to search the web for reputation
+            cache: Result cache (default: LinkCache.from_env())
         """
         self.enable_whois = enable_whois and WHOIS_AVAILABLE
         self.enable_web_search = enable_web_search and DDGS_AVAILABLE
+        self.cache = cache if cache is not None else LinkCache.from_env()
+        self.brand_index = TyposquatIndex(self.KNOWN_BRANDS)
     
     def analyze(self, url: str, message_context: str = "") -> LinkRiskReport:
         """
@@ -158,11 +194,96 @@ class LinkAnalyzer:
         Returns:
             LinkRiskReport with risk assessment
         """
+        report, needs_network = self._analyze_offline(url, message_context)
+        if not needs_network:
+            return report
+        
+        report_key = self._report_key(url, message_context)
+        cached = self.cache.get(report_key)
+        if cached is not LinkCache.MISS:
+            return self._report_from_cache(url, cached)
+        
+        # Check 8: WHOIS - Domain age
+        if self.enable_whois:
+            report.checks_performed.append("WHOIS domain age")
+            self._apply_domain_age(report, self._check_domain_age(report.etld_plus_one))
+        
+        # Check 9: Web reputation (skip if already critical)
+        if self.enable_web_search and report.risk not in (RiskLevel.CRITICAL, RiskLevel.HIGH_RISK):
+            report.checks_performed.append("Web reputation search")
+            self._apply_web_reputation(report, self._check_web_reputation(report.etld_plus_one))
+        
+        return self._store_report(report_key, self._finalize(report))
+    
+    def analyze_offline(self, url: str, message_context: str = "") -> LinkRiskReport:
+        """
+        Analyze a URL with the offline checks only (no WHOIS / web search).
+        
+        Used as the fallback verdict when the deep checks do not finish in time.
+        """
+        report, _ = self._analyze_offline(url, message_context)
+        return self._finalize(report)
+    
+    def analyze_deferred(self, url: str, message_context: str = "") -> Tuple[LinkRiskReport, bool]:
+        """
+        Fast verdict for deferred mode: never touches the network.
+        
+        Returns:
+            Tuple of (report, needs_deep_check). The report is the cached full
+            verdict when there is one, otherwise the offline verdict; in the
+            latter case needs_deep_check tells the caller to schedule analyze().
+        """
+        report, needs_network = self._analyze_offline(url, message_context)
+        if not needs_network:
+            return report, False
+        if not (self.enable_whois or self.enable_web_search):
+            return self._finalize(report), False
+        
+        cached = self.cache.get(self._report_key(url, message_context))
+        if cached is not LinkCache.MISS:
+            return self._report_from_cache(url, cached), False
+        return self._finalize(report), True
+    
+    async def analyze_async(self, url: str, message_context: str = "") -> LinkRiskReport:
+        """
+        Async variant of analyze().
+        
+        Offline checks run inline; the blocking WHOIS and web search
+        lookups are awaited on worker threads so the event loop stays free.
+        """
+        report, needs_network = self._analyze_offline(url, message_context)
+        if not needs_network:
+            return report
+        
+        report_key = self._report_key(url, message_context)
+        cached = self.cache.get(report_key)
+        if cached is not LinkCache.MISS:
+            return self._report_from_cache(url, cached)
+        
+        if self.enable_whois:
+            report.checks_performed.append("WHOIS domain age")
+            age_result = await asyncio.to_thread(self._check_domain_age, report.etld_plus_one)
+            self._apply_domain_age(report, age_result)
+        
+        if self.enable_web_search and report.risk not in (RiskLevel.CRITICAL, RiskLevel.HIGH_RISK):
+            report.checks_performed.append("Web reputation search")
+            reputation = await asyncio.to_thread(self._check_web_reputation, report.etld_plus_one)
+            self._apply_web_reputation(report, reputation)
+        
+        return self._store_report(report_key, self._finalize(report))
+    
+    @timed(LINK_CHECK_SECONDS, check="offline")
+    def _analyze_offline(self, url: str, message_context: str) -> Tuple[LinkRiskReport, bool]:
+        """
+        Run every check that needs no network access.
+        
+        Returns:
+            Tuple of (report, needs_network). needs_network is False when the
+            report is already final (unparseable URL or trusted domain).
+        """
         reasons = []
         checks_performed = []
         risk = RiskLevel.SAFE
-        domain_age = None
-        creation_date_str = None
         
         # Parse the URL
         try:
@@ -178,7 +299,7 @@ class LinkAnalyzer:
                 reasons=["Could not parse URL"],
                 domain="",
                 checks_performed=["URL parsing"]
-            )
+            ), False
         
         # Extract eTLD+1 (the REAL domain)
         etld_plus_one = self._extract_etld_plus_one(full_domain)
@@ -193,11 +314,14 @@ class LinkAnalyzer:
                 domain=full_domain,
                 etld_plus_one=etld_plus_one,
                 checks_performed=["Trusted domain whitelist"]
-            )
+            ), False
+        
+        # One keyword pass over the message covers every context rule below
+        context = KEYWORD_AUTOMATON.scan(message_context.lower())
         
         # Check 2: Institutional Rules (CRITICAL)
         checks_performed.append("Institutional rules")
-        inst_risk, inst_reason = self._check_institutional_rules(etld_plus_one, message_context)
+        inst_risk, inst_reason = self._check_institutional_rules(etld_plus_one, context)
         if inst_reason:
             reasons.append(inst_reason)
             risk = self._max_risk(risk, inst_risk)
@@ -230,7 +354,7 @@ class LinkAnalyzer:
             risk = self._max_risk(risk, RiskLevel.HIGH_RISK)
         elif tld in self.CONDITIONAL_RISK_TLDS:
             # Only flag if message has urgency keywords
-            if any(kw in message_context.lower() for kw in self.URGENCY_KEYWORDS):
+            if self.URGENCY_CONTEXT_TABLE in context:
                 reasons.append(f"Suspicious TLD .{tld} with urgency context")
                 risk = self._max_risk(risk, RiskLevel.SUSPICIOUS)
         
@@ -239,38 +363,65 @@ class LinkAnalyzer:
             reasons.append("Unusually deep subdomain structure")
             risk = self._max_risk(risk, RiskLevel.SUSPICIOUS)
         
-        # Check 8: WHOIS - Domain age
-        if self.enable_whois:
-            checks_performed.append("WHOIS domain age")
-            age_result = self._check_domain_age(etld_plus_one)
-            if age_result:
-                domain_age, creation_date_str, age_risk, age_reason = age_result
-                if age_reason:
-                    reasons.append(age_reason)
-                    risk = self._max_risk(risk, age_risk)
-        
-        # Check 9: Web reputation (skip if already critical)
-        if self.enable_web_search and risk not in (RiskLevel.CRITICAL, RiskLevel.HIGH_RISK):
-            checks_performed.append("Web reputation search")
-            rep_risk, rep_reason = self._check_web_reputation(etld_plus_one)
-            if rep_reason:
-                reasons.append(rep_reason)
-                risk = self._max_risk(risk, rep_risk)
-        
-        # If no issues found
-        if not reasons:
-            reasons.append("No obvious indicators found")
-        
         return LinkRiskReport(
             url=url,
             risk=risk,
             reasons=reasons,
             domain=full_domain,
             etld_plus_one=etld_plus_one,
-            domain_age_days=domain_age,
-            creation_date=creation_date_str,
             checks_performed=checks_performed
+        ), True
+    
+    def _apply_domain_age(self, report: LinkRiskReport, age_result: Optional[tuple]) -> None:
+        """Fold a _check_domain_age() result into the report."""
+        if not age_result:
+            return
+        domain_age, creation_date_str, age_risk, age_reason = age_result
+        report.domain_age_days = domain_age
+        report.creation_date = creation_date_str
+        if age_reason:
+            report.reasons.append(age_reason)
+            report.risk = self._max_risk(report.risk, age_risk)
+    
+    def _apply_web_reputation(self, report: LinkRiskReport, reputation: tuple) -> None:
+        """Fold a _check_web_reputation() result into the report."""
+        rep_risk, rep_reason = reputation
+        if rep_reason:
+            report.reasons.append(rep_reason)
+            report.risk = self._max_risk(report.risk, rep_risk)
+    
+    def _finalize(self, report: LinkRiskReport) -> LinkRiskReport:
+        """Fill in the default reason when no check flagged the URL."""
+        # If no issues found
+        if not report.reasons:
+            report.reasons.append("No obvious indicators found")
+        return report
+    
+    def _report_key(self, url: str, message_context: str) -> str:
+        """
+        Cache key for a full report.
+        
+        Besides the URL, a report only depends on which context tables the
+        message hits and on which network checks are enabled.
+        """
+        context = KEYWORD_AUTOMATON.scan(message_context.lower())
+        flags = "".join(
+            "1" if table in context else "0"
+            for table in (self.BANK_CONTEXT_TABLE, self.GOVT_CONTEXT_TABLE, self.URGENCY_CONTEXT_TABLE)
         )
+        checks = f"{int(self.enable_whois)}{int(self.enable_web_search)}"
+        return f"report:{checks}:{flags}:{canonicalize_url(url)}"
+    
+    def _store_report(self, key: str, report: LinkRiskReport) -> LinkRiskReport:
+        """Cache a finished report and return it."""
+        self.cache.set(key, asdict(report))
+        return report
+    
+    def _report_from_cache(self, url: str, data: dict) -> LinkRiskReport:
+        """Rebuild a cached report for this exact URL spelling."""
+        data["url"] = url
+        data["risk"] = RiskLevel(data["risk"])
+        return LinkRiskReport(**data)
     
     def _max_risk(self, current: RiskLevel, new: RiskLevel) -> RiskLevel:
         """Return the higher risk level."""
@@ -281,7 +432,7 @@ class LinkAnalyzer:
     def _extract_etld_plus_one(self, domain: str) -> str:
         """Extract the effective TLD+1 (real domain) using tldextract."""
         if TLDEXTRACT_AVAILABLE:
-            ext = tldextract.extract(domain)
+            ext = _tld_extract(domain)
             if ext.suffix:
                 return f"{ext.domain}.{ext.suffix}"
             return ext.domain
@@ -299,17 +450,19 @@ class LinkAnalyzer:
             return '.'.join(parts[-2:])
         return domain
     
-    def _check_institutional_rules(self, etld_plus_one: str, message: str) -> tuple:
+    def _check_institutional_rules(self, etld_plus_one: str, context: KeywordHits) -> tuple:
         """
         Check institutional validation rules.
         
         Banking context: Must use .bank.in
         Government context: Must use .gov.in
-        """
-        message_lower = message.lower()
         
+        Args:
+            etld_plus_one: The real domain of the URL
+            context: Keyword hits of the lowercased message text
+        """
         # Banking Rule
-        if any(bank in message_lower for bank in self.BANK_KEYWORDS):
+        if self.BANK_CONTEXT_TABLE in context:
             if not etld_plus_one.endswith('.bank.in'):
                 # Check if it's a known legacy bank domain
                 legacy_banks = {'hdfcbank.com', 'icicibank.com', 'axisbank.com', 
@@ -319,7 +472,7 @@ class LinkAnalyzer:
                             f"Bank context but URL is not .bank.in (domain: {etld_plus_one})")
         
         # Government Rule
-        if any(kw in message_lower for kw in self.GOVT_KEYWORDS):
+        if self.GOVT_CONTEXT_TABLE in context:
             if not etld_plus_one.endswith('.gov.in'):
                 return (RiskLevel.CRITICAL,
                         f"Government/legal context but URL is not .gov.in (domain: {etld_plus_one})")
@@ -338,11 +491,10 @@ class LinkAnalyzer:
             subdomain = full_domain.replace(etld_plus_one, '').rstrip('.')
             
             # Check for trusted-looking patterns in subdomain
-            trusted_patterns = ['.bank.in', '.gov.in', 'sbi', 'hdfc', 'icici', 
-                               'axis', 'paytm', 'phonepe']
+            found = KEYWORD_AUTOMATON.scan(subdomain).keywords(self.MASKING_TABLE)
             
-            for pattern in trusted_patterns:
-                if pattern in subdomain:
+            for pattern in self.MASKING_PATTERNS:
+                if pattern in found:
                     return (RiskLevel.CRITICAL,
                             f"Subdomain masking: '{pattern}' in subdomain but real domain is '{etld_plus_one}'")
         
@@ -354,30 +506,25 @@ class LinkAnalyzer:
         
         - Hyphenated brands: sbi-bank.in
         - Similar spellings: hdlc.com (similar to hdfc)
+        - Homoglyphs / punycode: g00gle.com, xn--pple-43d.com
         """
         domain_lower = domain.lower()
-        domain_parts = domain_lower.replace('-', '.').split('.')
         
         # Check for hyphenated brand names
-        for brand in self.KNOWN_BRANDS:
-            hyphenated = f"{brand}-"
-            if hyphenated in domain_lower:
-                return (RiskLevel.HIGH_RISK,
-                        f"Hyphenated brand name: '{brand}-' in domain")
-        
-        # Check for similar spellings (typosquatting)
-        for part in domain_parts:
-            if len(part) < 3:
-                continue
-            for brand in self.KNOWN_BRANDS:
-                if part == brand:
-                    continue  # Exact match is fine
-                
-                # Check similarity
-                ratio = SequenceMatcher(None, part, brand).ratio()
-                if 0.7 < ratio < 1.0:
-                    return (RiskLevel.HIGH_RISK,
-                            f"Possible typosquatting: '{part}' similar to '{brand}' ({int(ratio*100)}% match)")
+        hyphenated = KEYWORD_AUTOMATON.scan(domain_lower).spans(self.HYPHENATED_BRAND_TABLE)
+        if hyphenated:
+            _, _, keyword = hyphenated[0]
+            return (RiskLevel.HIGH_RISK,
+                    f"Hyphenated brand name: '{keyword}' in domain")
+        
+        # Check for similar spellings (typosquatting) via the look-alike index
+        match = self.brand_index.check_domain(domain_lower)
+        if match and match.homoglyph:
+            return (RiskLevel.HIGH_RISK,
+                    f"Homoglyph look-alike: '{match.label}' imitates '{match.brand}'")
+        if match:
+            return (RiskLevel.HIGH_RISK,
+                    f"Possible typosquatting: '{match.label}' similar to '{match.brand}' ({int(match.ratio*100)}% match)")
         
         return (RiskLevel.SAFE, None)
     
@@ -399,34 +546,55 @@ class LinkAnalyzer:
         Returns:
             Tuple of (age_days, creation_date_str, risk_level, reason) or None
         """
+        creation_date = self._creation_date(domain)
+        if creation_date is None:
+            return None
+        
+        now = datetime.now(timezone.utc)
+        age_days = (now - creation_date).days
+        creation_date_str = creation_date.strftime("%Y-%m-%d")
+        
+        if age_days < 30:
+            return (age_days, creation_date_str, RiskLevel.HIGH_RISK, 
+                    f"Domain created only {age_days} days ago (registered: {creation_date_str})")
+        elif age_days < 90:
+            return (age_days, creation_date_str, RiskLevel.SUSPICIOUS,
+                    f"Domain is relatively new ({age_days} days old, registered: {creation_date_str})")
+        else:
+            return (age_days, creation_date_str, RiskLevel.SAFE, None)
+    
+    def _creation_date(self, domain: str) -> Optional[datetime]:
+        """
+        WHOIS creation date of a domain (timezone-aware), cached by eTLD+1.
+        
+        Lookup failures and missing dates are cached as None (negative TTL).
+        """
+        key = f"whois:{domain}"
+        cached = self.cache.get(key)
+        if cached is not LinkCache.MISS:
+            return datetime.fromisoformat(cached) if cached else None
+        
+        creation_date = None
         try:
-            w = whois.whois(domain)
+            w = _whois_lookup(domain)
             creation_date = w.creation_date
             
             # Handle list (some WHOIS servers return multiple dates)
             if isinstance(creation_date, list):
                 creation_date = creation_date[0]
             
-            if creation_date:
-                # Make timezone-aware if needed
-                if creation_date.tzinfo is None:
-                    creation_date = creation_date.replace(tzinfo=timezone.utc)
-                
-                now = datetime.now(timezone.utc)
-                age_days = (now - creation_date).days
-                creation_date_str = creation_date.strftime("%Y-%m-%d")
-                
-                if age_days < 30:
-                    return (age_days, creation_date_str, RiskLevel.HIGH_RISK, 
-                            f"Domain created only {age_days} days ago (registered: {creation_date_str})")
-                elif age_days < 90:
-                    return (age_days, creation_date_str, RiskLevel.SUSPICIOUS,
-                            f"Domain is relatively new ({age_days} days old, registered: {creation_date_str})")
-                else:
-                    return (age_days, creation_date_str, RiskLevel.SAFE, None)
+            # Make timezone-aware if needed
+            if creation_date and creation_date.tzinfo is None:
+                creation_date = creation_date.replace(tzinfo=timezone.utc)
         except Exception as e:
             print(f"[LinkAnalyzer] WHOIS lookup failed for {domain}: {e}")
+            LINK_LOOKUP_FAILURES.inc(check="whois")
+            creation_date = None
         
+        if creation_date:
+            self.cache.set(key, creation_date.isoformat())
+            return creation_date
+        self.cache.set(key, None, negative=True)
         return None
     
     def _check_web_reputation(self, domain: str) -> tuple:
@@ -436,25 +604,51 @@ class LinkAnalyzer:
         Returns:
             Tuple of (risk_level, reason) or (SAFE, None) if clean
         """
+        scam_mentions = self._scam_mentions(domain)
+        
+        if scam_mentions is not None and scam_mentions >= 2:
+            return (RiskLevel.HIGH_RISK, 
+                    f"Multiple scam reports found online ({scam_mentions} sources)")
+        elif scam_mentions == 1:
+            return (RiskLevel.SUSPICIOUS,
+                    "Some negative reports found online")
+        
+        return (RiskLevel.SAFE, None)
+    
+    def _scam_mentions(self, domain: str) -> Optional[int]:
+        """
+        Number of web search results mentioning scam keywords, cached by eTLD+1.
+        
+        Returns None if the search failed (cached with the negative TTL).
+        """
+        key = f"reputation:{domain}"
+        cached = self.cache.get(key)
+        if cached is not LinkCache.MISS:
+            return cached
+        
         try:
-            ddgs = DDGS()
             query = f'"{domain}" scam OR fraud OR phishing'
-            results = list(ddgs.text(query, max_results=5))
+            results = _web_search(query, max_results=5)
             
             # Check if any results mention scam keywords
             scam_mentions = 0
             for result in results:
                 text = (result.get('title', '') + ' ' + result.get('body', '')).lower()
-                if any(kw in text for kw in self.SCAM_KEYWORDS):
+                if self.SCAM_REPORT_TABLE in KEYWORD_AUTOMATON.scan(text):
                     scam_mentions += 1
-            
-            if scam_mentions >= 2:
-                return (RiskLevel.HIGH_RISK, 
-                        f"Multiple scam reports found online ({scam_mentions} sources)")
-            elif scam_mentions == 1:
-                return (RiskLevel.SUSPICIOUS,
-                        "Some negative reports found online")
         except Exception as e:
             print(f"[LinkAnalyzer] Web search failed for {domain}: {e}")
+            LINK_LOOKUP_FAILURES.inc(check="web_search")
+            self.cache.set(key, None, negative=True)
+            return None
         
-        return (RiskLevel.SAFE, None)
+        self.cache.set(key, scam_mentions)
+        return scam_mentions
+
+
+KEYWORD_AUTOMATON.add_table(LinkAnalyzer.BANK_CONTEXT_TABLE, LinkAnalyzer.BANK_KEYWORDS)
+KEYWORD_AUTOMATON.add_table(LinkAnalyzer.GOVT_CONTEXT_TABLE, LinkAnalyzer.GOVT_KEYWORDS)
+KEYWORD_AUTOMATON.add_table(LinkAnalyzer.URGENCY_CONTEXT_TABLE, LinkAnalyzer.URGENCY_KEYWORDS)
+KEYWORD_AUTOMATON.add_table(LinkAnalyzer.MASKING_TABLE, LinkAnalyzer.MASKING_PATTERNS)
+KEYWORD_AUTOMATON.add_table(LinkAnalyzer.HYPHENATED_BRAND_TABLE, (f"{brand}-" for brand in LinkAnalyzer.KNOWN_BRANDS))
+KEYWORD_AUTOMATON.add_table(LinkAnalyzer.SCAM_REPORT_TABLE, LinkAnalyzer.SCAM_KEYWORDS)
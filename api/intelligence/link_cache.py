@@ -0,0 +1,214 @@
+"""
+Link Cache - TTL/LRU Cache for Link Analysis Results
+
+The same phishing domain shows up in thousands of scam blasts and again for
+every historical message during backfill. This cache keeps the expensive
+network results of LinkAnalyzer:
+
+- WHOIS creation dates and web reputation, keyed by eTLD+1
+- Full reports, keyed by canonical URL + message context flags
+
+Entries expire after a TTL and the in-memory layer evicts least recently
+used entries. Failed lookups are cached too (negative caching) with a
+shorter TTL, so an unreachable WHOIS server is not hammered per message.
+
+An optional SQLite file (WAL mode) sits behind the memory layer: it
+survives restarts and is shared by every worker pointed at the same path.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL for use as a cache key.
+
+    Lowercases scheme and host, drops "www.", default ports, the fragment
+    and a bare trailing slash. Path and query are kept as-is.
+    """
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if netloc.startswith("www."):
+        netloc = netloc[4:]
+    host, _, port = netloc.rpartition(":")
+    if host and _DEFAULT_PORTS.get(scheme) == port:
+        netloc = host
+    path = "" if parts.path == "/" else parts.path
+    return urlunsplit((scheme, netloc, path, parts.query, ""))
+
+
+class LinkCache:
+    """
+    Two-level key/value cache: in-memory LRU in front of optional SQLite.
+
+    Values must be JSON-serializable. They are stored as JSON text in both
+    layers, so every get() returns a fresh copy callers may mutate.
+    """
+
+    # Returned by get() when the key is absent or expired
+    MISS = object()
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS link_cache (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        ttl: float = 86400.0,
+        negative_ttl: float = 600.0,
+        path: Optional[str] = None,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: In-memory LRU capacity (0 disables the memory layer)
+            ttl: Lifetime of successful results in seconds
+            negative_ttl: Lifetime of cached failures in seconds
+            path: Optional SQLite file for the persistent, shared layer
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.path = path
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(self.SCHEMA)
+            self.purge_expired()
+
+    @classmethod
+    def from_env(cls) -> "LinkCache":
+        """
+        Build a cache from environment variables:
+        LINK_CACHE_PATH (unset = memory only), LINK_CACHE_SIZE,
+        LINK_CACHE_TTL, LINK_CACHE_NEGATIVE_TTL.
+        """
+        return cls(
+            max_entries=int(os.getenv("LINK_CACHE_SIZE", "4096")),
+            ttl=float(os.getenv("LINK_CACHE_TTL", "86400")),
+            negative_ttl=float(os.getenv("LINK_CACHE_NEGATIVE_TTL", "600")),
+            path=os.getenv("LINK_CACHE_PATH") or None,
+        )
+
+    def get(self, key: str) -> Any:
+        """
+        Look up a key.
+
+        Returns:
+            The cached value (possibly None for a cached failure),
+            or LinkCache.MISS
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, raw = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return json.loads(raw)
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM link_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row and row[1] > now:
+                    raw, expires_at = row
+                    self._remember(key, expires_at, raw)
+                    self._stats["hits"] += 1
+                    return json.loads(raw)
+
+            self._stats["misses"] += 1
+            return self.MISS
+
+    def set(self, key: str, value: Any, negative: bool = False) -> None:
+        """
+        Store a value.
+
+        Args:
+            key: Cache key, e.g. "whois:example.com"
+            value: JSON-serializable value
+            negative: Value records a failed lookup (uses negative_ttl)
+        """
+        expires_at = time.time() + (self.negative_ttl if negative else self.ttl)
+        raw = json.dumps(value)
+        with self._lock:
+            self._remember(key, expires_at, raw)
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO link_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                        (key, raw, expires_at)
+                    )
+                except sqlite3.Error as e:
+                    # Another worker holding the write lock is not worth failing a request
+                    print(f"[LinkCache] Persist failed for {key}: {e}")
+
+    def _remember(self, key: str, expires_at: float, raw: str) -> None:
+        """Insert into the memory layer, evicting the LRU entry if full. Lock held."""
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = (expires_at, raw)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def purge_expired(self) -> int:
+        """Drop expired entries from both layers. Returns rows removed from disk."""
+        now = time.time()
+        with self._lock:
+            for key in [k for k, (expires_at, _) in self._memory.items() if expires_at <= now]:
+                del self._memory[key]
+            if self._conn is None:
+                return 0
+            return self._conn.execute(
+                "DELETE FROM link_cache WHERE expires_at <= ?", (now,)
+            ).rowcount
+
+    def clear(self) -> None:
+        """Remove every entry from both layers."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM link_cache")
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss/eviction counters and current memory size."""
+        with self._lock:
+            return {**self._stats, "size": len(self._memory)}
+
+    def close(self) -> None:
+        """Close the SQLite connection, if any."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
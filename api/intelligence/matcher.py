@@ -0,0 +1,167 @@
+"""
+Keyword Matcher - Single-Pass Multi-Keyword Automaton
+
+All keyword tables used for scam detection (classifier scam types, threats,
+asks-for, urgency and impersonation, the suspicious keyword list in
+patterns.py, and the LinkAnalyzer context keywords) are compiled into one
+Aho-Corasick automaton. A single pass over a text yields every keyword hit,
+tagged with the table(s) the keyword belongs to.
+
+Hits are plain substring occurrences, i.e. the same semantics as
+`keyword in text`. Callers that need word boundaries (patterns.py) filter
+the spans themselves.
+"""
+
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# (start, end, keyword) with text[start:end] == keyword
+KeywordSpan = Tuple[int, int, str]
+
+
+class KeywordHits:
+    """Result of one scan, grouped by table name. Treat as read-only."""
+
+    __slots__ = ("_by_table",)
+
+    def __init__(self, by_table: Dict[str, List[KeywordSpan]]):
+        self._by_table = by_table
+
+    def spans(self, table: str) -> List[KeywordSpan]:
+        """All (start, end, keyword) hits for a table, ordered by end position."""
+        return self._by_table.get(table, [])
+
+    def keywords(self, table: str) -> Set[str]:
+        """Distinct keywords of a table found in the text."""
+        return {keyword for _, _, keyword in self._by_table.get(table, ())}
+
+    def __contains__(self, table: str) -> bool:
+        """True if any keyword of the table was found."""
+        return table in self._by_table
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over named keyword tables.
+
+    Tables can be registered at any time (modules do it at import); the
+    automaton is compiled lazily on the next scan. Compilation resolves
+    failure links into a full transition table, so scanning is one dict
+    lookup per character.
+
+    Recent scan results are memoized by text, so the extractor, the link
+    analyzer and the classifier looking at the same message share one pass.
+    """
+
+    def __init__(self, cache_size: int = 256):
+        """
+        Args:
+            cache_size: Number of recent scan results to keep (0 disables)
+        """
+        self._tables: Dict[str, Tuple[str, ...]] = {}
+        self._compiled: Optional[tuple] = None
+        self._lock = threading.Lock()
+        self._scan_cached = lru_cache(maxsize=cache_size)(self._scan)
+
+    def add_table(self, name: str, keywords: Iterable[str]) -> None:
+        """
+        Register (or replace) a keyword table.
+
+        Args:
+            name: Table name used to tag hits, e.g. "classifier.threats"
+            keywords: Keywords, matched exactly as given (callers normalize case)
+        """
+        with self._lock:
+            self._tables[name] = tuple(dict.fromkeys(kw for kw in keywords if kw))
+            self._compiled = None
+        self._scan_cached.cache_clear()
+
+    @property
+    def tables(self) -> List[str]:
+        """Names of all registered tables."""
+        return list(self._tables)
+
+    def scan(self, text: str) -> KeywordHits:
+        """
+        Find every occurrence of every registered keyword in one pass.
+
+        Args:
+            text: Text to scan (already lowercased/folded by the caller)
+
+        Returns:
+            KeywordHits grouped by table
+        """
+        return self._scan_cached(text)
+
+    def clear_cache(self) -> None:
+        """Forget memoized scan results."""
+        self._scan_cached.cache_clear()
+
+    def _scan(self, text: str) -> KeywordHits:
+        """Uncached scan: walk the DFA once, expanding outputs into per-table spans."""
+        delta, outputs = self._compiled or self._compile()
+        by_table: Dict[str, List[KeywordSpan]] = {}
+        state = 0
+        for end, ch in enumerate(text, 1):
+            state = delta[state].get(ch, 0)
+            out = outputs[state]
+            if out:
+                for keyword, length, tables in out:
+                    hit = (end - length, end, keyword)
+                    for table in tables:
+                        spans = by_table.get(table)
+                        if spans is None:
+                            by_table[table] = [hit]
+                        else:
+                            spans.append(hit)
+        return KeywordHits(by_table)
+
+    def _compile(self) -> tuple:
+        """Build the goto/failure structure and flatten it into a DFA."""
+        with self._lock:
+            if self._compiled:
+                return self._compiled
+
+            keyword_tables: Dict[str, List[str]] = {}
+            for name, keywords in self._tables.items():
+                for kw in keywords:
+                    keyword_tables.setdefault(kw, []).append(name)
+
+            # Trie
+            goto: List[Dict[str, int]] = [{}]
+            own: List[List[tuple]] = [[]]
+            for kw, tables in keyword_tables.items():
+                state = 0
+                for ch in kw:
+                    nxt = goto[state].get(ch)
+                    if nxt is None:
+                        goto.append({})
+                        own.append([])
+                        nxt = goto[state][ch] = len(goto) - 1
+                    state = nxt
+                own[state].append((kw, len(kw), tuple(tables)))
+
+            # Failure links in BFS order, folded straight into full transitions
+            fail = [0] * len(goto)
+            delta: List[Dict[str, int]] = [dict() for _ in goto]
+            outputs: List[tuple] = [()] * len(goto)
+            delta[0] = dict(goto[0])
+            queue = deque(goto[0].values())
+            while queue:
+                state = queue.popleft()
+                outputs[state] = tuple(own[state]) + outputs[fail[state]]
+                transitions = dict(delta[fail[state]])
+                for ch, nxt in goto[state].items():
+                    fail[nxt] = delta[fail[state]].get(ch, 0)
+                    transitions[ch] = nxt
+                    queue.append(nxt)
+                delta[state] = transitions
+
+            self._compiled = (delta, outputs)
+            return self._compiled
+
+
+# Shared automaton: every module registers its tables here at import time
+KEYWORD_AUTOMATON = KeywordAutomaton()
@@ -6,7 +6,9 @@ from text messages. Patterns are designed for Indian context (UPI, +91 phones, e
 """
 
 import re
-from typing import List
+from typing import Dict, List, NamedTuple
+
+from .matcher import KEYWORD_AUTOMATON, KeywordHits
 
 # ============== URL PATTERNS ==============
 # Matches http:// and https:// URLs
@@ -37,6 +39,9 @@ BANK_ACCOUNT_PATTERN = re.compile(
     r'\b\d{9,18}\b'
 )
 
+# Context words that make a 9-18 digit run count as a bank account
+BANK_CONTEXT_KEYWORDS: List[str] = ['account', 'a/c', 'acc', 'transfer', 'neft', 'imps', 'rtgs']
+
 # ============== EMAIL PATTERNS ==============
 # Standard email format
 EMAIL_PATTERN = re.compile(
@@ -65,22 +70,83 @@ SUSPICIOUS_KEYWORDS: List[str] = [
     "otp", "pin", "password", "cvv", "card number",
 ]
 
-# Compile keywords into a pattern for efficient matching
+# Reference regex for the keyword semantics (whole words, case-insensitive,
+# leftmost match wins, earlier list entries win ties). Extraction itself uses
+# the shared keyword automaton, which reproduces these semantics in one pass.
 SUSPICIOUS_KEYWORDS_PATTERN = re.compile(
     r'\b(' + '|'.join(re.escape(kw) for kw in SUSPICIOUS_KEYWORDS) + r')\b',
     re.IGNORECASE
 )
 
+SUSPICIOUS_KEYWORDS_TABLE = "patterns.suspicious"
+KEYWORD_AUTOMATON.add_table(SUSPICIOUS_KEYWORDS_TABLE, (kw.lower() for kw in SUSPICIOUS_KEYWORDS))
+
+BANK_CONTEXT_TABLE = "patterns.bank_context"
+KEYWORD_AUTOMATON.add_table(BANK_CONTEXT_TABLE, BANK_CONTEXT_KEYWORDS)
+
+# ============== SCANNER PRE-FILTERS ==============
+# Shortest digit run any phone (10) or bank account (9) match needs
+DIGIT_RUN_PATTERN = re.compile(r'\d{9}')
+
+# Email-like handles that are not UPI IDs
+EMAIL_DOMAINS = {'gmail', 'yahoo', 'hotmail', 'outlook', 'mail', 'email'}
+
+# Alternation priority of each keyword in SUSPICIOUS_KEYWORDS_PATTERN
+_KEYWORD_PRIORITY = {}
+for _index, _kw in enumerate(SUSPICIOUS_KEYWORDS):
+    _KEYWORD_PRIORITY.setdefault(_kw.lower(), _index)
+
+# Characters re.IGNORECASE matches to ASCII letters that str.lower() leaves alone
+_IGNORECASE_EXTRAS = str.maketrans({'\u0131': 'i', '\u017f': 's'})
+
+
+def fold_case(text: str) -> str:
+    """
+    Lowercase text for case-insensitive keyword matching, keeping offsets.
+    
+    Characters whose lowercase form is longer than one character are
+    reduced to its first character so spans line up with the original text.
+    """
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        lowered = ''.join(ch.lower()[0] for ch in text)
+    return lowered.translate(_IGNORECASE_EXTRAS)
+
+
+def _is_word_char(ch: str) -> bool:
+    """Same definition of a word character as the re module's \\w."""
+    return ch.isalnum() or ch == '_'
+
+
+def _clean_url(url: str) -> str:
+    """Strip trailing punctuation that might have been captured."""
+    # Remove trailing punctuation like . , ; : ! ? 
+    while url and url[-1] in '.,:;!?':
+        url = url[:-1]
+    return url
+
+
+def _is_upi_id(match: str) -> bool:
+    """Filter out common email domains to avoid false positives."""
+    return match.split('@')[1].lower() not in EMAIL_DOMAINS
+
+
+def _normalize_phone(match: str) -> str:
+    """Normalize a PHONE_PATTERN match to +91XXXXXXXXXX."""
+    # The only possible separator sits right after a +91 prefix
+    if match.startswith('+91'):
+        return match[:3] + match[4:] if len(match) == 14 else match
+    if match.startswith('0'):
+        return '+91' + match[1:]
+    return '+91' + match
+
 
 def extract_urls(text: str) -> List[str]:
     """Extract all URLs from text."""
     urls = URL_PATTERN.findall(text)
-    # Strip trailing punctuation that might have been captured
     cleaned = []
     for url in urls:
-        # Remove trailing punctuation like . , ; : ! ? 
-        while url and url[-1] in '.,:;!?':
-            url = url[:-1]
+        url = _clean_url(url)
         if url:
             cleaned.append(url)
     return cleaned
@@ -89,33 +155,22 @@ def extract_urls(text: str) -> List[str]:
 def extract_upi_ids(text: str) -> List[str]:
     """Extract all UPI IDs from text."""
     matches = UPI_PATTERN.findall(text)
-    # Filter out common email domains to avoid false positives
-    email_domains = {'gmail', 'yahoo', 'hotmail', 'outlook', 'mail', 'email'}
-    return [m for m in matches if m.split('@')[1].lower() not in email_domains]
+    return [m for m in matches if _is_upi_id(m)]
 
 
 def extract_phone_numbers(text: str) -> List[str]:
     """Extract all phone numbers from text."""
     matches = PHONE_PATTERN.findall(text)
     # Normalize format: remove spaces/dashes, ensure +91 prefix
-    normalized = []
-    for match in matches:
-        clean = re.sub(r'[-\s]', '', match)
-        if not clean.startswith('+91') and not clean.startswith('0'):
-            clean = '+91' + clean
-        elif clean.startswith('0'):
-            clean = '+91' + clean[1:]
-        normalized.append(clean)
-    return normalized
+    return [_normalize_phone(match) for match in matches]
 
 
 def extract_bank_accounts(text: str, phone_numbers: List[str] = None) -> List[str]:
     """Extract potential bank account numbers from text."""
     # Only return if there's context suggesting it's a bank account
-    context_keywords = ['account', 'a/c', 'acc', 'transfer', 'neft', 'imps', 'rtgs']
     text_lower = text.lower()
     
-    if any(kw in text_lower for kw in context_keywords):
+    if any(kw in text_lower for kw in BANK_CONTEXT_KEYWORDS):
         matches = BANK_ACCOUNT_PATTERN.findall(text)
         
         # Filter out phone numbers if provided
@@ -141,6 +196,114 @@ def extract_emails(text: str) -> List[str]:
 
 def extract_suspicious_keywords(text: str) -> List[str]:
     """Extract all suspicious keywords from text."""
-    matches = SUSPICIOUS_KEYWORDS_PATTERN.findall(text)
+    hits = KEYWORD_AUTOMATON.scan(fold_case(text))
+    matches = [text[start:end] for start, end in _select_keyword_spans(text, hits)]
     # Return unique, lowercase keywords
     return list(set(kw.lower() for kw in matches))
+
+
+def _select_keyword_spans(text: str, hits: KeywordHits) -> List[tuple]:
+    """
+    Pick the (start, end) keyword spans SUSPICIOUS_KEYWORDS_PATTERN.findall would.
+    
+    Args:
+        text: Original text (word boundaries are checked on it)
+        hits: Automaton scan of fold_case(text)
+    """
+    # Keep whole-word hits only (the regex's \b on both sides)
+    length = len(text)
+    candidates = []
+    for start, end, keyword in hits.spans(SUSPICIOUS_KEYWORDS_TABLE):
+        if start > 0 and _is_word_char(text[start - 1]):
+            continue
+        if end < length and _is_word_char(text[end]):
+            continue
+        candidates.append((start, _KEYWORD_PRIORITY[keyword], end))
+    
+    # Leftmost match wins, ties go to the earlier alternative, no overlaps
+    selected = []
+    position = 0
+    for start, _, end in sorted(candidates):
+        if start >= position:
+            selected.append((start, end))
+            position = end
+    return selected
+
+
+# ============== FUSED ENTITY SCANNER ==============
+
+class EntitySpan(NamedTuple):
+    """One extracted entity: text[start:end] matched, value is the normalized form."""
+    kind: str   # "url", "upi", "phone", "bank_account", "email", "keyword"
+    start: int
+    end: int
+    value: str
+
+
+ENTITY_KINDS = ("url", "upi", "phone", "bank_account", "email", "keyword")
+
+
+def scan_entities(text: str) -> List[EntitySpan]:
+    """
+    Scan a message for every entity type in one sweep.
+    
+    Cheap pre-filters skip whole entity families: no "://" means no URL,
+    no "@" means no UPI ID or email, no run of 9 digits means no phone or
+    bank account. The text is lowercased once, and that lowered text is
+    scanned once by the shared keyword automaton for both the suspicious
+    keywords and the bank-account context.
+    
+    Values match what the individual extract_* functions return.
+    """
+    spans: List[EntitySpan] = []
+    
+    if '://' in text:
+        for m in URL_PATTERN.finditer(text):
+            url = _clean_url(m.group())
+            if url:
+                spans.append(EntitySpan("url", m.start(), m.start() + len(url), url))
+    
+    if '@' in text:
+        for m in UPI_PATTERN.finditer(text):
+            if _is_upi_id(m.group()):
+                spans.append(EntitySpan("upi", m.start(), m.end(), m.group()))
+        for m in EMAIL_PATTERN.finditer(text):
+            spans.append(EntitySpan("email", m.start(), m.end(), m.group()))
+    
+    folded = fold_case(text)
+    keyword_hits = KEYWORD_AUTOMATON.scan(folded)
+    
+    if DIGIT_RUN_PATTERN.search(text):
+        phone_digits = set()
+        for m in PHONE_PATTERN.finditer(text):
+            phone = _normalize_phone(m.group())
+            phone_digits.add(phone[3:])
+            spans.append(EntitySpan("phone", m.start(), m.end(), phone))
+        
+        # Bank context uses plain lowercasing, like extract_bank_accounts
+        lowered = text.lower()
+        context = keyword_hits if lowered == folded else KEYWORD_AUTOMATON.scan(lowered)
+        if BANK_CONTEXT_TABLE in context:
+            for m in BANK_ACCOUNT_PATTERN.finditer(text):
+                digits = m.group()
+                if digits not in phone_digits and digits[1:] not in phone_digits:
+                    spans.append(EntitySpan("bank_account", m.start(), m.end(), digits))
+    
+    for start, end in _select_keyword_spans(text, keyword_hits):
+        spans.append(EntitySpan("keyword", start, end, text[start:end].lower()))
+    
+    return spans
+
+
+def group_entities(spans: List[EntitySpan]) -> Dict[str, List[str]]:
+    """
+    Collect scan_entities() spans into one value list per kind.
+    
+    Lists keep match order; keywords are de-duplicated like
+    extract_suspicious_keywords().
+    """
+    grouped: Dict[str, List[str]] = {kind: [] for kind in ENTITY_KINDS}
+    for span in spans:
+        grouped[span.kind].append(span.value)
+    grouped["keyword"] = list(set(grouped["keyword"]))
+    return grouped
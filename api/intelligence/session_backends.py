@@ -0,0 +1,386 @@
+"""
+Session Backends - Pluggable Storage for SessionStore
+
+SessionStore used to keep every session in a plain dict that grew for the
+life of the process. Sessions now live in a backend with bounded size and
+age:
+
+- MemorySessionBackend: in-process, TTL + max-size LRU, swept by a timer
+- SQLiteSessionBackend: on-disk (WAL), survives restarts, shareable by workers
+- RedisSessionBackend: any Redis-protocol server (or a compatible client)
+
+Every backend counts the sessions it drops (expired by TTL vs evicted by
+the size limit) and reports them via stats().
+
+The memory backend hands out the live objects. The other backends store a
+serialized copy, so SessionStore saves a session after every mutation.
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Dict, List, Optional
+
+from ..optional import installed
+
+# redis is imported by RedisSessionBackend, not at module import
+REDIS_AVAILABLE = installed("redis")
+
+
+class SessionBackend:
+    """
+    Interface for session storage.
+
+    Values are SessionIntelligence objects; backends other than memory
+    pickle them, so they must only point at storage this service owns.
+    """
+
+    def __init__(self, ttl: float = 3600.0, max_sessions: int = 10000):
+        """
+        Args:
+            ttl: Seconds of inactivity after which a session expires (0 = never)
+            max_sessions: Sessions kept before the least recently used is evicted (0 = unbounded)
+        """
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._stats = {"expired": 0, "evicted": 0}
+        self._stats_lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_sweeper = threading.Event()
+
+    def get(self, session_id: str) -> Optional[Any]:
+        """Load a session (None if missing or expired) and mark it as used."""
+        raise NotImplementedError
+
+    def put(self, session_id: str, session: Any) -> None:
+        """Store (or refresh) a session."""
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> None:
+        """Remove a session if present."""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def session_ids(self) -> List[str]:
+        """Ids of all stored sessions."""
+        raise NotImplementedError
+
+    def sweep(self) -> None:
+        """Drop expired sessions and enforce max_sessions."""
+        raise NotImplementedError
+
+    def stored_bytes(self) -> Optional[int]:
+        """Approximate bytes of stored session data (None if unknown)."""
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        """Session count plus expired/evicted counters."""
+        with self._stats_lock:
+            counters = dict(self._stats)
+        return {"sessions": len(self), **counters}
+
+    def start_sweeper(self, interval: float = 60.0) -> None:
+        """Run sweep() every `interval` seconds on a daemon thread."""
+        if self._sweeper and self._sweeper.is_alive():
+            return
+        self._stop_sweeper.clear()
+
+        def loop():
+            while not self._stop_sweeper.wait(interval):
+                try:
+                    self.sweep()
+                except Exception as e:
+                    print(f"[SessionBackend] Sweep failed: {e}")
+
+        self._sweeper = threading.Thread(target=loop, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def close(self) -> None:
+        """Stop the sweeper and release resources."""
+        self._stop_sweeper.set()
+        self._sweeper = None
+
+    def _count(self, key: str, n: int = 1) -> None:
+        """Bump an eviction counter."""
+        if n:
+            with self._stats_lock:
+                self._stats[key] += n
+
+
+class MemorySessionBackend(SessionBackend):
+    """In-process sessions with TTL expiry and LRU eviction."""
+
+    SIZE_SAMPLE = 32  # Sessions pickled to estimate stored_bytes()
+
+    def __init__(self, ttl: float = 3600.0, max_sessions: int = 10000):
+        super().__init__(ttl, max_sessions)
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()  # id -> (last_used, session)
+        self._lock = threading.RLock()
+
+    def get(self, session_id: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            last_used, session = entry
+            if self.ttl and now - last_used > self.ttl:
+                del self._sessions[session_id]
+                self._count("expired")
+                return None
+            self._sessions[session_id] = (now, session)
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def put(self, session_id: str, session: Any) -> None:
+        with self._lock:
+            self._sessions[session_id] = (time.time(), session)
+            self._sessions.move_to_end(session_id)
+            if self.max_sessions:
+                overflow = len(self._sessions) - self.max_sessions
+                for _ in range(max(0, overflow)):
+                    self._sessions.popitem(last=False)
+                self._count("evicted", max(0, overflow))
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stored_bytes(self) -> Optional[int]:
+        """Pickled size of the most recent sessions, extrapolated to all of them."""
+        with self._lock:
+            count = len(self._sessions)
+            # Pickled under the lock: a snapshot of the sample, not of sessions being replaced
+            sizes = [len(pickle.dumps(session, protocol=pickle.HIGHEST_PROTOCOL))
+                     for _, session in islice(reversed(self._sessions.values()), self.SIZE_SAMPLE)]
+        if not sizes:
+            return 0
+        return int(sum(sizes) / len(sizes) * count)
+
+    def session_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._sessions)
+
+    def sweep(self) -> None:
+        if not self.ttl:
+            return
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            # Oldest first: stop at the first session still alive
+            expired = []
+            for session_id, (last_used, _) in self._sessions.items():
+                if last_used > cutoff:
+                    break
+                expired.append(session_id)
+            for session_id in expired:
+                del self._sessions[session_id]
+        self._count("expired", len(expired))
+
+
+class SQLiteSessionBackend(SessionBackend):
+    """
+    Sessions pickled into a SQLite file (WAL mode).
+
+    Several processes can open the same file; last writer wins per session.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            data BLOB NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    """
+
+    def __init__(self, path: str = "sessions.db", ttl: float = 3600.0, max_sessions: int = 10000):
+        super().__init__(ttl, max_sessions)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(self.SCHEMA)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_age ON sessions (updated_at)")
+
+    def get(self, session_id: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, updated_at FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        data, updated_at = row
+        if self.ttl and time.time() - updated_at > self.ttl:
+            self.delete(session_id)
+            self._count("expired")
+            return None
+        return pickle.loads(data)
+
+    def put(self, session_id: str, session: Any) -> None:
+        data = pickle.dumps(session, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, data, updated_at) VALUES (?, ?, ?)",
+                (session_id, data, time.time())
+            )
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def stored_bytes(self) -> Optional[int]:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM sessions").fetchone()[0]
+
+    def session_ids(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT session_id FROM sessions")]
+
+    def sweep(self) -> None:
+        with self._lock:
+            expired = 0
+            if self.ttl:
+                expired = self._conn.execute(
+                    "DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.ttl,)
+                ).rowcount
+            evicted = 0
+            if self.max_sessions:
+                evicted = self._conn.execute(
+                    "DELETE FROM sessions WHERE session_id IN ("
+                    "SELECT session_id FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_sessions,)
+                ).rowcount
+        self._count("expired", expired)
+        self._count("evicted", evicted)
+
+    def close(self) -> None:
+        super().close()
+        with self._lock:
+            self._conn.close()
+
+
+class RedisSessionBackend(SessionBackend):
+    """
+    Sessions pickled into Redis keys with a native TTL.
+
+    A sorted set of last-use times backs the LRU limit and lets sweep()
+    count sessions Redis expired on its own.
+    """
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        ttl: float = 3600.0,
+        max_sessions: int = 10000,
+        prefix: str = "honeypot:session:",
+        client: Any = None,
+    ):
+        """
+        Args:
+            url: Redis URL (ignored when client is given)
+            prefix: Key prefix for session blobs; the LRU index is prefix + "lru"
+            client: Pre-built client with the redis-py API (e.g. a local stand-in)
+        """
+        super().__init__(ttl, max_sessions)
+        if client is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError("redis package not installed (pip install redis)")
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self._index = prefix + "lru"
+
+    def get(self, session_id: str) -> Optional[Any]:
+        data = self.client.get(self.prefix + session_id)
+        if data is None:
+            return None
+        self._touch(session_id)
+        return pickle.loads(data)
+
+    def put(self, session_id: str, session: Any) -> None:
+        data = pickle.dumps(session, protocol=pickle.HIGHEST_PROTOCOL)
+        self.client.set(self.prefix + session_id, data, ex=int(self.ttl) if self.ttl else None)
+        self._touch(session_id)
+        if self.max_sessions and self.client.zcard(self._index) > self.max_sessions:
+            self._evict_overflow()
+
+    def delete(self, session_id: str) -> None:
+        self.client.delete(self.prefix + session_id)
+        self.client.zrem(self._index, session_id)
+
+    def __len__(self) -> int:
+        return self.client.zcard(self._index)
+
+    def session_ids(self) -> List[str]:
+        return [m.decode() if isinstance(m, bytes) else m for m in self.client.zrange(self._index, 0, -1)]
+
+    def sweep(self) -> None:
+        if self.ttl:
+            # Keys already expired in Redis; drop them from the index and count them
+            expired = self.client.zremrangebyscore(self._index, "-inf", time.time() - self.ttl)
+            self._count("expired", expired)
+        if self.max_sessions:
+            self._evict_overflow()
+
+    def _touch(self, session_id: str) -> None:
+        """Record a use in the LRU index (and refresh the key TTL)."""
+        self.client.zadd(self._index, {session_id: time.time()})
+        if self.ttl:
+            self.client.expire(self.prefix + session_id, int(self.ttl))
+
+    def _evict_overflow(self) -> None:
+        """Delete least recently used sessions beyond max_sessions."""
+        overflow = self.client.zcard(self._index) - self.max_sessions
+        if overflow <= 0:
+            return
+        victims = self.client.zrange(self._index, 0, overflow - 1)
+        for session_id in victims:
+            if isinstance(session_id, bytes):
+                session_id = session_id.decode()
+            self.delete(session_id)
+        self._count("evicted", len(victims))
+
+
+def backend_from_env() -> SessionBackend:
+    """
+    Build the session backend from environment variables:
+
+    SESSION_BACKEND     memory (default) | sqlite | redis
+    SESSION_TTL         idle seconds before a session expires (default 3600)
+    SESSION_MAX         sessions kept before LRU eviction (default 10000)
+    SESSION_DB_PATH     SQLite file (default sessions.db)
+    SESSION_REDIS_URL   Redis URL (default redis://localhost:6379/0)
+    SESSION_SWEEP_INTERVAL  seconds between sweeps (default 60, 0 = off)
+    """
+    kind = os.getenv("SESSION_BACKEND", "memory").lower()
+    ttl = float(os.getenv("SESSION_TTL", "3600"))
+    max_sessions = int(os.getenv("SESSION_MAX", "10000"))
+
+    if kind == "memory":
+        backend = MemorySessionBackend(ttl=ttl, max_sessions=max_sessions)
+    elif kind == "sqlite":
+        backend = SQLiteSessionBackend(os.getenv("SESSION_DB_PATH", "sessions.db"), ttl=ttl, max_sessions=max_sessions)
+    elif kind == "redis":
+        backend = RedisSessionBackend(os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0"),
+                                      ttl=ttl, max_sessions=max_sessions)
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND: {kind}")
+
+    interval = float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))
+    if interval > 0:
+        backend.start_sweeper(interval)
+    return backend
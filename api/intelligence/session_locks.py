@@ -0,0 +1,181 @@
+"""
+Session Locks - Per-Session Locking Across Worker Processes
+
+With `uvicorn --workers N` and a shared session backend (SQLite/Redis),
+two turns of the same conversation can be served by different processes
+at once. Each turn loads the session, mutates it and saves it, so the
+turns must not interleave.
+
+Inside a worker every session has its own lock (threads or coroutines
+of this worker), created on first use and dropped when nobody holds or
+waits for it, so unrelated sessions never wait for each other. Across
+workers, sessions are hashed onto a fixed number of stripes, each an
+flock() on a lock file that all workers on the node share. A worker takes
+a stripe's flock once, for all of its sessions on that stripe, and gives
+it back when the last of them is done.
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows: in-process locking only
+    FCNTL_AVAILABLE = False
+
+
+class SessionLocks:
+    """
+    Per-session locks, optionally shared between processes.
+
+    Use lock() from threads and lock_async() from the event loop; a worker
+    should stick to one of the two for a given session.
+    """
+
+    def __init__(self, directory: Optional[str] = None, stripes: int = 64, poll_interval: float = 0.005):
+        """
+        Args:
+            directory: Folder for the lock files (None = in-process locking only)
+            stripes: Number of cross-process lock stripes sessions are hashed onto
+            poll_interval: First retry delay while another worker holds a stripe
+        """
+        self.directory = directory if FCNTL_AVAILABLE else None
+        self.stripes = stripes
+        self.poll_interval = poll_interval
+        # session id -> [lock, holders + waiters]; entries go away at 0
+        self._thread_locks: Dict[str, list] = {}
+        self._async_locks: Dict[str, list] = {}
+        self._registry_lock = threading.Lock()
+        self._files: List[Optional[object]] = [None] * stripes
+        self._stripe_holders = [0] * stripes  # sessions of this worker holding each stripe
+        self._files_lock = threading.Lock()
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> "SessionLocks":
+        """
+        Cross-process locking is on when sessions are shared: SESSION_LOCK_DIR,
+        or a temp folder when SESSION_BACKEND is sqlite/redis.
+        """
+        directory = os.getenv("SESSION_LOCK_DIR")
+        if not directory and os.getenv("SESSION_BACKEND", "memory").lower() != "memory":
+            directory = os.path.join(tempfile.gettempdir(), "honeypot-session-locks")
+        return cls(directory=directory)
+
+    def stripe(self, session_id: str) -> int:
+        """Stripe index of a session (stable across processes)."""
+        digest = hashlib.blake2b(session_id.encode("utf-8", "surrogatepass"), digest_size=8).digest()
+        return int.from_bytes(digest, "big") % self.stripes
+
+    @contextmanager
+    def lock(self, session_id: str):
+        """Hold a session's lock (blocking; for threads and scripts)."""
+        with self._registry_lock:
+            entry = self._thread_locks.setdefault(session_id, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                stripe = self.stripe(session_id)
+                delay = self.poll_interval
+                while not self._acquire_stripe(stripe):
+                    time.sleep(delay)
+                    delay = min(delay * 2, 0.1)
+                try:
+                    yield
+                finally:
+                    self._release_stripe(stripe)
+        finally:
+            self._forget(self._thread_locks, session_id, entry)
+
+    @asynccontextmanager
+    async def lock_async(self, session_id: str):
+        """
+        Hold a session's lock without blocking the event loop.
+
+        Waiting on another worker polls a non-blocking flock() with backoff,
+        so cancellation never leaves a lock behind.
+        """
+        with self._registry_lock:
+            entry = self._async_locks.setdefault(session_id, [asyncio.Lock(), 0])
+            entry[1] += 1
+        try:
+            async with entry[0]:
+                stripe = self.stripe(session_id)
+                delay = self.poll_interval
+                while not self._acquire_stripe(stripe):
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 0.1)
+                try:
+                    yield
+                finally:
+                    self._release_stripe(stripe)
+        finally:
+            self._forget(self._async_locks, session_id, entry)
+
+    def _forget(self, locks: Dict[str, list], session_id: str, entry: list) -> None:
+        """Drop a session's lock once nobody holds or waits for it."""
+        with self._registry_lock:
+            entry[1] -= 1
+            if not entry[1] and locks.get(session_id) is entry:
+                del locks[session_id]
+
+    def _acquire_stripe(self, stripe: int) -> bool:
+        """
+        Join this worker's hold on a stripe, or take its file lock if no
+        other process holds it. Always True without a lock directory.
+        """
+        handle = self._file(stripe)
+        if handle is None:
+            return True
+        with self._files_lock:
+            if self._stripe_holders[stripe] or self._try_flock(handle):
+                self._stripe_holders[stripe] += 1
+                return True
+            return False
+
+    def _release_stripe(self, stripe: int) -> None:
+        """Leave a stripe; the last session of this worker releases its file lock."""
+        handle = self._file(stripe)
+        if handle is None:
+            return
+        with self._files_lock:
+            self._stripe_holders[stripe] -= 1
+            if not self._stripe_holders[stripe]:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _try_flock(self, handle) -> bool:
+        """Take a stripe's file lock if no other process holds it."""
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    def _file(self, stripe: int):
+        """Lock file of a stripe, opened on first use (None without a directory)."""
+        if not self.directory:
+            return None
+        handle = self._files[stripe]
+        if handle is None:
+            with self._files_lock:
+                handle = self._files[stripe]
+                if handle is None:
+                    path = os.path.join(self.directory, f"session-{stripe:03d}.lock")
+                    handle = self._files[stripe] = open(path, "a+")
+        return handle
+
+    def close(self) -> None:
+        """Close the lock files."""
+        with self._files_lock:
+            for i, handle in enumerate(self._files):
+                if handle:
+                    handle.close()
+                    self._files[i] = None
@@ -0,0 +1,201 @@
+"""
+Session Records - Compact Per-Session Storage
+
+A server keeps thousands of live sessions, so the per-session footprint
+matters. The building blocks here replace dicts, lists and sets in
+SessionIntelligence:
+
+- Entity collections are insertion-ordered tuples of interned strings
+  (the same UPI ID or keyword seen in many sessions is stored once)
+- MessageLog keeps the latest messages as plain records and older ones
+  in a single zlib-compressed archive, bounded in size
+- LinkRecord is a slotted link report that still answers report["risk"]
+"""
+
+import json
+import os
+import sys
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+
+def intern_all(values: Iterable[Any]) -> Tuple[str, ...]:
+    """Intern a sequence of strings (None / non-strings are stringified)."""
+    return tuple(sys.intern(str(v)) for v in values)
+
+
+def extend_unique(current: Tuple[str, ...], values: Iterable[Any]) -> Tuple[str, ...]:
+    """Append interned values not yet in an entity tuple (order preserved)."""
+    added = [v for v in intern_all(values) if v not in current]
+    if not added:
+        return current
+    # A value repeated within `values` must only be added once
+    return current + tuple(dict.fromkeys(added))
+
+
+class Message(NamedTuple):
+    """One conversation message."""
+    sender: str
+    text: str
+    timestamp: str
+
+    def to_dict(self) -> dict:
+        return {"sender": self.sender, "text": self.text, "timestamp": self.timestamp}
+
+
+class MessageLog:
+    """
+    Bounded conversation history.
+
+    The latest `window` messages are kept as-is. Whenever another `window`
+    messages have piled up behind them, those are moved into a compressed
+    archive. Compaction trims the history to `limit` messages (up to
+    window - 1 newer ones can pile up until the next one); dropped
+    messages keep their fingerprints, so history backfill still lines up.
+    """
+
+    __slots__ = ("window", "limit", "_recent", "_archive", "_dropped", "_fingerprints")
+
+    FINGERPRINT_SIZE = 16
+
+    def __init__(self, window: Optional[int] = None, limit: Optional[int] = None):
+        """
+        Args:
+            window: Messages kept uncompressed (default: SESSION_MESSAGE_WINDOW or 8)
+            limit: Messages retained in total (default: SESSION_MESSAGE_LIMIT or 200)
+        """
+        self.window = max(1, window if window is not None else int(os.getenv("SESSION_MESSAGE_WINDOW", "8")))
+        self.limit = max(self.window, limit if limit is not None else int(os.getenv("SESSION_MESSAGE_LIMIT", "200")))
+        self._recent: List[Message] = []
+        self._archive: bytes = b""        # zlib(JSON list of [sender, text, timestamp])
+        self._dropped = 0                 # Messages past the limit, gone for good
+        self._fingerprints = bytearray()  # FINGERPRINT_SIZE bytes per message ever added
+
+    def __len__(self) -> int:
+        """Number of messages ever added (retained or not)."""
+        return len(self._fingerprints) // self.FINGERPRINT_SIZE
+
+    def append(self, sender: str, text: str, timestamp: str, fingerprint: bytes) -> None:
+        """Add a message with its FINGERPRINT_SIZE-byte fingerprint."""
+        self._recent.append(Message(sys.intern(sender), text, timestamp))
+        self._fingerprints += fingerprint
+        if len(self._recent) >= 2 * self.window:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Move all but the latest `window` messages into the archive."""
+        moved, self._recent = self._recent[:-self.window], self._recent[-self.window:]
+        archived = self._load_archive() + [list(m) for m in moved]
+        excess = len(archived) + len(self._recent) - self.limit
+        if excess > 0:
+            del archived[:excess]
+            self._dropped += excess
+        raw = json.dumps(archived, ensure_ascii=False, separators=(",", ":"))
+        self._archive = zlib.compress(raw.encode("utf-8", "surrogatepass"), 9)
+
+    def _load_archive(self) -> List[list]:
+        if not self._archive:
+            return []
+        return json.loads(zlib.decompress(self._archive).decode("utf-8", "surrogatepass"))
+
+    def fingerprint(self, index: int) -> bytes:
+        """Fingerprint of the index-th message ever added."""
+        size = self.FINGERPRINT_SIZE
+        return bytes(self._fingerprints[index * size:(index + 1) * size])
+
+    @property
+    def fingerprints(self) -> List[bytes]:
+        """All message fingerprints, oldest first."""
+        return [self.fingerprint(i) for i in range(len(self))]
+
+    @property
+    def first_retained(self) -> int:
+        """Index of the oldest message still stored."""
+        return self._dropped
+
+    def __iter__(self) -> Iterator[Message]:
+        """Retained messages, oldest first (decompresses the archive)."""
+        for sender, text, timestamp in self._load_archive():
+            yield Message(sender, text, timestamp)
+        yield from self._recent
+
+    def recent(self) -> List[Message]:
+        """The uncompressed tail of the conversation."""
+        return list(self._recent)
+
+    def since(self, index: int) -> List[Message]:
+        """Retained messages from the index-th message on (archive read only if needed)."""
+        recent_start = len(self) - len(self._recent)
+        if index >= recent_start:
+            return self._recent[index - recent_start:]
+        skip = max(0, index - self._dropped)
+        return list(self)[skip:]
+
+    def texts_since(self, index: int) -> List[str]:
+        """Texts of retained messages from the index-th message on."""
+        return [m.text for m in self.since(index)]
+
+
+class LinkRecord:
+    """
+    Slotted link report as stored in a session.
+
+    Supports the read side of the dict it replaces (record["url"],
+    record.get("risk")), so classifier and LLM context code work on both.
+    """
+
+    __slots__ = ("url", "risk", "reasons", "domain", "etld_plus_one",
+                 "domain_age_days", "creation_date", "checks_performed")
+
+    def __init__(self, url: str, risk: str, reasons: Iterable[str] = (), domain: str = "",
+                 etld_plus_one: str = "", domain_age_days: Optional[int] = None,
+                 creation_date: Optional[str] = None, checks_performed: Iterable[str] = ()):
+        self.url = sys.intern(url)
+        self.risk = sys.intern(risk)
+        self.reasons = intern_all(reasons)
+        self.domain = sys.intern(domain or "")
+        self.etld_plus_one = sys.intern(etld_plus_one or "")
+        self.domain_age_days = domain_age_days
+        self.creation_date = creation_date
+        self.checks_performed = intern_all(checks_performed)
+
+    @classmethod
+    def from_dict(cls, report: Dict[str, Any]) -> "LinkRecord":
+        """Build from a serialized LinkRiskReport (intel["linkReports"] entry)."""
+        if isinstance(report, cls):
+            return report
+        return cls(**{name: report[name] for name in cls.__slots__ if name in report})
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["reasons"] = list(self.reasons)
+        data["checks_performed"] = list(self.checks_performed)
+        return data
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, LinkRecord):
+            return NotImplemented
+        return all(getattr(self, n) == getattr(other, n) for n in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"LinkRecord(url={self.url!r}, risk={self.risk!r})"
+
+    def __getstate__(self):
+        return tuple(getattr(self, n) for n in self.__slots__)
+
+    def __setstate__(self, state):
+        # Unpickled strings are fresh copies: intern them again
+        for name, value in zip(self.__slots__, state):
+            if isinstance(value, str):
+                value = sys.intern(value)
+            elif isinstance(value, tuple):
+                value = intern_all(value)
+            setattr(self, name, value)
@@ -1,8 +1,9 @@
 """
-Session Store - In-Memory Session Intelligence Aggregation
+Session Store - Session Intelligence Aggregation
 
 This module stores and aggregates extracted intelligence per session.
 Clears when a new conversation starts (empty conversationHistory).
+Sessions live in a pluggable backend (see session_backends.py).
 
 Enhanced Features:
 - Dynamic confidence scoring
@@ -10,38 +11,83 @@ Enhanced Features:
 - Rich LLM context generation
 """
 
+import asyncio
+import hashlib
 from dataclasses import dataclass, field
-from typing import Dict, List, Set, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 
-from .classifier import ScamClassifier, ScamAnalysis, ScamType, UrgencyLevel
+from .classifier import ScamClassifier, ScamAnalysis, ScamType, UrgencyLevel, ClassifierState
+from .session_backends import SessionBackend, MemorySessionBackend, backend_from_env
+from .session_locks import SessionLocks
+from .session_records import LinkRecord, MessageLog, extend_unique
+from ..metrics import STAGE_SECONDS, timed
 
 
-@dataclass
+def message_fingerprint(sender: str, text: str, timestamp: Any) -> bytes:
+    """Stable 16-byte hash of a message, used to line request history up with a stored session."""
+    raw = f"{sender}\x1f{text}\x1f{timestamp}".encode("utf-8", "surrogatepass")
+    return hashlib.blake2b(raw, digest_size=MessageLog.FINGERPRINT_SIZE).digest()
+
+
+# Classifier confidence (0-100) at which a session counts as a scam
+SCAM_CONFIDENCE_THRESHOLD = 30
+
+# Entity fields and the intel keys merged into them
+ENTITY_FIELDS = {
+    "bank_accounts": "bankAccounts",
+    "upi_ids": "upiIds",
+    "phishing_links": "phishingLinks",
+    "phone_numbers": "phoneNumbers",
+    "suspicious_keywords": "suspiciousKeywords",
+    "emails": "emails",
+    "all_links": "allLinks",
+}
+
+
+@dataclass(slots=True)
 class SessionIntelligence:
-    """Aggregated intelligence for a single session."""
+    """
+    Aggregated intelligence for a single session.
+    
+    Stored compactly (see session_records.py): entities are tuples of
+    interned strings, history is a bounded MessageLog, link reports are
+    LinkRecords.
+    """
     session_id: str
-    bank_accounts: Set[str] = field(default_factory=set)
-    upi_ids: Set[str] = field(default_factory=set)
-    phishing_links: Set[str] = field(default_factory=set)
-    phone_numbers: Set[str] = field(default_factory=set)
-    suspicious_keywords: Set[str] = field(default_factory=set)
-    emails: Set[str] = field(default_factory=set)
-    all_links: Set[str] = field(default_factory=set)
-    link_reports: List[dict] = field(default_factory=list)  # Detailed link analysis
+    bank_accounts: Tuple[str, ...] = ()
+    upi_ids: Tuple[str, ...] = ()
+    phishing_links: Tuple[str, ...] = ()
+    phone_numbers: Tuple[str, ...] = ()
+    suspicious_keywords: Tuple[str, ...] = ()
+    emails: Tuple[str, ...] = ()
+    all_links: Tuple[str, ...] = ()
+    link_reports: List[LinkRecord] = field(default_factory=list)  # Detailed link analysis
     message_count: int = 0
     scam_detected: bool = False
     created_at: datetime = field(default_factory=datetime.now)
     
     # Conversation history for context
-    messages: List[dict] = field(default_factory=list)  # [{sender, text, timestamp}]
+    log: MessageLog = field(default_factory=MessageLog, repr=False)
     
     # Dynamic analysis (updated each message)
     _latest_analysis: Optional[ScamAnalysis] = field(default=None, repr=False)
+    _classifier_state: Optional[ClassifierState] = field(default=None, repr=False)
+    _classified_messages: int = field(default=0, repr=False)  # Messages folded into _classifier_state
     
     # Agent State (for State Machine)
     agent_state: str = "INITIAL_CONTACT"
     
+    @property
+    def messages(self) -> List[dict]:
+        """Retained history as [{sender, text, timestamp}] (decompresses old messages)."""
+        return [msg.to_dict() for msg in self.log]
+    
+    @property
+    def message_fingerprints(self) -> List[bytes]:
+        """Fingerprints of every message added, parallel to the full history."""
+        return self.log.fingerprints
+    
     def to_dict(self) -> dict:
         """Convert to dictionary matching GUVI hackathon schema."""
         return {
@@ -97,56 +143,61 @@ class SessionIntelligence:
         """Format risky links with their risk reason for LLM."""
         formatted = []
         for report in self.link_reports:
-            if report.get("risk") in ("CRITICAL", "HIGH_RISK", "SUSPICIOUS"):
-                reason = report.get("reasons", ["Unknown reason"])[0]
-                formatted.append(f"{report['url']} ({report['risk']}: {reason})")
+            if report.risk in ("CRITICAL", "HIGH_RISK", "SUSPICIOUS"):
+                reason = report.reasons[0] if report.reasons else "Unknown reason"
+                formatted.append(f"{report.url} ({report.risk}: {reason})")
         return formatted
     
     def get_full_conversation_text(self) -> str:
         """Get all message texts concatenated for analysis."""
-        return " ".join(msg.get("text", "") for msg in self.messages)
+        return " ".join(msg.text for msg in self.log)
     
     def merge(self, intel: dict) -> None:
         """Merge extracted intelligence into this session."""
-        self.bank_accounts.update(intel.get("bankAccounts", []))
-        self.upi_ids.update(intel.get("upiIds", []))
-        self.phishing_links.update(intel.get("phishingLinks", []))
-        self.phone_numbers.update(intel.get("phoneNumbers", []))
-        self.suspicious_keywords.update(intel.get("suspiciousKeywords", []))
-        self.emails.update(intel.get("emails", []))
-        self.all_links.update(intel.get("allLinks", []))
+        for name, key in ENTITY_FIELDS.items():
+            values = intel.get(key)
+            if values:
+                setattr(self, name, extend_unique(getattr(self, name), values))
         
         # Merge link reports (avoid duplicates by URL)
-        existing_urls = {r["url"] for r in self.link_reports}
+        existing_urls = {r.url for r in self.link_reports}
         for report in intel.get("linkReports", []):
             if report["url"] not in existing_urls:
-                self.link_reports.append(report)
+                self.link_reports.append(LinkRecord.from_dict(report))
                 existing_urls.add(report["url"])
     
     def add_message(self, sender: str, text: str, timestamp: str) -> None:
         """Add a message to conversation history."""
-        self.messages.append({
-            "sender": sender,
-            "text": text,
-            "timestamp": timestamp
-        })
+        self.log.append(sender, text, timestamp, message_fingerprint(sender, text, timestamp))
     
+    @timed(STAGE_SECONDS, stage="classify")
     def update_analysis(self, classifier: 'ScamClassifier') -> ScamAnalysis:
-        """Update scam analysis with current intel and messages."""
-        full_text = self.get_full_conversation_text()
+        """
+        Update scam analysis with current intel and messages.
+        
+        Only messages added since the last call are scanned; earlier ones
+        live on in the incremental classifier state.
+        """
+        if self._classifier_state is None:
+            self._classifier_state = classifier.new_state()
+        for text in self.log.texts_since(self._classified_messages):
+            classifier.update_state(self._classifier_state, text)
+        self._classified_messages = len(self.log)
+        
+        # The classifier only tests truthiness/size, so the tuples go in as-is
         intel_dict = {
-            "bankAccounts": list(self.bank_accounts),
-            "upiIds": list(self.upi_ids),
-            "phishingLinks": list(self.phishing_links),
-            "phoneNumbers": list(self.phone_numbers),
-            "suspiciousKeywords": list(self.suspicious_keywords),
+            "bankAccounts": self.bank_accounts,
+            "upiIds": self.upi_ids,
+            "phishingLinks": self.phishing_links,
+            "phoneNumbers": self.phone_numbers,
+            "suspiciousKeywords": self.suspicious_keywords,
             "linkReports": self.link_reports,
         }
         
-        self._latest_analysis = classifier.classify(full_text, intel_dict)
+        self._latest_analysis = classifier.classify_state(self._classifier_state, intel_dict)
         
         # Update scam_detected based on confidence threshold
-        if self._latest_analysis.confidence >= 30:
+        if self._latest_analysis.confidence >= SCAM_CONFIDENCE_THRESHOLD:
             self.scam_detected = True
         
         return self._latest_analysis
@@ -168,31 +219,68 @@ class SessionIntelligence:
 
 class SessionStore:
     """
-    In-memory store for session intelligence.
+    Store for session intelligence.
     
     Key behaviors:
-    - Stores intelligence per sessionId
+    - Stores intelligence per sessionId in a SessionBackend (TTL/LRU bounded)
     - Clears session when new conversation starts (empty history)
     - Aggregates intelligence across multiple messages
     - Maintains conversation history for analysis
+    
+    Backends other than memory return copies, so every method that mutates
+    a session saves it back. Callers changing a session themselves must
+    call save(). When several workers share a backend, hold lock() /
+    lock_async() around a whole load-mutate-save turn.
     """
     
-    def __init__(self):
-        self._store: Dict[str, SessionIntelligence] = {}
+    RISKY_LINK_LEVELS = ("CRITICAL", "HIGH_RISK", "SUSPICIOUS")
+    
+    def __init__(self, backend: Optional[SessionBackend] = None, locks: Optional[SessionLocks] = None):
+        """
+        Args:
+            backend: Session storage (default: unswept MemorySessionBackend)
+            locks: Per-session locks (default: in-process only)
+        """
+        self._backend = backend if backend is not None else MemorySessionBackend()
+        self._locks = locks if locks is not None else SessionLocks()
         self._classifier = ScamClassifier()
+        self.deep_checks = None  # Optional DeepCheckScheduler (deferred link mode)
+    
+    @property
+    def backend(self) -> SessionBackend:
+        """The storage backend (for stats / shutdown)."""
+        return self._backend
+    
+    def lock(self, session_id: str):
+        """Context manager holding a session's lock (blocking)."""
+        return self._locks.lock(session_id)
+    
+    def lock_async(self, session_id: str):
+        """Async context manager holding a session's lock."""
+        return self._locks.lock_async(session_id)
+    
+    def close(self) -> None:
+        """Release the backend and lock files (on shutdown)."""
+        self._backend.close()
+        self._locks.close()
     
     def get_or_create(self, session_id: str) -> SessionIntelligence:
         """Get existing session or create new one."""
-        if session_id not in self._store:
-            self._store[session_id] = SessionIntelligence(session_id=session_id)
-        return self._store[session_id]
+        session = self._backend.get(session_id)
+        if session is None:
+            session = SessionIntelligence(session_id=session_id)
+            self._backend.put(session_id, session)
+        return session
+    
+    def save(self, session: SessionIntelligence) -> None:
+        """Persist a session after changing it outside the store."""
+        self._backend.put(session.session_id, session)
     
     def clear_session(self, session_id: str) -> None:
         """Clear a session's intelligence (for new conversation start)."""
-        if session_id in self._store:
-            del self._store[session_id]
+        self._backend.delete(session_id)
         # Create fresh session
-        self._store[session_id] = SessionIntelligence(session_id=session_id)
+        self._backend.put(session_id, SessionIntelligence(session_id=session_id))
     
     def add_intelligence(
         self, 
@@ -212,6 +300,13 @@ class SessionStore:
             Updated SessionIntelligence object
         """
         session = self.get_or_create(session_id)
+        self._add_to_session(session, intel, message)
+        self._backend.put(session_id, session)
+        self._schedule_deep_checks(session_id, intel, message)
+        return session
+    
+    def _add_to_session(self, session: SessionIntelligence, intel: dict, message: Optional[dict]) -> None:
+        """Merge one message's intel into a session object (not saved)."""
         session.merge(intel)
         session.message_count += 1
         
@@ -225,12 +320,48 @@ class SessionStore:
         
         # Update analysis with classifier
         session.update_analysis(self._classifier)
+    
+    def _schedule_deep_checks(self, session_id: str, intel: dict, message: Optional[dict]) -> None:
+        """Deferred link mode: offline verdicts get upgraded once deep checks finish."""
+        if self.deep_checks and intel.get("pendingLinks"):
+            context = message.get("text", "") if message else ""
+            self.deep_checks.schedule(session_id, intel["pendingLinks"], context)
+    
+    def upgrade_link_report(self, session_id: str, report: dict) -> Optional[SessionIntelligence]:
+        """
+        Replace a link's offline verdict with its deep-check report.
+        
+        Re-runs the classifier so confidence reflects the new verdict.
+        
+        Args:
+            session_id: The session identifier
+            report: Serialized LinkRiskReport (as in intel["linkReports"])
+            
+        Returns:
+            Updated session, or None if the session or link is gone
+        """
+        session = self._backend.get(session_id)
+        if session is None or report["url"] not in session.all_links:
+            return None
         
+        record = LinkRecord.from_dict(report)
+        for i, existing in enumerate(session.link_reports):
+            if existing.url == record.url:
+                session.link_reports[i] = record
+                break
+        else:
+            session.link_reports.append(record)
+        
+        if record.risk in self.RISKY_LINK_LEVELS:
+            session.phishing_links = extend_unique(session.phishing_links, [record.url])
+        
+        session.update_analysis(self._classifier)
+        self._backend.put(session_id, session)
         return session
     
     def get_session(self, session_id: str) -> Optional[SessionIntelligence]:
         """Get session intelligence if it exists."""
-        return self._store.get(session_id)
+        return self._backend.get(session_id)
     
     def get_llm_context(self, session_id: str) -> dict:
         """Get formatted LLM context for a session."""
@@ -267,42 +398,80 @@ class SessionStore:
         Backfill session intelligence from conversation history.
         Crucial for statelessness (server restarts or scaling).
         
+        Only the suffix of history this session has not seen is extracted;
+        sessions already up to date skip backfill entirely.
+        
         Args:
             session_id: The session identifier
             history: List of message objects from request
             extractor: Instance of IntelligenceExtractor to process past messages
         """
         session = self.get_or_create(session_id)
+        unseen, rebuild = self._plan_backfill(session, history)
+        if not unseen:
+            return session
         
-        # If session already has messages, we might not need to backfill
-        # But to be safe (in case of restart), we check if history is longer than current session messages
-        if len(history) > len(session.messages):
-            # We are likely in a fresh session (or lost state)
-            # Process strictly the messages that are NOT in our current session store
-            # For simplicity in this hackathon context, we can just re-process everything if count mismatches
-            # to ensure we capture all intelligence.
-            
-            # Clear current partial state to avoid duplicates during re-processing
-            self.clear_session(session_id)
-            session = self.get_or_create(session_id)
-            
-            for msg in history:
-                text = msg.text
-                sender = msg.sender
-                timestamp = str(msg.timestamp)
-                
-                # Extract intel from this past message
-                # Note: This might be expensive if history is huge, but typically < 20 messages
-                intel = extractor.extract(text)
-                
-                # Add to session
-                self.add_intelligence(session_id, intel, message={
-                    "sender": sender,
-                    "text": text,
-                    "timestamp": timestamp
-                })
-            
-            # Deduce State based on message count if we lost it
+        intel_list = [extractor.extract(msg.text) for msg in unseen]
+        return self._apply_history(session, unseen, intel_list, rebuild)
+    
+    async def backfill_history_async(self, session_id: str, history: List[dict], extractor: 'IntelligenceExtractor') -> SessionIntelligence:
+        """
+        Async variant of backfill_history().
+        
+        Unseen messages are extracted concurrently; results are applied in
+        history order so the rebuilt session is identical to the sync path.
+        """
+        session = self.get_or_create(session_id)
+        unseen, rebuild = self._plan_backfill(session, history)
+        if not unseen:
+            return session
+        
+        intel_list = await asyncio.gather(*(extractor.extract_async(msg.text) for msg in unseen))
+        return self._apply_history(session, unseen, intel_list, rebuild)
+    
+    def _plan_backfill(self, session: SessionIntelligence, history: List[dict]) -> tuple:
+        """
+        Line request history up against the messages this session has stored.
+        
+        Returns:
+            Tuple of (messages_to_process, rebuild). rebuild is True when the
+            stored messages are not a prefix of history (state lost or
+            diverged), in which case the whole history is replayed.
+        """
+        log = session.log
+        known = len(log)
+        
+        # Session already in memory and up to date: nothing to do
+        if len(history) <= known:
+            return [], False
+        
+        # Find the common prefix; any mismatch means our copy diverged
+        for i, msg in enumerate(history[:known]):
+            if message_fingerprint(msg.sender, msg.text, str(msg.timestamp)) != log.fingerprint(i):
+                return history, True
+        
+        return history[known:], not known
+    
+    def _apply_history(self, session: SessionIntelligence, messages: List[dict], intel_list: List[dict], rebuild: bool) -> SessionIntelligence:
+        """Add history messages and their extracted intel to a session, then save it once."""
+        session_id = session.session_id
+        if rebuild:
+            # Start from a fresh session to avoid duplicates during re-processing
+            session = SessionIntelligence(session_id=session_id)
+        
+        applied = []
+        for msg, intel in zip(messages, intel_list):
+            # Add to session
+            message = {
+                "sender": msg.sender,
+                "text": msg.text,
+                "timestamp": str(msg.timestamp)
+            }
+            self._add_to_session(session, intel, message)
+            applied.append((intel, message))
+        
+        if rebuild:
+            # Deduce State based on message count since we lost it
             # Simple heuristic:
             # 0-2 messages: INITIAL_CONTACT
             # 3-6 messages: ESTABLISH_TRUST
@@ -312,7 +481,10 @@ class SessionStore:
                  session.agent_state = "EXTRACTION_UPI" # Default to beginning of extraction
             elif session.message_count >= 3:
                  session.agent_state = "ESTABLISH_TRUST"
-            
+        
+        self._backend.put(session_id, session)
+        for intel, message in applied:
+            self._schedule_deep_checks(session_id, intel, message)
         return session
 
     def _generate_agent_notes(self, session: SessionIntelligence) -> str:
@@ -336,5 +508,6 @@ class SessionStore:
         return ". ".join(notes) if notes else "No analysis available"
 
 
-# Global session store instance
-session_store = SessionStore()
+# Global session store instance (backend chosen by SESSION_BACKEND, see session_backends.py;
+# cross-worker locks via SESSION_LOCK_DIR, see session_locks.py)
+session_store = SessionStore(backend_from_env(), SessionLocks.from_env())
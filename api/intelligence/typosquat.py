@@ -0,0 +1,250 @@
+"""
+Typosquat Index - Indexed Look-Alike Brand Detection
+
+Replaces the "SequenceMatcher against every brand" loop in LinkAnalyzer
+with a precomputed index, so lookups stay fast as the brand list grows to
+thousands of entries.
+
+How a domain label is checked:
+1. Punycode labels (xn--) are decoded and the text is folded: Unicode
+   look-alikes (Cyrillic/Greek letters, accents), digit swaps (0->o,
+   1->l, ...) and "rn"->"m" / "vv"->"w" all map to plain ASCII letters.
+2. Candidates come from two indexes built once per brand list:
+   - SymSpell-style deletion neighbourhoods (typos: swapped, missing,
+     extra or replaced letters; up to 2 edits)
+   - A keyword automaton over the brands (brand plus affix, e.g. "paytmkyc")
+3. Every candidate is verified with the same SequenceMatcher ratio the old
+   loop used (0.7 < ratio < 1.0). Both the folded and the raw spelling are
+   tried.
+4. The deletion index only covers 2 edits (1 for brands of 4 letters or
+   less), but the ratio also accepts some labels that are further away
+   ("phonnerie" for "phonepe"). If no candidate passes, the label is
+   compared with every brand whose length keeps the ratio reachable,
+   skipping brands whose letter counts already rule it out. The index
+   makes the common look-alikes fast; clean labels pay for the scan.
+
+Compared with the old loop, folding flags more labels ("crnaar" for
+"canara"), and a label that is itself a known brand is never flagged as
+a look-alike of another brand. Otherwise both flag the same labels.
+
+A label that folds to exactly a brand while being spelled differently
+(e.g. "g00gle", Cyrillic "аpple") is reported as a homoglyph look-alike.
+"""
+
+import unicodedata
+from difflib import SequenceMatcher
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .matcher import KeywordAutomaton
+
+
+# === HOMOGLYPH FOLDING ===
+# Single characters that render like an ASCII letter
+HOMOGLYPHS = {
+    # Digits and symbols
+    '0': 'o', '1': 'l', '3': 'e', '4': 'a', '5': 's', '7': 't', '8': 'b', '9': 'g',
+    '$': 's', '@': 'a', '!': 'i', '|': 'l',
+    # Cyrillic
+    'а': 'a', 'в': 'b', 'е': 'e', 'ё': 'e', 'к': 'k', 'м': 'm', 'н': 'h', 'о': 'o',
+    'р': 'p', 'с': 'c', 'т': 't', 'у': 'y', 'х': 'x', 'і': 'i', 'ї': 'i', 'ј': 'j',
+    'ѕ': 's', 'ԁ': 'd', 'ԛ': 'q', 'ԝ': 'w', 'һ': 'h', 'ɡ': 'g', 'ӏ': 'l',
+    # Greek
+    'α': 'a', 'β': 'b', 'ε': 'e', 'ι': 'i', 'κ': 'k', 'ν': 'v', 'ο': 'o', 'ρ': 'p',
+    'τ': 't', 'υ': 'u', 'χ': 'x', 'ω': 'w',
+    # Latin look-alikes
+    'ı': 'i', 'ł': 'l', 'ø': 'o', 'ß': 'ss',
+}
+_HOMOGLYPH_TABLE = str.maketrans(HOMOGLYPHS)
+
+# Letter pairs that render like one letter
+MULTI_CHAR_HOMOGLYPHS = (('rn', 'm'), ('vv', 'w'))
+
+# Ratio bounds of the original SequenceMatcher check
+MIN_RATIO = 0.7
+
+
+def decode_label(label: str) -> str:
+    """Decode a punycode (xn--) domain label; other labels are returned as-is."""
+    if label.startswith('xn--'):
+        try:
+            return label[4:].encode('ascii').decode('punycode')
+        except (UnicodeError, ValueError):
+            return label
+    return label
+
+
+def fold(text: str) -> str:
+    """Map a label to its plain-ASCII skeleton for look-alike comparison."""
+    text = text.lower().translate(_HOMOGLYPH_TABLE)
+    # Strip accents: é -> e
+    text = ''.join(ch for ch in unicodedata.normalize('NFKD', text) if not unicodedata.combining(ch))
+    for pair, letter in MULTI_CHAR_HOMOGLYPHS:
+        text = text.replace(pair, letter)
+    return text
+
+
+def deletion_neighbourhood(word: str, depth: int) -> Set[str]:
+    """All strings obtained by deleting up to `depth` characters from word."""
+    found = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        found |= frontier
+    return found
+
+
+class TyposquatMatch(NamedTuple):
+    """A domain label that looks like a known brand."""
+    label: str       # Label as it appeared (punycode decoded)
+    brand: str
+    ratio: float     # SequenceMatcher ratio of the (folded) label vs the brand
+    homoglyph: bool  # Folds to exactly the brand
+
+
+class TyposquatIndex:
+    """
+    Precomputed look-alike index over a brand list.
+
+    A label near a brand is found through the deletion index, at a cost
+    that depends on the label length, not on the number of brands. A clean
+    label (no candidate) falls back to _reachable, which is O(brands): one
+    pass over the per-length posting lists of the label's letters, with
+    SequenceMatcher run only on brands that pass the quick_ratio bound.
+    """
+
+    def __init__(self, brands: Iterable[str], max_distance: int = 2, min_label_length: int = 3):
+        """
+        Build the index.
+
+        Args:
+            brands: Brand names (lowercase)
+            max_distance: Edits covered by the deletion index (short brands use 1)
+            min_label_length: Labels shorter than this are ignored
+        """
+        self.max_distance = max_distance
+        self.min_label_length = min_label_length
+        self.brands: Set[str] = {b.lower() for b in brands if b}
+
+        # folded brand -> original brand names
+        self._by_folded: Dict[str, List[str]] = {}
+        for brand in sorted(self.brands):
+            self._by_folded.setdefault(fold(brand), []).append(brand)
+
+        # deletion variant -> folded brands
+        self._deletes: Dict[str, Set[str]] = {}
+        for folded in self._by_folded:
+            for variant in deletion_neighbourhood(folded, self._brand_depth(folded)):
+                self._deletes.setdefault(variant, set()).add(folded)
+
+        # Fallback scan: brand length -> folded brands, and per length a
+        # character -> [(brand position, count)] posting list
+        self._by_length: Dict[int, List[str]] = {}
+        for folded in self._by_folded:
+            self._by_length.setdefault(len(folded), []).append(folded)
+        self._letters: Dict[int, Dict[str, List[Tuple[int, int]]]] = {}
+        for length, brands in self._by_length.items():
+            postings = self._letters[length] = {}
+            for position, folded in enumerate(brands):
+                for ch, count in Counter(folded).items():
+                    postings.setdefault(ch, []).append((position, count))
+
+        self._contains = KeywordAutomaton(cache_size=0)
+        self._contains.add_table("brands", self._by_folded)
+
+        # A label longer than this cannot reach the ratio against any brand
+        longest = max((len(f) for f in self._by_folded), default=0)
+        self._max_label_length = int(longest * (2 - MIN_RATIO) / MIN_RATIO)
+
+    def _brand_depth(self, folded_brand: str) -> int:
+        """Deletion depth indexed for a brand: 1 edit for short brands, else max_distance."""
+        return 1 if len(folded_brand) <= 4 else self.max_distance
+
+    def check_domain(self, domain: str) -> Optional[TyposquatMatch]:
+        """
+        Find the first label of a domain that looks like a known brand.
+
+        Labels are split on dots and hyphens, like the original check.
+        """
+        for label in domain.lower().split('.'):
+            for part in decode_label(label).split('-'):
+                match = self.match(part)
+                if match:
+                    return match
+        return None
+
+    def match(self, label: str) -> Optional[TyposquatMatch]:
+        """
+        Check one label against the brand list.
+
+        Returns:
+            The best-scoring look-alike brand, or None
+        """
+        if len(label) < self.min_label_length or label in self.brands:
+            return None  # Too short, or the exact brand name (which is fine)
+
+        folded = fold(label)
+        # The raw spelling is checked too: folding can also hide a typo ("prnb")
+        forms = [form for form in {folded, label} if len(form) <= self._max_label_length]
+        best: Optional[TyposquatMatch] = None
+        tried: Set[Tuple[str, str]] = set()
+
+        for form in forms:
+            for folded_brand in self._candidates(form):
+                tried.add((form, folded_brand))
+                best = self._better(best, label, folded, form, folded_brand)
+        if best is not None:
+            return best
+
+        # Beyond the indexed edit distance: scan the brands of a compatible length
+        for form in forms:
+            for folded_brand in self._reachable(form):
+                if (form, folded_brand) not in tried:
+                    best = self._better(best, label, folded, form, folded_brand)
+        return best
+
+    def _better(self, best: Optional[TyposquatMatch], label: str, folded: str,
+                form: str, folded_brand: str) -> Optional[TyposquatMatch]:
+        """Score one spelling of a label against one folded brand; keep the better match."""
+        if folded_brand == folded:
+            ratio, homoglyph = 1.0, True
+        else:
+            ratio = SequenceMatcher(None, form, folded_brand).ratio()
+            homoglyph = False
+            if not MIN_RATIO < ratio < 1.0:
+                return best
+        for brand in self._by_folded[folded_brand]:
+            if best is None or ratio > best.ratio or (ratio == best.ratio and brand < best.brand):
+                best = TyposquatMatch(label, brand, ratio, homoglyph)
+        return best
+
+    def _reachable(self, form: str) -> Iterable[str]:
+        """
+        Folded brands whose ratio against `form` can exceed MIN_RATIO.
+
+        Uses the bound of difflib's quick_ratio: matching characters are at
+        most the shared letter counts.
+        """
+        letters = Counter(form)
+        for length, brands in self._by_length.items():
+            needed = MIN_RATIO * (len(form) + length) / 2.0
+            if min(len(form), length) <= needed:
+                continue
+            common = [0] * len(brands)
+            postings = self._letters[length]
+            for ch, count in letters.items():
+                for position, brand_count in postings.get(ch, ()):
+                    common[position] += count if count < brand_count else brand_count
+            for position, shared in enumerate(common):
+                if shared > needed:
+                    yield brands[position]
+
+    def _candidates(self, form: str) -> Set[str]:
+        """Folded brands that could pass the ratio check for this spelling of a label."""
+        candidates: Set[str] = set()
+        for variant in deletion_neighbourhood(form, self.max_distance):
+            hits = self._deletes.get(variant)
+            if hits:
+                candidates |= hits
+        candidates |= self._contains.scan(form).keywords("brands")
+        return candidates
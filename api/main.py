@@ -4,17 +4,21 @@ Honeypot API - Main FastAPI Application
 
 import os
 import json
-import requests
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
 from fastapi import FastAPI, Header, HTTPException, Depends
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
-import google.generativeai as genai
-
-from .models import HoneypotRequest, HoneypotResponse, ErrorResponse
-from .intelligence import IntelligenceExtractor, session_store
-from .agent.manager import AgentManager
+from .models import HoneypotRequest, HoneypotResponse, ErrorResponse, BatchItemResponse
+from .intelligence import IntelligenceExtractor, DeepCheckScheduler, SessionIntelligence, session_store
+from .agent.manager import AgentManager, ReplyPlan
 from .agent.states import AgentState
+from .outbox import CallbackOutbox, OutboxDispatcher
+from .warmup import Warmup
+from .metrics import REGISTRY, CONTENT_TYPE, STAGE_SECONDS, TERMINATIONS
 
 
 # --------------------------------------------------
@@ -24,19 +28,47 @@ load_dotenv()
 
 API_KEY = os.getenv("HONEYPOT_API_KEY", "test-api-key-change-me")
 GUVI_ENDPOINT = "https://hackathon.guvi.in/api/updateHoneyPotFinalResult"
+CALLBACK_OUTBOX_PATH = os.getenv("CALLBACK_OUTBOX_PATH", "callback_outbox.db")
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
 
 
 # Agent Manager handles Gemini config now
 
 
 
+# --------------------------------------------------
+# CALLBACK OUTBOX (DURABLE GUVI DELIVERY)
+# --------------------------------------------------
+outbox = CallbackOutbox(CALLBACK_OUTBOX_PATH)
+dispatcher = OutboxDispatcher(outbox, GUVI_ENDPOINT)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    dispatcher.start()
+    # In the background: /health answers at once, /ready once warm
+    warmup_task = asyncio.create_task(warmup.run())
+    yield
+    warmup_task.cancel()
+    if session_store.deep_checks:
+        await session_store.deep_checks.drain()
+    session_store.close()
+    agent.llm.close()
+    agent.backend.close()
+    # Deliver whatever is still queued before the worker exits
+    undelivered = await asyncio.to_thread(dispatcher.stop, drain=True)
+    if undelivered:
+        print(f"[OUTBOX] {undelivered} payload(s) left on disk for next start")
+
+
 # --------------------------------------------------
 # FASTAPI APP
 # --------------------------------------------------
 app = FastAPI(
     title="Honeypot Scam Detection API",
     description="AI-powered honeypot for detecting scams and extracting intelligence",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -62,11 +94,47 @@ from fastapi.encoders import jsonable_encoder
 extractor = IntelligenceExtractor()
 agent = AgentManager()
 
+# LINK_ANALYSIS_MODE=deferred: reply on the offline link verdict, upgrade it in the background
+if extractor.link_mode == "deferred" and extractor.link_analyzer:
+    session_store.deep_checks = DeepCheckScheduler(extractor.link_analyzer, session_store)
+
+warmup = Warmup(extractor, agent)
+
+
+# --------------------------------------------------
+# METRICS (read from the live objects at scrape time)
+# --------------------------------------------------
+def cache_stats(key: str) -> dict:
+    caches = {}
+    if extractor.link_analyzer:
+        caches[("link",)] = extractor.link_analyzer.cache.stats()[key]
+    if agent.reply_cache:
+        caches[("reply",)] = agent.reply_cache.cache.stats()[key]
+    return caches
+
+
+REGISTRY.counter("honeypot_cache_hits_total", "Link / reply cache hits", ["cache"],
+                 collect=lambda: cache_stats("hits"))
+REGISTRY.counter("honeypot_cache_misses_total", "Link / reply cache misses", ["cache"],
+                 collect=lambda: cache_stats("misses"))
+REGISTRY.counter("honeypot_cache_evictions_total", "Link / reply cache LRU evictions", ["cache"],
+                 collect=lambda: cache_stats("evictions"))
+REGISTRY.counter("honeypot_sessions_dropped_total", "Sessions dropped by the store", ["reason"],
+                 collect=lambda: {(reason,): session_store.backend.stats()[reason] for reason in ("expired", "evicted")})
+REGISTRY.counter("honeypot_replies_total", "Agent replies by source", ["source"],
+                 collect=lambda: {(source,): n for source, n in agent.reply_stats.items()})
+REGISTRY.counter("honeypot_llm_calls_total", "LLM calls by outcome (calls = all)", ["outcome"],
+                 collect=lambda: {(outcome,): n for outcome, n in agent.llm.stats.items()})
+REGISTRY.gauge("honeypot_sessions_live", "Sessions currently stored",
+               collect=lambda: {(): len(session_store.backend)})
+REGISTRY.gauge("honeypot_session_store_bytes", "Approximate bytes of stored session data",
+               collect=lambda: {(): size} if (size := session_store.backend.stored_bytes()) is not None else {})
+
 
 # --------------------------------------------------
 # AUTH
 # --------------------------------------------------
-def verify_api_key(x_api_key: str = Header(..., alias="x-api-key")):
+async def verify_api_key(x_api_key: str = Header(..., alias="x-api-key")):
     if x_api_key != API_KEY:
         raise HTTPException(status_code=401, detail="Invalid API key")
     return x_api_key
@@ -76,10 +144,22 @@ def verify_api_key(x_api_key: str = Header(..., alias="x-api-key")):
 # HEALTH
 # --------------------------------------------------
 @app.get("/health")
-def health_check():
+async def health_check():
     return {"status": "healthy", "message": "Honeypot API is running"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of this worker's metrics."""
+    return Response(await asyncio.to_thread(REGISTRY.render), media_type=CONTENT_TYPE)
+
+
+@app.get("/ready")
+async def readiness_check():
+    """200 once start-up warm-up has passed, 503 before that (or if it failed)."""
+    return JSONResponse(status_code=200 if warmup.ready else 503, content=warmup.to_dict())
+
+
 # --------------------------------------------------
 # GEMINI REPLY (LLM ONLY TALKS)
 # --------------------------------------------------
@@ -99,10 +179,61 @@ def health_check():
         422: {"model": ErrorResponse}
     }
 )
-def process_message(
+async def process_message(
     request: HoneypotRequest,
     api_key: str = Depends(verify_api_key)
 ):
+    return await handle_turn(request)
+
+
+TERMINATION_REPLY = "Thank you. I will check this and get back later."
+AGENT_ERROR_REPLY = "I am having some trouble with my network. Can you repeat?"
+
+
+async def handle_turn(request: HoneypotRequest, intel: Optional[dict] = None) -> HoneypotResponse:
+    """
+    Run one honeypot turn: backfill, extract, terminate or reply.
+
+    `intel` is the message's extraction result if already computed (batches).
+    The session lock (shared by every worker using the session backend) is
+    held while the session is read and written, not during the LLM call.
+    """
+    session_id = request.sessionId
+    async with session_store.lock_async(session_id):
+        session, terminated = await ingest_turn(request, intel)
+        if terminated:
+            return HoneypotResponse(status="success", reply=TERMINATION_REPLY)
+        plan = plan_reply(request)
+
+    # --------------------------------------------------
+    # LLM REPLY (OUTSIDE THE LOCK)
+    # --------------------------------------------------
+    try:
+        ai_reply = await agent.complete_reply_async(plan) if plan else AGENT_ERROR_REPLY
+    except Exception as e:
+        print(f"[AGENT ERROR] {e}")
+        ai_reply = AGENT_ERROR_REPLY
+
+    return HoneypotResponse(
+        status="success",
+        reply=ai_reply
+    )
+
+
+def plan_reply(request: HoneypotRequest) -> Optional[ReplyPlan]:
+    """The agent's state transition and prompt for this turn (None on error)."""
+    try:
+        return agent.plan_reply(request.sessionId, request.message.text)
+    except Exception as e:
+        print(f"[AGENT ERROR] {e}")
+        return None
+
+
+async def ingest_turn(request: HoneypotRequest, intel: Optional[dict] = None) -> Tuple[SessionIntelligence, bool]:
+    """
+    Everything before the reply: backfill, extract, and on termination queue
+    the GUVI callback. Returns (session, terminated).
+    """
     session_id = request.sessionId
 
     print(f"\n[SESSION: {session_id}] Message: {request.message.text}")
@@ -110,12 +241,14 @@ def process_message(
     # --------------------------------------------------
     # STATELESS SESSION BACKFILL (ROBUSTNESS)
     # --------------------------------------------------
-    # Always try to backfill from history to handle restarts/statelessness
-    session = session_store.backfill_history(
-        session_id=session_id, 
-        history=request.conversationHistory or [],
-        extractor=extractor
-    )
+    # Always try to backfill from history to handle restarts/statelessness.
+    # Only messages this worker has not seen yet are extracted.
+    with STAGE_SECONDS.time(stage="backfill"):
+        session = await session_store.backfill_history_async(
+            session_id=session_id, 
+            history=request.conversationHistory or [],
+            extractor=extractor
+        )
     
     # Reset NOT needed anymore as backfill handles it
     # if len(request.conversationHistory) == 0:
@@ -124,8 +257,15 @@ def process_message(
     # --------------------------------------------------
     # INTELLIGENCE EXTRACTION
     # --------------------------------------------------
-    current_intel = extractor.extract(request.message.text)
-    session = session_store.add_intelligence(session_id, current_intel)
+    if intel is None:
+        with STAGE_SECONDS.time(stage="extract"):
+            intel = await extractor.extract_async(request.message.text)
+    current_intel = intel
+    session = session_store.add_intelligence(session_id, current_intel, message={
+        "sender": request.message.sender,
+        "text": request.message.text,
+        "timestamp": str(request.message.timestamp)
+    })
 
     print(f"[SESSION: {session_id}] Scam detected: {session.scam_detected}")
     print(f"[SESSION: {session_id}] Message count: {session.message_count}")
@@ -144,7 +284,7 @@ def process_message(
         should_terminate = True
 
     # --------------------------------------------------
-    # TERMINATE → GUVI CALLBACK
+    # TERMINATE → GUVI CALLBACK (QUEUED, DELIVERED IN BACKGROUND)
     # --------------------------------------------------
     if should_terminate:
         payload = session_store.get_final_payload(
@@ -155,36 +295,160 @@ def process_message(
         print("\n[CALLBACK PAYLOAD]")
         print(json.dumps(payload, indent=2))
 
+        TERMINATIONS.inc(scam_detected=str(session.scam_detected).lower())
         try:
-            requests.post(GUVI_ENDPOINT, json=payload, timeout=5)
+            with STAGE_SECONDS.time(stage="callback"):
+                await asyncio.to_thread(outbox.enqueue, session_id, payload)
+            dispatcher.notify()
         except Exception as e:
             print(f"[CALLBACK ERROR] {e}")
 
-        return HoneypotResponse(
-            status="success",
-            reply="Thank you. I will check this and get back later."
-        )
+    return session, should_terminate
 
-    # --------------------------------------------------
-    # LLM CONTEXT + REPLY
-    # --------------------------------------------------
-    # llm_context generation is now handled inside AgentManager
-    
-    try:
-        ai_reply = agent.generate_response(
-            session_id=session_id,
-            user_text=request.message.text
-        )
-    except Exception as e:
-        print(f"[AGENT ERROR] {e}")
-        ai_reply = "I am having some trouble with my network. Can you repeat?"
 
-    return HoneypotResponse(
-        status="success",
-        reply=ai_reply
+# --------------------------------------------------
+# BATCH ENDPOINT
+# --------------------------------------------------
+@app.post(
+    "/honeypot/batch",
+    response_model=List[BatchItemResponse],
+    responses={
+        401: {"model": ErrorResponse},
+        413: {"model": ErrorResponse},
+        422: {"model": ErrorResponse}
+    }
+)
+async def process_batch(
+    requests: List[HoneypotRequest],
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Many turns in one request, possibly from many sessions.
+
+    Results are returned in input order, one per item. Turns of the same
+    session run one after another in input order; different sessions run
+    concurrently, so their LLM calls overlap.
+    """
+    if len(requests) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch larger than {BATCH_MAX_ITEMS} items")
+
+    # Extraction is per message, not per session: do the whole batch at once
+    with STAGE_SECONDS.time(stage="extract_batch"):
+        intel_list = await extractor.extract_many_async([item.message.text for item in requests])
+
+    by_session: Dict[str, List[int]] = {}
+    for index, item in enumerate(requests):
+        by_session.setdefault(item.sessionId, []).append(index)
+
+    results: List[Optional[BatchItemResponse]] = [None] * len(requests)
+
+    async def run_session(session_id: str, indexes: List[int]) -> None:
+        for index in indexes:
+            try:
+                response = await handle_turn(requests[index], intel_list[index])
+                results[index] = BatchItemResponse(sessionId=session_id, status=response.status, reply=response.reply)
+            except Exception as e:
+                print(f"[BATCH ERROR] {session_id}: {e}")
+                results[index] = BatchItemResponse(sessionId=session_id, status="error", detail="Failed to process message")
+
+    await asyncio.gather(*(run_session(sid, indexes) for sid, indexes in by_session.items()))
+    return results
+
+
+# --------------------------------------------------
+# STREAMING ENDPOINT (SERVER-SENT EVENTS)
+# --------------------------------------------------
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post(
+    "/honeypot/stream",
+    responses={
+        200: {"content": {"text/event-stream": {}}},
+        401: {"model": ErrorResponse},
+        422: {"model": ErrorResponse}
+    }
+)
+async def process_message_stream(
+    request: HoneypotRequest,
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Same turn as /honeypot, as server-sent events:
+    `verdict` (extraction result, sent before the LLM is called), then one
+    `token` per reply chunk, then `done` with the full reply.
+    """
+    return StreamingResponse(
+        stream_turn(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 
+# Stream producers still finishing a reply after their client went away
+_stream_tasks: set = set()
+
+
+async def stream_turn(request: HoneypotRequest):
+    """
+    SSE events of one turn.
+
+    The turn runs in its own task and queues its events, so a slow reader
+    never holds anything up. The session lock covers ingest and the
+    verdict, not the LLM stream.
+    """
+    events: asyncio.Queue = asyncio.Queue()
+    producer = asyncio.create_task(produce_turn_events(request, events.put_nowait))
+    _stream_tasks.add(producer)
+    producer.add_done_callback(_stream_tasks.discard)
+
+    while (event := await events.get()) is not None:
+        yield event
+
+
+async def produce_turn_events(request: HoneypotRequest, emit) -> None:
+    """Run a turn, emitting its SSE events, then None."""
+    session_id = request.sessionId
+    try:
+        async with session_store.lock_async(session_id):
+            session, terminated = await ingest_turn(request)
+            context = session.to_llm_context()
+            emit(sse_event("verdict", {
+                "sessionId": session_id,
+                "scamDetected": session.scam_detected,
+                "confidence": context["confidence"],
+                "scamType": context["scamType"],
+                "messageCount": session.message_count,
+                "extractedIntelligence": session.to_dict(),
+                "terminated": terminated,
+            }))
+            plan = None if terminated else plan_reply(request)
+
+        if terminated:
+            chunks = [TERMINATION_REPLY]
+            emit(sse_event("token", {"text": TERMINATION_REPLY}))
+        else:
+            chunks = []
+            try:
+                if plan is not None:
+                    async for chunk in agent.stream_reply_async(plan):
+                        chunks.append(chunk)
+                        emit(sse_event("token", {"text": chunk}))
+            except Exception as e:
+                print(f"[AGENT ERROR] {e}")
+            if not chunks:
+                chunks.append(AGENT_ERROR_REPLY)
+                emit(sse_event("token", {"text": AGENT_ERROR_REPLY}))
+
+        emit(sse_event("done", {"status": "success", "reply": "".join(chunks).strip()}))
+    except Exception as e:
+        print(f"[STREAM ERROR] {e}")
+        emit(sse_event("error", {"status": "error", "detail": "Failed to process message"}))
+    finally:
+        emit(None)
+
+
 # --------------------------------------------------
 # RUN
 # --------------------------------------------------
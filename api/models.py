@@ -24,3 +24,9 @@ class HoneypotResponse(BaseModel):
 class ErrorResponse(BaseModel):
     error: str
     detail: Optional[str] = None
+
+class BatchItemResponse(BaseModel):
+    sessionId: str
+    status: str
+    reply: Optional[str] = None
+    detail: Optional[str] = None
@@ -0,0 +1,19 @@
+"""
+Optional Dependencies - Availability checks that do not import.
+
+Heavy optional packages (google-generativeai, openai, whois,
+duckduckgo-search, tldextract, redis) are imported where they are first used
+rather than at module import, so `import api.main` stays fast on cold
+start. installed() answers the question the eager
+`try: import x / except ImportError` blocks used to.
+"""
+
+import importlib.util
+
+
+def installed(module: str) -> bool:
+    """True if `module` can be imported (it is located, not imported)."""
+    try:
+        return importlib.util.find_spec(module) is not None
+    except (ImportError, ValueError):
+        return False
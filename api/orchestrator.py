@@ -1,9 +1,8 @@
 from fastapi import FastAPI, Header, HTTPException
-from agents import AgentManager
-from extractor import IntelligenceExtractor
+from api.intelligence.agents import AgentManager
+from api.intelligence.extractor import IntelligenceExtractor
 import requests
-import os
-import google.generativeai as genai
+from api.agent.llm_backends import backend_from_env
 
 # --------------------------------------------------
 # App + Core Objects
@@ -17,14 +16,13 @@ API_KEY = "YOUR_SECRET_API_KEY"
 GUVI_ENDPOINT = "https://hackathon.guvi.in/api/updateHoneyPotFinalResult"
 
 # --------------------------------------------------
-# Gemini Setup
+# LLM Setup (LLM_BACKEND: gemini / openai / stub)
 # --------------------------------------------------
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-gemini_model = genai.GenerativeModel("gemini-1.5-flash")
+llm_backend = backend_from_env()
 
 
 # --------------------------------------------------
-# LLM REPLY GENERATOR (GEMINI ONLY)
+# LLM REPLY GENERATOR
 # --------------------------------------------------
 def generate_llm_reply(text, intent_output, history=None):
     prompt = f"""
@@ -43,15 +41,7 @@ Incoming message:
 Respond naturally to keep the conversation going.
 """
 
-    response = gemini_model.generate_content(
-        prompt,
-        generation_config={
-            "temperature": 0.7,
-            "max_output_tokens": 100
-        }
-    )
-
-    return response.text.strip()
+    return llm_backend.generate(prompt, temperature=0.7, max_tokens=100)
 
 
 # --------------------------------------------------
@@ -138,7 +128,7 @@ async def orchestrator(data: dict, x_api_key: str = Header(None)):
             )
 
     # --------------------------------------------------
-    # 7. GEMINI REPLY (ONLY TALKING, NOT DECIDING)
+    # 7. LLM REPLY (ONLY TALKING, NOT DECIDING)
     # --------------------------------------------------
     reply = None
     if command in ["ENGAGE", "EXTRACT"]:
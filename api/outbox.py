@@ -0,0 +1,310 @@
+"""
+Callback Outbox - Durable Delivery of GUVI Final Results
+
+Final payloads are written to an on-disk SQLite queue while the request is
+being served and delivered by a background dispatcher. The closing reply
+never waits on the GUVI endpoint, and a failed POST is retried with
+exponential backoff instead of being lost.
+
+Several workers may share one outbox file: a dispatcher claims rows
+(status 'inflight' with a lease) in a single UPDATE before sending them,
+so each payload is POSTed by one worker only. Leases that expire (the
+worker died mid-delivery) put their rows back in the queue.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class CallbackOutbox:
+    """
+    SQLite-backed queue of pending callback payloads.
+
+    Rows are deleted once delivered. Rows that exhaust their attempts are
+    kept with status 'dead' so they can be inspected or replayed by hand.
+    status: 'pending' -> 'inflight' (claimed, until lease_until) -> deleted | 'pending' | 'dead'
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            created_at REAL NOT NULL,
+            last_error TEXT,
+            lease_until REAL
+        )
+    """
+
+    def __init__(self, path: str = "callback_outbox.db"):
+        """
+        Open (or create) the outbox database.
+
+        Args:
+            path: SQLite file path (":memory:" for a throwaway queue)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(self.SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+        if "lease_until" not in columns:
+            # Outbox files created before leases
+            self._conn.execute("ALTER TABLE outbox ADD COLUMN lease_until REAL")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at)"
+        )
+
+    def enqueue(self, session_id: str, payload: dict) -> int:
+        """Persist a payload for delivery. Returns the outbox row id."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO outbox (session_id, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?)",
+                (session_id, json.dumps(payload), now, now)
+            )
+        return cursor.lastrowid
+
+    def due(self, limit: int = 50, now: Optional[float] = None) -> List[Tuple[int, dict, int]]:
+        """
+        Get pending payloads whose next attempt is due, without claiming them.
+
+        Args:
+            limit: Maximum number of rows to return (-1 = no limit)
+            now: Reference time (None = wall clock, float('inf') = everything pending)
+
+        Returns:
+            List of (id, payload, attempts) tuples, oldest first
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload, attempts FROM outbox "
+                "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (now, limit)
+            ).fetchall()
+        return [(row_id, json.loads(payload), attempts) for row_id, payload, attempts in rows]
+
+    def claim(self, limit: int = 50, now: Optional[float] = None, lease: float = 60.0) -> List[Tuple[int, dict, int]]:
+        """
+        Atomically claim due payloads for delivery by this worker.
+
+        Claimed rows are 'inflight' until marked delivered / failed or until
+        the lease runs out, so other workers sharing the file skip them.
+
+        Args:
+            limit: Maximum number of rows to claim (-1 = no limit)
+            now: Reference time for due-ness (None = wall clock, float('inf') = everything pending)
+            lease: Seconds the rows stay reserved for this worker
+
+        Returns:
+            List of (id, payload, attempts) tuples, oldest first
+        """
+        wall = time.time()
+        now = wall if now is None else now
+        with self._lock:
+            # Rows whose worker died mid-delivery go back to the queue
+            self._conn.execute(
+                "UPDATE outbox SET status = 'pending', lease_until = NULL "
+                "WHERE status = 'inflight' AND lease_until <= ?",
+                (wall,)
+            )
+            rows = self._conn.execute(
+                "UPDATE outbox SET status = 'inflight', lease_until = ? "
+                "WHERE id IN (SELECT id FROM outbox WHERE status = 'pending' AND next_attempt_at <= ? "
+                "ORDER BY id LIMIT ?) AND status = 'pending' "
+                "RETURNING id, payload, attempts",
+                (wall + lease, now, limit)
+            ).fetchall()
+        return [(row_id, json.loads(payload), attempts) for row_id, payload, attempts in sorted(rows)]
+
+    def mark_delivered(self, row_id: int) -> None:
+        """Remove a delivered payload."""
+        with self._lock:
+            self._conn.execute("DELETE FROM outbox WHERE id = ?", (row_id,))
+
+    def mark_failed(self, row_id: int, error: str, next_attempt_at: float, dead: bool = False) -> None:
+        """Record a failed attempt and schedule the retry (or bury the row)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET attempts = attempts + 1, last_error = ?, next_attempt_at = ?, status = ?, "
+                "lease_until = NULL WHERE id = ?",
+                (error[:500], next_attempt_at, "dead" if dead else "pending", row_id)
+            )
+
+    def pending_count(self) -> int:
+        """Number of payloads still waiting for delivery (queued or in flight)."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE status IN ('pending', 'inflight')"
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class OutboxDispatcher:
+    """
+    Background thread that drains a CallbackOutbox.
+
+    Key behaviors:
+    - Delivers over a pooled keep-alive requests.Session
+    - Retries failures with capped exponential backoff
+    - Only sends rows it claimed, so several workers can share one outbox
+    - Drains whatever is still pending when stopped
+    """
+
+    def __init__(
+        self,
+        outbox: CallbackOutbox,
+        endpoint: str,
+        timeout: float = 5.0,
+        max_attempts: int = 8,
+        base_backoff: float = 2.0,
+        max_backoff: float = 300.0,
+        pool_size: int = 4,
+        poll_interval: float = 1.0,
+        lease: float = 60.0,
+        http: Optional[requests.Session] = None,
+    ):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            outbox: Queue to drain
+            endpoint: URL the payloads are POSTed to
+            timeout: Per-request timeout in seconds
+            max_attempts: Attempts before a payload is marked dead
+            base_backoff: First retry delay in seconds (doubles per attempt)
+            max_backoff: Upper bound on the retry delay
+            pool_size: Concurrent deliveries / pooled connections
+            poll_interval: Idle wait between queue scans
+            lease: Seconds a claimed batch stays reserved for this worker
+                (must exceed the time to deliver one batch)
+            http: Optional pre-configured session (mainly for tests)
+        """
+        self.outbox = outbox
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.pool_size = pool_size
+        self.poll_interval = poll_interval
+        self.lease = lease
+
+        if http is None:
+            http = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            http.mount("https://", adapter)
+            http.mount("http://", adapter)
+        self.http = http
+
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="outbox")
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the background delivery loop."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+        self._thread.start()
+
+    def notify(self) -> None:
+        """Wake the loop after a new payload was enqueued."""
+        self._wake.set()
+
+    def stop(self, drain: bool = True, timeout: float = 10.0) -> int:
+        """
+        Stop the loop, optionally delivering everything still pending.
+
+        If the loop does not exit within `timeout` (a delivery is hanging)
+        the drain is skipped: its claimed rows are still in flight, and the
+        rest stay on disk for the next start.
+
+        Args:
+            drain: Attempt every pending payload once, ignoring backoff
+            timeout: Time budget for the drain in seconds
+
+        Returns:
+            Number of payloads left undelivered (they stay on disk)
+        """
+        self._stopping.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                print("[OUTBOX] Dispatcher still delivering; skipping the drain")
+                drain = False
+            else:
+                self._thread = None
+
+        if drain:
+            deadline = time.monotonic() + timeout
+            # Rows left unattempted at the deadline are released when the lease runs out
+            pending = self.outbox.claim(limit=-1, now=float("inf"), lease=timeout + self.timeout)
+            for start in range(0, len(pending), self.pool_size):
+                if time.monotonic() >= deadline:
+                    break
+                self._deliver_batch(pending[start:start + self.pool_size])
+
+        return self.outbox.pending_count()
+
+    def dispatch_once(self, now: Optional[float] = None) -> int:
+        """Claim and deliver one batch of due payloads. Returns the number delivered."""
+        batch = self.outbox.claim(limit=self.pool_size * 4, now=now, lease=self.lease)
+        if not batch:
+            return 0
+        return self._deliver_batch(batch)
+
+    def _run(self) -> None:
+        """Delivery loop: drain due rows, then sleep until woken or polled."""
+        while not self._stopping.is_set():
+            try:
+                delivered = self.dispatch_once()
+            except Exception as e:
+                print(f"[OUTBOX] Dispatch error: {e}")
+                delivered = 0
+            if not delivered:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _deliver_batch(self, batch: List[Tuple[int, dict, int]]) -> int:
+        """Deliver a batch concurrently over the pooled session."""
+        results = self._executor.map(lambda row: self._deliver(*row), batch)
+        return sum(1 for ok in results if ok)
+
+    def _deliver(self, row_id: int, payload: dict, attempts: int) -> bool:
+        """POST one payload and record the outcome."""
+        try:
+            response = self.http.post(self.endpoint, json=payload, timeout=self.timeout)
+            response.raise_for_status()
+        except Exception as e:
+            attempts += 1
+            dead = attempts >= self.max_attempts
+            delay = min(self.max_backoff, self.base_backoff * (2 ** (attempts - 1)))
+            self.outbox.mark_failed(row_id, str(e), time.time() + delay, dead=dead)
+            print(f"[OUTBOX] Delivery failed for {payload.get('sessionId')} "
+                  f"(attempt {attempts}/{self.max_attempts}): {e}")
+            return False
+
+        self.outbox.mark_delivered(row_id)
+        print(f"[OUTBOX] Delivered final result for {payload.get('sessionId')}")
+        return True
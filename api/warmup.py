@@ -0,0 +1,119 @@
+"""
+Warm-up - Exercise every dependency once before the worker takes traffic.
+
+Runs in the background at start-up on synthetic input: the regex scanner
+and keyword automaton (IntelligenceExtractor), the classifier, the offline
+link checks (tldextract's suffix list, typosquat index) and one tiny LLM
+request (client import, connection, TLS handshake). /ready reports the
+result, so a load balancer only routes to warmed workers while /health
+stays a plain liveness check.
+
+The LLM check is informational: if it fails the worker still becomes
+ready, since replies fall back to templates.
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+
+from .intelligence import IntelligenceExtractor, ScamClassifier
+from .agent.manager import AgentManager
+
+
+WARMUP_TEXT = (
+    "Dear customer, your SBI account will be blocked today. Pay Rs 10 to "
+    "kyc.verify@okicici or call +91 9876543210, share the OTP immediately."
+)
+WARMUP_URL = "http://sbi-kyc-update.xyz/login"
+WARMUP_PROMPT = "Reply with the single word: ok"
+
+
+@dataclass
+class CheckResult:
+    """Outcome of one warm-up check."""
+    ok: bool
+    latency_ms: float
+    required: bool = True
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        result = {"ok": self.ok, "latencyMs": round(self.latency_ms, 1), "required": self.required}
+        if self.error:
+            result["error"] = self.error
+        return result
+
+
+class Warmup:
+    """
+    Start-up warm-up and its readiness state.
+
+    state: "pending" -> "running" -> "ready" | "failed"
+    """
+
+    def __init__(self, extractor: IntelligenceExtractor, agent: AgentManager, include_llm: Optional[bool] = None):
+        """
+        Args:
+            extractor: The extractor serving requests
+            agent: The agent serving requests (its backend gets one request)
+            include_llm: Send the warm-up LLM request (default: WARMUP_LLM env, on)
+        """
+        self.extractor = extractor
+        self.agent = agent
+        self.include_llm = include_llm if include_llm is not None else os.getenv("WARMUP_LLM", "1") != "0"
+        self.state = "pending"
+        self.checks: Dict[str, CheckResult] = {}
+        self.duration_ms: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    async def run(self) -> None:
+        """Run every check once; never raises."""
+        self.state = "running"
+        started = time.perf_counter()
+
+        intel = await self._check("extractor", self.extractor.extract_async, WARMUP_TEXT)
+        await self._check("classifier", asyncio.to_thread, ScamClassifier().classify, WARMUP_TEXT, intel or {})
+        if self.extractor.link_analyzer:
+            await self._check("linkAnalyzer", asyncio.to_thread,
+                              self.extractor.link_analyzer.analyze_offline, WARMUP_URL, WARMUP_TEXT)
+        if self.include_llm and self.agent.backend.available:
+            await self._check("llm", self._llm_request, required=False)
+
+        self.duration_ms = (time.perf_counter() - started) * 1000
+        failed = [name for name, check in self.checks.items() if check.required and not check.ok]
+        self.state = "failed" if failed else "ready"
+        print(f"[WARMUP] {self.state} in {self.duration_ms:.0f} ms "
+              + ", ".join(f"{name}={check.latency_ms:.0f}ms" for name, check in self.checks.items()))
+
+    async def _llm_request(self) -> str:
+        """One short request straight to the backend (not counted in LLMClient stats)."""
+        return await asyncio.wait_for(
+            self.agent.backend.generate_async(WARMUP_PROMPT, temperature=0.0, max_tokens=5),
+            timeout=self.agent.llm.deadline,
+        )
+
+    async def _check(self, name: str, fn: Callable[..., Awaitable], *args, required: bool = True):
+        """Time one awaitable check and record its result. Returns its value (None on error)."""
+        started = time.perf_counter()
+        try:
+            value = await fn(*args)
+            self.checks[name] = CheckResult(True, (time.perf_counter() - started) * 1000, required)
+            return value
+        except asyncio.TimeoutError:
+            error = "timed out"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        self.checks[name] = CheckResult(False, (time.perf_counter() - started) * 1000, required, error)
+        print(f"[WARMUP] {name} failed: {error}")
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            "status": self.state,
+            "durationMs": round(self.duration_ms, 1) if self.duration_ms is not None else None,
+            "checks": {name: check.to_dict() for name, check in self.checks.items()},
+        }
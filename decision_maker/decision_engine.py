@@ -1,6 +1,8 @@
-import pandas as pd
 from .theme_detector import ThemeDetector
 
+# ML intents that mean "not a scam"; everything else is treated as one
+SAFE_INTENTS = ('normal', 'ham', 'safe', 'non-scam')
+
 class DecisionMaker:
     def __init__(self, mapping_path="scam_intent_mapping.csv"):
         self.theme_detector = ThemeDetector(mapping_path)
@@ -8,7 +10,7 @@ class DecisionMaker:
 
     def run(self, text, ml_intent, session_id):
         # --- VERDICT LOGIC (RESTORED TO ORIGINAL FOR 99.94% ACCURACY) ---
-        is_scam = ml_intent.lower() not in ['normal', 'ham', 'safe', 'non-scam']
+        is_scam = ml_intent.lower() not in SAFE_INTENTS
         verdict = "SCAM" if is_scam else "NOT_SCAM"
             
         # --- HONEYPOT STATE MANAGEMENT ---
@@ -1,16 +1,99 @@
-import pandas as pd
+"""
+Theme Detector - Weighted scam category scoring from scam_intent_mapping.csv.
+
+The mapping (keyword, scam_category, confidence_weight) is compiled once
+into a single regex over every keyword. A category's score is the sum of
+confidence_weight over its distinct keywords found in the text (substring
+match, case-insensitive); the highest score wins, "GENERAL" if none.
+
+detect_many() scores a batch at once: a texts x keywords hit matrix times
+the keywords x categories weight matrix (needs numpy).
+"""
+
+import csv
+import re
+from typing import Dict, List, Sequence, Tuple
+
 
 class ThemeDetector:
     def __init__(self, mapping_path="scam_intent_mapping.csv"):
-        self.df = pd.read_csv(mapping_path)
-        self.categories = self.df['scam_category'].unique().tolist()
-        self.theme_map = {
-            cat: self.df[self.df['scam_category'] == cat]['keyword'].str.lower().tolist() 
-            for cat in self.categories
+        with open(mapping_path, newline="", encoding="utf-8") as f:
+            rows = [
+                (row["keyword"], row["scam_category"], float(row.get("confidence_weight") or 1.0))
+                for row in csv.DictReader(f)
+            ]
+        self._compile(rows)
+
+    def _compile(self, rows: Sequence[Tuple[str, str, float]]) -> None:
+        """Build the matcher from (keyword, category, weight) rows."""
+        self.categories: List[str] = list(dict.fromkeys(category for _, category, _ in rows))
+        # keyword -> [(category index, weight)]; a keyword may belong to several categories
+        self.keyword_weights: Dict[str, List[Tuple[int, float]]] = {}
+        for keyword, category, weight in rows:
+            keyword = keyword.strip().lower()
+            if keyword:
+                self.keyword_weights.setdefault(keyword, []).append((self.categories.index(category), weight))
+        self.keywords: List[str] = list(self.keyword_weights)
+        self._weight_matrix = None  # keywords x categories, built by detect_many()
+
+        # The lookahead finds, at every position, the longest keyword starting
+        # there; keywords contained in it are implied, which keeps the result
+        # identical to one `kw in text` test per keyword.
+        longest_first = sorted(self.keywords, key=len, reverse=True)
+        self._pattern = re.compile("(?=(" + "|".join(map(re.escape, longest_first)) + "))")
+        self._implies: Dict[str, Tuple[str, ...]] = {
+            keyword: tuple(other for other in self.keywords if other in keyword) for keyword in self.keywords
         }
 
+    def __setstate__(self, state):
+        # Pickles from the pandas version only carry theme_map (unweighted)
+        if "theme_map" in state:
+            rows = [(kw, cat, 1.0) for cat, kws in state["theme_map"].items() for kw in kws]
+            self._compile(rows)
+        else:
+            self.__dict__.update(state)
+
+    def found(self, text) -> set:
+        """Distinct mapping keywords contained in a text."""
+        found = set()
+        for match in self._pattern.finditer(str(text).lower()):
+            found.update(self._implies[match.group(1)])
+        return found
+
+    def scores(self, text) -> Dict[str, float]:
+        """Weighted score per category (0 for categories without hits)."""
+        totals = [0.0] * len(self.categories)
+        found = self.found(text)
+        for keyword in self.keywords:
+            if keyword not in found:
+                continue
+            for index, weight in self.keyword_weights[keyword]:
+                totals[index] += weight
+        return dict(zip(self.categories, totals))
+
     def detect(self, text):
-        text = str(text).lower()
-        counts = {cat: sum(1 for kw in kws if kw in text) for cat, kws in self.theme_map.items()}
-        winner = max(counts, key=counts.get)
-        return winner if counts[winner] > 0 else "GENERAL"
\ No newline at end of file
+        scores = self.scores(text)
+        winner = max(scores, key=scores.get)
+        return winner if scores[winner] > 0 else "GENERAL"
+
+    def detect_many(self, texts) -> List[str]:
+        """detect() for a batch of texts, scored in one matrix product."""
+        import numpy as np
+
+        lowered = np.char.lower(np.asarray([str(text) for text in texts], dtype=str))
+        if not lowered.size:
+            return []
+        hits = np.empty((lowered.size, len(self.keywords)), dtype=np.float64)
+        for column, keyword in enumerate(self.keywords):
+            hits[:, column] = np.char.find(lowered, keyword) >= 0
+
+        if self._weight_matrix is None:
+            self._weight_matrix = np.zeros((len(self.keywords), len(self.categories)))
+            for row, keyword in enumerate(self.keywords):
+                for index, weight in self.keyword_weights[keyword]:
+                    self._weight_matrix[row, index] += weight
+
+        scores = hits @ self._weight_matrix
+        best = scores.argmax(axis=1)
+        labels = np.asarray(self.categories + ["GENERAL"], dtype=object)
+        return labels[np.where(scores[np.arange(len(best)), best] > 0, best, len(self.categories))].tolist()
@@ -1,50 +1,193 @@
-import pandas as pd
-from decision_maker.decision_engine import DecisionMaker
+"""
+Decision Evaluator - Score the DecisionMaker over a labelled dataset.
+
+Computes the same verdicts and honeypot commands as DecisionMaker.run()
+for every row, but column-wise: verdicts are one vectorized comparison,
+per-session message counts and thresholds are pandas group cumulatives.
+Rows are grouped into sessions of --session-size consecutive messages,
+like the original per-row loop did.
+
+The report is a single columnar file (one row per message, see
+REPORT_COLUMNS). `.arrow` / `.feather` is written uncompressed so it can be
+memory-mapped; `.parquet` is smaller. Both need pyarrow (listed in
+api/requirements.txt); without it the report is written as `.csv`.
+--convert loads an older final_*.csv report into the same schema instead.
+--save-model also pickles the DecisionMaker to decision_maker.pkl.
 
-dm = DecisionMaker("scam_intent_mapping.csv")
+Usage:
+    python evaluate_decision.py [--dataset decision_dataset.csv] [-o decision_report.arrow]
+    python evaluate_decision.py --convert final_scam_analysis.csv -o scam_analysis.arrow
+"""
 
+import argparse
+import os
 import pickle
-with open("decision_maker.pkl", "wb") as f:
-    pickle.dump(dm, f)
-
-print("✅ Model saved as decision_maker.pkl")
-
-# Load your decision dataset
-df = pd.read_csv("decision_dataset.csv")
-
-results = []
-correct = 0
-
-print("Evaluating 15k samples... (Columns: Verdict, Command, Progress)")
-
-for i, row in df.iterrows():
-    msg_text = row['text']
-    ml_intent = row['intent']
-    ground_truth = str(row['verdict']).lower() 
-    
-    sess_id = f"user_{i // 5}"
-    res = dm.run(msg_text, ml_intent, sess_id)
-    
-    is_detected = (res['verdict'] == "SCAM")
-    is_actually_scam = ground_truth in ['spam', 'scam', '1', 'other_scam']
-    
-    if is_detected == is_actually_scam:
-        correct += 1
-    
-    results.append(res)
-
-accuracy = (correct / len(df)) * 100
-
-print("\n" + "="*40)
-print(f"FINAL ACCURACY: {accuracy:.2f}%")
-print("="*40 + "\n")
-
-output_df = pd.DataFrame(results)
-print("5 SAMPLE OUTPUTS:")
-print(output_df[['verdict', 'command', ]].head(5))
-
-output_df.to_csv("final_clean_report.csv", index=False)
-print("\n✅ Clean report saved: final_clean_report.csv")
-
-output_df.to_json("final_clean_report.json", orient="records", indent=4)
-print("✅ JSON report saved: final_clean_report.json")
\ No newline at end of file
+import time
+
+import numpy as np
+import pandas as pd
+
+from decision_maker.config import INITIAL_THRESHOLD, THRESHOLD_INCREMENT
+from decision_maker.decision_engine import DecisionMaker, SAFE_INTENTS
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Ground-truth labels that mean "scam"
+SCAM_LABELS = ('spam', 'scam', '1', 'other_scam')
+# Report verdicts that mean "not a scam" (older reports used NO_SCAM)
+SAFE_VERDICTS = ('NOT_SCAM', 'NO_SCAM')
+
+# Report schema; covers every final_*.csv variant. Nullable columns are
+# empty when the source had no such data.
+REPORT_COLUMNS = {
+    "session_id": "int32",        # row // session_size
+    "intent": "category",         # ML intent fed to the decision maker
+    "actual": "category",         # ground-truth label
+    "predicted": "category",      # older reports' model prediction
+    "verdict": "category",        # SCAM / NOT_SCAM (older: NO_SCAM, OTHER_SCAM, ...)
+    "correct": "boolean",         # verdict agrees with actual
+    "command": "category",        # ENGAGE / EXTRACT
+    "message_count": "int16",     # "progress" numerator
+    "threshold": "int16",         # "progress" denominator
+    "risk": "float32",            # risk / risk_per_msg of older reports
+}
+
+
+def evaluate(df: pd.DataFrame, session_size: int = 5) -> pd.DataFrame:
+    """
+    DecisionMaker verdicts and commands for a dataset with `intent` and
+    `verdict` (ground truth) columns, as a report frame.
+    """
+    n = len(df)
+    intent = df['intent'].astype(str)
+    is_scam = ~intent.str.lower().isin(SAFE_INTENTS).to_numpy()
+    actual = df['verdict'].astype(str)
+    actually_scam = actual.str.lower().isin(SCAM_LABELS).to_numpy()
+
+    session_id = np.arange(n, dtype=np.int64) // session_size
+    sessions = pd.Series(is_scam, dtype=np.int16).groupby(session_id)
+    message_count = sessions.cumcount().to_numpy() + 1
+    scams_so_far = sessions.cumsum().to_numpy()
+
+    report = pd.DataFrame({
+        "session_id": session_id,
+        "intent": intent.to_numpy(),
+        "actual": actual.to_numpy(),
+        "predicted": None,
+        "verdict": np.where(is_scam, "SCAM", "NOT_SCAM"),
+        "correct": is_scam == actually_scam,
+        # Once a session has seen a scam message it stays on EXTRACT
+        "command": np.where(scams_so_far > 0, "EXTRACT", "ENGAGE"),
+        "message_count": message_count,
+        "threshold": INITIAL_THRESHOLD + THRESHOLD_INCREMENT * scams_so_far,
+        "risk": df['risk'].to_numpy() if 'risk' in df else np.nan,
+    })
+    return report.astype(REPORT_COLUMNS)
+
+
+def load_legacy_report(path: str, session_size: int = 5) -> pd.DataFrame:
+    """Read one of the older final_*.csv reports into the report schema."""
+    df = pd.read_csv(path)
+    n = len(df)
+    report = pd.DataFrame({"session_id": np.arange(n) // session_size})
+    for column in ("intent", "actual", "predicted", "verdict", "command"):
+        report[column] = df[column].to_numpy() if column in df else None
+
+    if "progress" in df:
+        progress = df["progress"].str.split("/", n=1, expand=True)
+        report["message_count"] = progress[0].to_numpy(dtype=np.int16)
+        report["threshold"] = progress[1].to_numpy(dtype=np.int16)
+    else:
+        report["message_count"] = report.groupby("session_id").cumcount().to_numpy() + 1
+        report["threshold"] = 0
+
+    risk = df["risk"] if "risk" in df else df.get("risk_per_msg")
+    report["risk"] = risk.to_numpy() if risk is not None else np.nan
+
+    correct = pd.Series(pd.NA, index=report.index, dtype="boolean")
+    if "actual" in df:
+        detected = ~df["verdict"].astype(str).str.upper().isin(SAFE_VERDICTS)
+        correct[:] = detected.to_numpy() == df["actual"].astype(str).str.lower().isin(SCAM_LABELS).to_numpy()
+    report["correct"] = correct
+    return report[list(REPORT_COLUMNS)].astype(REPORT_COLUMNS)
+
+
+def accuracy_by_intent(report: pd.DataFrame) -> pd.DataFrame:
+    """Rows and accuracy (%) per intent, plus an ALL row."""
+    scored = report.dropna(subset=["correct"])
+    correct = scored["correct"].astype(bool)
+    table = correct.groupby(scored["intent"], observed=True).agg(rows="size", accuracy="mean")
+    table.loc["ALL"] = [len(correct), correct.mean()]
+    table["rows"] = table["rows"].astype(int)
+    table["accuracy"] *= 100
+    return table
+
+
+def report_path(path: str) -> str:
+    """Output path to use: `path`, or its .csv twin if it needs pyarrow and pyarrow is missing."""
+    if PYARROW_AVAILABLE or path.endswith(".csv"):
+        return path
+    return os.path.splitext(path)[0] + ".csv"
+
+
+def write_report(report: pd.DataFrame, path: str) -> None:
+    """Write the report as Arrow IPC (uncompressed, mmap-able), Parquet or CSV."""
+    if path.endswith(".csv"):
+        report.to_csv(path, index=False)
+        return
+    if not PYARROW_AVAILABLE:
+        raise SystemExit("Writing .arrow / .parquet reports needs pyarrow (pip install pyarrow)")
+    table = pa.Table.from_pandas(report, preserve_index=False)
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
+    else:
+        feather.write_feather(table, path, compression="uncompressed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", default="decision_dataset.csv", help="CSV with text, intent, verdict columns")
+    parser.add_argument("--mapping", default="scam_intent_mapping.csv")
+    parser.add_argument("-o", "--output", default="decision_report.arrow", help=".arrow / .feather / .parquet / .csv")
+    parser.add_argument("--session-size", type=int, default=5, help="Consecutive rows per session")
+    parser.add_argument("--convert", metavar="REPORT_CSV", help="Convert an older final_*.csv report instead")
+    parser.add_argument("--save-model", action="store_true", help="Also pickle the DecisionMaker to decision_maker.pkl")
+    args = parser.parse_args()
+
+    output = report_path(args.output)
+    if output != args.output:
+        print(f"⚠️ pyarrow is not installed; writing {output} instead of {args.output}")
+
+    if args.save_model:
+        with open("decision_maker.pkl", "wb") as f:
+            pickle.dump(DecisionMaker(args.mapping), f)
+        print("✅ Model saved as decision_maker.pkl")
+
+    started = time.perf_counter()
+    if args.convert:
+        report = load_legacy_report(args.convert, args.session_size)
+    else:
+        df = pd.read_csv(args.dataset, usecols=lambda c: c in ("intent", "verdict", "risk"))
+        report = evaluate(df, args.session_size)
+    elapsed = time.perf_counter() - started
+
+    print(f"Evaluated {len(report)} rows in {elapsed * 1000:.0f} ms")
+    if report["correct"].notna().any():
+        table = accuracy_by_intent(report)
+        print("\n" + "=" * 40)
+        print(f"FINAL ACCURACY: {table.loc['ALL', 'accuracy']:.2f}%")
+        print("=" * 40)
+        print(table.to_string(float_format=lambda v: f"{v:.2f}"))
+
+    write_report(report, output)
+    print(f"\n✅ Report saved: {output}")
+
+
+if __name__ == "__main__":
+    main()
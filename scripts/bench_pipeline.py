@@ -0,0 +1,93 @@
+"""
+Benchmark: end-to-end /honeypot throughput with the offline LLM stub.
+
+Runs the FastAPI app in-process (no server, no network): LLM_BACKEND=stub
+replaces Gemini with deterministic replies after a fixed latency, WHOIS /
+web reputation lookups are switched off, and callbacks go to a temporary
+outbox that is never delivered. Concurrent sessions each play a scripted
+scam conversation, sending the growing conversationHistory like the real
+client does.
+
+Usage:
+    python scripts/bench_pipeline.py [--sessions 50] [--turns 10] [--latency 0.2]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Add repo root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCRIPT = [
+    "Dear customer, your SBI account {n} will be blocked today. Update KYC immediately.",
+    "Click http://sbi-kyc-update{n}.xyz/login and enter your details to avoid suspension.",
+    "Sir this is urgent. Pay Rs 10 verification fee to sbi.verify{n}@okicici now.",
+    "If UPI is not working transfer to account 5012{n:08d} IFSC SBIN0001234.",
+    "Share the OTP you received. Otherwise police case will be filed under cyber crime.",
+    "Why are you delaying? Do it fast or your account is permanently blocked.",
+]
+
+
+async def run_session(client, headers, session_no, turns, latencies):
+    history = []
+    for t in range(turns):
+        message = {"sender": "scammer", "text": SCRIPT[t % len(SCRIPT)].format(n=session_no),
+                   "timestamp": f"2026-10-16T10:{t:02d}:00Z"}
+        payload = {"sessionId": f"bench-{session_no}", "message": message, "conversationHistory": history}
+        started = time.perf_counter()
+        response = await client.post("/honeypot", json=payload, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+        history = history + [message, {"sender": "user", "text": response.json()["reply"],
+                                       "timestamp": message["timestamp"]}]
+
+
+async def main_async(args):
+    import httpx
+    from api import main as app_module
+
+    analyzer = app_module.extractor.link_analyzer
+    if analyzer:
+        analyzer.enable_whois = False
+        analyzer.enable_web_search = False
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    headers = {"x-api-key": app_module.API_KEY}
+    transport = httpx.ASGITransport(app=app_module.app)
+    latencies = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(run_session(client, headers, i, args.turns, latencies)
+                               for i in range(args.sessions)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"{args.sessions} sessions x {args.turns} turns, stub latency {args.latency}s")
+    print(f"  requests:   {len(latencies)} in {elapsed:.2f}s ({len(latencies) / elapsed:.1f} req/s)")
+    print(f"  latency:    p50 {statistics.median(latencies) * 1000:.0f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f} ms")
+    print(f"  replies:    {app_module.agent.reply_stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub LLM latency in seconds")
+    args = parser.parse_args()
+
+    # Must be set before the app module is imported
+    os.environ["LLM_BACKEND"] = "stub"
+    os.environ["LLM_STUB_LATENCY"] = str(args.latency)
+    os.environ.setdefault("CALLBACK_OUTBOX_PATH", os.path.join(tempfile.mkdtemp(), "outbox.db"))
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
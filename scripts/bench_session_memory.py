@@ -0,0 +1,172 @@
+"""
+Benchmark: memory per session, compact SessionIntelligence vs. the old layout.
+
+The old SessionIntelligence was a plain dataclass with seven sets, a list
+of message dicts, hex fingerprints, link report dicts and a classifier
+state with an empty set per keyword table. LegacySession below rebuilds
+that layout; both are fed the same 20-turn scam conversations and the
+memory they keep alive is measured with tracemalloc.
+
+Usage:
+    python scripts/bench_session_memory.py [--sessions 200] [--turns 20]
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import os
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional, Set
+
+# Add repo root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.intelligence import IntelligenceExtractor
+from api.intelligence.classifier import ClassifierState, ScamAnalysis, ScamClassifier
+from api.intelligence.link_analyzer import LinkAnalyzer
+from api.intelligence.link_cache import LinkCache
+from api.intelligence.matcher import KEYWORD_AUTOMATON
+from api.intelligence.session_store import SessionStore
+
+
+SCAMMER = [
+    "Dear customer your SBI account {n} will be blocked today. Verify KYC immediately at "
+    "http://sbi-kyc{n}.xyz/login or call +91 98765{n:05d}",
+    "Pay the processing fee of Rs 499 to refund{n}@okicici to receive your lottery prize money today itself sir",
+    "This is Cyber Cell officer. A police case is pending against your PAN. Share OTP within 24 hours to avoid arrest",
+    "Sir please send the amount quickly, my manager is waiting. Account number 1234{n:08d} IFSC SBIN0001234",
+]
+VICTIM = [
+    "Oh no, what happened to my account? I am very worried, please tell me what to do",
+    "Okay sir, I am trying but the app is showing some error. Can you send the details again?",
+    "Which branch are you calling from? My son handles all this banking stuff usually",
+]
+
+
+class LegacyClassifier(ScamClassifier):
+    """Keyword hits kept the old way: a set per table, created up front."""
+
+    def new_state(self):
+        return ClassifierState(hits={name: set() for name in self.KEYWORD_TABLES})
+
+    def _merge_hits(self, state, hits):
+        for name in self.KEYWORD_TABLES:
+            table = self.TABLE_PREFIX + name
+            if table in hits:
+                state.hits[name].update(hits.keywords(table))
+
+
+@dataclass
+class LegacySession:
+    """The SessionIntelligence layout before the compact representation."""
+    session_id: str
+    bank_accounts: Set[str] = field(default_factory=set)
+    upi_ids: Set[str] = field(default_factory=set)
+    phishing_links: Set[str] = field(default_factory=set)
+    phone_numbers: Set[str] = field(default_factory=set)
+    suspicious_keywords: Set[str] = field(default_factory=set)
+    emails: Set[str] = field(default_factory=set)
+    all_links: Set[str] = field(default_factory=set)
+    link_reports: List[dict] = field(default_factory=list)
+    message_count: int = 0
+    scam_detected: bool = False
+    created_at: datetime = field(default_factory=datetime.now)
+    messages: List[dict] = field(default_factory=list)
+    message_fingerprints: List[str] = field(default_factory=list)
+    _latest_analysis: Optional[ScamAnalysis] = None
+    _classifier_state: Optional[ClassifierState] = None
+    _classified_messages: int = 0
+    agent_state: str = "INITIAL_CONTACT"
+
+    def add(self, classifier: ScamClassifier, intel: dict, message: dict) -> None:
+        """Old merge + add_message + update_analysis."""
+        self.bank_accounts.update(intel["bankAccounts"])
+        self.upi_ids.update(intel["upiIds"])
+        self.phishing_links.update(intel["phishingLinks"])
+        self.phone_numbers.update(intel["phoneNumbers"])
+        self.suspicious_keywords.update(intel["suspiciousKeywords"])
+        self.emails.update(intel["emails"])
+        self.all_links.update(intel["allLinks"])
+        existing = {r["url"] for r in self.link_reports}
+        self.link_reports.extend(r for r in intel["linkReports"] if r["url"] not in existing)
+        self.message_count += 1
+        self.messages.append(message)
+        raw = f"{message['sender']}\x1f{message['text']}\x1f{message['timestamp']}".encode()
+        self.message_fingerprints.append(hashlib.blake2b(raw, digest_size=16).hexdigest())
+
+        if self._classifier_state is None:
+            self._classifier_state = classifier.new_state()
+        for msg in self.messages[self._classified_messages:]:
+            classifier.update_state(self._classifier_state, msg["text"])
+        self._classified_messages = len(self.messages)
+        self._latest_analysis = classifier.classify_state(self._classifier_state, intel)
+
+
+def conversation(extractor: IntelligenceExtractor, session_no: int, turns: int) -> List[tuple]:
+    """(message, serialized intel) per turn; intel is re-parsed per use so strings are fresh."""
+    turns_out = []
+    for t in range(turns):
+        n = session_no * 100 + t
+        text = SCAMMER[t % len(SCAMMER)].format(n=n) if t % 2 == 0 else VICTIM[t % len(VICTIM)]
+        message = {"sender": "scammer" if t % 2 == 0 else "user", "text": text,
+                   "timestamp": f"2026-10-16T10:{t:02d}:00Z"}
+        turns_out.append((json.dumps(message), json.dumps(extractor.extract(text))))
+    return turns_out
+
+
+def measure(build, conversations) -> float:
+    """Bytes kept alive per session by build(session_id, turns)."""
+    KEYWORD_AUTOMATON.clear_cache()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [build(f"s{i}", turns) for i, turns in enumerate(conversations)]
+    KEYWORD_AUTOMATON.clear_cache()
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    used = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del kept
+    return used / len(conversations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args()
+
+    extractor = IntelligenceExtractor(link_mode="inline")
+    extractor.link_analyzer = LinkAnalyzer(enable_whois=False, enable_web_search=False,
+                                           cache=LinkCache(max_entries=0))
+    conversations = [conversation(extractor, i + 1, args.turns) for i in range(args.sessions)]
+    classifier = LegacyClassifier()
+
+    def build_legacy(session_id, turns):
+        session = LegacySession(session_id=session_id)
+        for message, intel in turns:
+            session.add(classifier, json.loads(intel), json.loads(message))
+        return session
+
+    store = SessionStore()
+
+    def build_compact(session_id, turns):
+        for message, intel in turns:
+            store.add_intelligence(session_id, json.loads(intel), message=json.loads(message))
+        return None  # Kept alive by the store
+
+    legacy = measure(build_legacy, conversations)
+    compact = measure(build_compact, conversations)
+
+    print(f"{args.sessions} sessions x {args.turns} turns")
+    print(f"  old layout: {legacy / 1024:8.1f} KiB/session")
+    print(f"  compact:    {compact / 1024:8.1f} KiB/session")
+    print(f"  reduction:  {legacy / compact:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark: cold start of the API (import time and time to first served request).
+
+Each run is a fresh interpreter, like a new autoscaled pod: it imports
+api.main, starts the app (lifespan included), waits for /ready and sends
+one /honeypot request carrying a link. LLM_BACKEND=stub and disabled WHOIS / web lookups
+keep the network out of the numbers. Reported per run:
+
+  import:  `import api.main`
+  startup: app lifespan start-up
+  warmup:  until /ready answers 200 (see api/warmup.py)
+  first:   the first request, end to end
+  total:   interpreter start to first response
+
+Usage:
+    python scripts/bench_startup.py [--runs 5] [--top 10]
+
+--top also lists the slowest imports of one run (python -X importtime).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, time
+started = time.perf_counter()
+import api.main as app_module
+imported = time.perf_counter()
+
+from fastapi.testclient import TestClient
+analyzer = app_module.extractor.link_analyzer
+if analyzer:
+    analyzer.enable_whois = False
+    analyzer.enable_web_search = False
+
+payload = {"sessionId": "cold-start", "conversationHistory": [], "message": {
+    "sender": "scammer", "timestamp": "2026-10-16T10:00:00Z",
+    "text": "Your SBI account is blocked. Verify at http://sbi-kyc-update.xyz/login now"}}
+with TestClient(app_module.app) as client:
+    up = time.perf_counter()
+    # Like a load balancer: wait for /ready before routing the first request
+    while client.get("/ready").status_code == 503 and app_module.warmup.state in ("pending", "running"):
+        time.sleep(0.005)
+    ready = time.perf_counter()
+    response = client.post("/honeypot", json=payload, headers={"x-api-key": app_module.API_KEY})
+    response.raise_for_status()
+    served = time.perf_counter()
+
+print("BENCH " + json.dumps({"import": imported - started, "startup": up - imported,
+                             "warmup": ready - up, "first": served - ready, "total": served - started}))
+"""
+
+
+def child_env() -> dict:
+    env = dict(os.environ)
+    env.update({
+        "LLM_BACKEND": "stub",
+        "LLM_STUB_LATENCY": "0",
+        "CALLBACK_OUTBOX_PATH": os.path.join(tempfile.mkdtemp(), "outbox.db"),
+        "PYTHONPATH": ROOT,
+        "PYTHONDONTWRITEBYTECODE": "",
+    })
+    return env
+
+
+def run_once() -> dict:
+    result = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, env=child_env(),
+                            capture_output=True, text=True, check=True)
+    line = next(l for l in result.stdout.splitlines() if l.startswith("BENCH "))
+    return json.loads(line[len("BENCH "):])
+
+
+def slowest_imports(top: int) -> list:
+    """(cumulative seconds, module) of the slowest top-level imports under api.main."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import api.main"],
+                            cwd=ROOT, env=child_env(), capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit() and name.startswith("   ") and not name.startswith("    "):
+            rows.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=0, help="Also list the N slowest imports")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    print(f"Cold start over {args.runs} fresh interpreters (median / max):")
+    for key in ("import", "startup", "warmup", "first", "total"):
+        values = [run[key] for run in runs]
+        print(f"  {key:<8} {statistics.median(values) * 1000:7.0f} ms  / {max(values) * 1000:7.0f} ms")
+
+    if args.top:
+        print("\nSlowest imports under api.main:")
+        for seconds, name in slowest_imports(args.top):
+            print(f"  {seconds * 1000:7.0f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
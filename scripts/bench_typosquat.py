@@ -0,0 +1,123 @@
+"""
+Benchmark: indexed typosquatting detector vs. the SequenceMatcher loop.
+
+The old check compared every domain label against every known brand with
+difflib.SequenceMatcher. This script times that loop against
+TyposquatIndex for the built-in brand list and for a large synthetic one,
+and reports how often both agree on "flagged / not flagged". Look-alikes
+carry 1 to 4 random edits, so some lie beyond the index's edit distance
+and exercise its fallback scan.
+
+Usage:
+    python scripts/bench_typosquat.py [--brands 5000] [--domains 2000]
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+from difflib import SequenceMatcher
+
+# Add repo root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.intelligence.link_analyzer import LinkAnalyzer
+from api.intelligence.typosquat import TyposquatIndex
+
+
+def loop_check(domain, brands):
+    """The original LinkAnalyzer._check_typosquatting similarity loop."""
+    for part in domain.lower().replace('-', '.').split('.'):
+        if len(part) < 3:
+            continue
+        for brand in brands:
+            if part == brand:
+                continue
+            ratio = SequenceMatcher(None, part, brand).ratio()
+            if 0.7 < ratio < 1.0:
+                return brand
+    return None
+
+
+def mutate(word, rng):
+    """One random typo: replace, drop, insert or swap a letter, or add an affix."""
+    i = rng.randrange(len(word))
+    op = rng.choice(("replace", "drop", "insert", "swap", "affix"))
+    letter = rng.choice(string.ascii_lowercase)
+    if op == "replace":
+        return word[:i] + letter + word[i + 1:]
+    if op == "drop" and len(word) > 3:
+        return word[:i] + word[i + 1:]
+    if op == "swap" and i < len(word) - 1:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    if op == "affix":
+        return word + rng.choice(("kyc", "pay", "app", "help", "x"))
+    return word[:i] + letter + word[i:]
+
+
+def make_domains(brands, count, rng):
+    """Half look-alikes of real brands (1-4 edits), half random names."""
+    brands = sorted(brands)
+    domains = []
+    for n in range(count):
+        if n % 2:
+            name = rng.choice(brands)
+            for _ in range(rng.randint(1, 4)):
+                name = mutate(name, rng)
+        else:
+            name = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 12)))
+        domains.append(f"{name}.{rng.choice(('com', 'in', 'xyz', 'top'))}")
+    return domains
+
+
+def synthetic_brands(count, rng):
+    """Pronounceable fake brand names, 4-10 letters."""
+    consonants, vowels = "bcdfghjklmnprstvz", "aeiou"
+    names = set()
+    while len(names) < count:
+        length = rng.randint(4, 10)
+        names.add(''.join(rng.choice(vowels if i % 2 else consonants) for i in range(length)))
+    return names
+
+
+def run(label, brands, domains):
+    index = TyposquatIndex(brands)
+
+    started = time.perf_counter()
+    old = [loop_check(d, brands) for d in domains]
+    loop_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    new = [index.check_domain(d) for d in domains]
+    index_time = time.perf_counter() - started
+
+    both = sum(1 for o, n in zip(old, new) if o and n)
+    only_old = sum(1 for o, n in zip(old, new) if o and not n)
+    only_new = sum(1 for o, n in zip(old, new) if n and not o)
+
+    print(f"\n{label}: {len(brands)} brands, {len(domains)} domains")
+    print(f"  SequenceMatcher loop: {loop_time / len(domains) * 1e6:9.1f} us/domain")
+    print(f"  TyposquatIndex:       {index_time / len(domains) * 1e6:9.1f} us/domain "
+          f"({loop_time / index_time:.1f}x)")
+    print(f"  flagged by both: {both}, loop only: {only_old}, index only: {only_new}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--brands", type=int, default=5000, help="Synthetic brand list size")
+    parser.add_argument("--domains", type=int, default=2000, help="Domains per run")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    known = set(LinkAnalyzer.KNOWN_BRANDS)
+    run("Built-in brands", known, make_domains(known, args.domains, rng))
+
+    many = synthetic_brands(args.brands, rng) | known
+    # The loop is slow on large lists; fewer domains keep the run short
+    run("Synthetic brands", many, make_domains(many, max(1, args.domains // 10), rng))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Bulk analysis: run IntelligenceExtractor + ScamClassifier over a message corpus.
+
+Reads CSV or JSONL as a stream (the file is never loaded whole), shards
+rows across a process pool in chunks (one IPC round-trip per chunk, not
+per message), and writes one result per input row as JSONL or Parquet
+while the input is still being read. Output order matches input order.
+
+Link analysis is offline by default (URL structure, typosquatting, TLD and
+institution rules; no WHOIS / web lookups). --links full runs the same
+checks as the API; set LINK_CACHE_PATH to share lookups between workers.
+
+Usage:
+    python scripts/bulk_analyze.py messages.csv -o results.jsonl
+    python scripts/bulk_analyze.py dump.jsonl -o results.parquet --text-column body \\
+        --id-column msg_id --workers 8 --chunk-size 1000 --links full
+
+Parquet output needs pyarrow.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
+
+# Add repo root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# (row number, id, text)
+Row = Tuple[int, Optional[str], str]
+
+ENTITY_KEYS = ("bankAccounts", "upiIds", "phishingLinks", "phoneNumbers", "emails",
+               "allLinks", "suspiciousKeywords")
+
+
+# === INPUT ===
+
+def read_rows(path: str, fmt: str, text_column: str, id_column: Optional[str]) -> Iterator[Row]:
+    """Stream (row, id, text) from a CSV or JSONL file ("-" = stdin)."""
+    handle = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        if fmt == "csv":
+            records = csv.DictReader(handle)
+            if records.fieldnames is None or text_column not in records.fieldnames:
+                raise SystemExit(f"Column '{text_column}' not found in {path} "
+                                 f"(columns: {', '.join(records.fieldnames or [])})")
+        else:
+            records = (json.loads(line) for line in handle if line.strip())
+
+        for row_no, record in enumerate(records):
+            row_id = record.get(id_column) if id_column else None
+            yield row_no, None if row_id is None else str(row_id), record.get(text_column) or ""
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def chunked(rows: Iterator[Row], size: int) -> Iterator[List[Row]]:
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# === WORKERS ===
+
+_extractor = None
+_classifier = None
+
+
+def init_worker(links: str) -> None:
+    """Build the extractor and classifier once per worker process."""
+    global _extractor, _classifier
+    from api.intelligence import IntelligenceExtractor, ScamClassifier
+
+    _extractor = IntelligenceExtractor(link_mode="inline")
+    if links == "offline":
+        _extractor.link_analyzer.enable_whois = False
+        _extractor.link_analyzer.enable_web_search = False
+    _classifier = ScamClassifier()
+
+
+def analyze_chunk(rows: List[Row]) -> List[dict]:
+    """Extract and classify one chunk of rows."""
+    from api.intelligence.session_store import SCAM_CONFIDENCE_THRESHOLD
+
+    results = []
+    for row_no, row_id, text in rows:
+        intel = _extractor.extract(text)
+        analysis = _classifier.classify(text, intel).to_dict()
+        result = {"row": row_no, "id": row_id}
+        result.update((key, intel[key]) for key in ENTITY_KEYS)
+        result["linkReports"] = [{"url": r["url"], "risk": r["risk"]} for r in intel["linkReports"]]
+        result["scamDetected"] = analysis["confidence"] >= SCAM_CONFIDENCE_THRESHOLD
+        result.update(analysis)
+        results.append(result)
+    return results
+
+
+def analyze(chunks: Iterator[List[Row]], workers: int, links: str) -> Iterator[List[dict]]:
+    """
+    Results per chunk, in input order.
+
+    At most 2 chunks per worker are in flight, so memory stays flat however
+    large the input is.
+    """
+    if workers <= 1:
+        init_worker(links)
+        for chunk in chunks:
+            yield analyze_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(links,)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(analyze_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# === OUTPUT ===
+
+class JsonlWriter:
+    def __init__(self, path: str):
+        self.handle = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+
+    def write(self, results: List[dict]) -> None:
+        self.handle.writelines(json.dumps(result, ensure_ascii=False) + "\n" for result in results)
+
+    def close(self) -> None:
+        if self.handle is not sys.stdout:
+            self.handle.close()
+
+
+class ParquetWriter:
+    """One row group per chunk, with a fixed schema (empty lists would not infer one)."""
+
+    def __init__(self, path: str):
+        strings = pa.list_(pa.string())
+        self.schema = pa.schema(
+            [("row", pa.int64()), ("id", pa.string())]
+            + [(key, strings) for key in ENTITY_KEYS]
+            + [
+                ("linkReports", pa.list_(pa.struct([("url", pa.string()), ("risk", pa.string())]))),
+                ("scamDetected", pa.bool_()),
+                ("scamType", pa.string()),
+                ("confidence", pa.int32()),
+                ("urgency", pa.string()),
+                ("impersonating", pa.string()),
+                ("threats", strings),
+                ("asksFor", strings),
+                ("intent", pa.string()),
+            ]
+        )
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, results: List[dict]) -> None:
+        self.writer.write_table(pa.Table.from_pylist(results, schema=self.schema))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+# === MAIN ===
+
+def guess_format(path: str, choices: Tuple[str, ...], default: str) -> str:
+    ext = os.path.splitext(path)[1].lstrip(".").lower()
+    return ext if ext in choices else default
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="CSV or JSONL file, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="Output .jsonl or .parquet file (default: stdout)")
+    parser.add_argument("--input-format", choices=("csv", "jsonl"), help="Default: from the file extension")
+    parser.add_argument("--output-format", choices=("jsonl", "parquet"), help="Default: from the file extension")
+    parser.add_argument("--text-column", default="text", help="Column / key holding the message (default: text)")
+    parser.add_argument("--id-column", help="Column / key copied to the output as `id`")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes (1 = no pool)")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Rows per task sent to a worker")
+    parser.add_argument("--links", choices=("offline", "full"), default="offline",
+                        help="offline: no WHOIS / web lookups (default); full: same checks as the API")
+    args = parser.parse_args()
+
+    in_format = args.input_format or guess_format(args.input, ("csv", "jsonl"), "jsonl")
+    out_format = args.output_format or guess_format(args.output, ("jsonl", "parquet"), "jsonl")
+    if out_format == "parquet":
+        if not PYARROW_AVAILABLE:
+            raise SystemExit("Parquet output needs pyarrow (pip install pyarrow)")
+        if args.output == "-":
+            raise SystemExit("Parquet output needs a file path")
+
+    rows = read_rows(args.input, in_format, args.text_column, args.id_column)
+    writer = ParquetWriter(args.output) if out_format == "parquet" else JsonlWriter(args.output)
+
+    total = scams = 0
+    started = last_report = time.perf_counter()
+    try:
+        for results in analyze(chunked(rows, args.chunk_size), args.workers, args.links):
+            writer.write(results)
+            total += len(results)
+            scams += sum(result["scamDetected"] for result in results)
+            now = time.perf_counter()
+            if now - last_report >= 2:
+                print(f"  {total} rows, {total / (now - started):.0f} rows/s", file=sys.stderr)
+                last_report = now
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"{total} rows in {elapsed:.2f}s ({total / max(elapsed, 1e-9):.0f} rows/s), "
+          f"{scams} scams detected, {args.workers} worker(s), links {args.links}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
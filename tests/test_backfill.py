@@ -0,0 +1,65 @@
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from api.models import Message
+from api.intelligence import IntelligenceExtractor, SessionStore
+
+
+class CountingExtractor(IntelligenceExtractor):
+    """Extractor without link analysis that records which texts it processed."""
+
+    def __init__(self):
+        super().__init__(enable_link_analysis=False)
+        self.seen = []
+
+    def extract(self, text):
+        self.seen.append(text)
+        return super().extract(text)
+
+
+def _history(n):
+    return [
+        Message(sender="scammer" if i % 2 == 0 else "user", text=f"message {i} send otp", timestamp=i)
+        for i in range(n)
+    ]
+
+
+def test_backfill_processes_only_unseen_suffix():
+    store = SessionStore()
+    extractor = CountingExtractor()
+
+    store.backfill_history("s1", _history(4), extractor)
+    assert len(extractor.seen) == 4
+
+    extractor.seen.clear()
+    session = store.backfill_history("s1", _history(6), extractor)
+    assert extractor.seen == ["message 4 send otp", "message 5 send otp"]
+    assert session.message_count == 6
+
+
+def test_backfill_skips_sessions_already_up_to_date():
+    store = SessionStore()
+    extractor = CountingExtractor()
+    store.backfill_history("s1", _history(4), extractor)
+    store.get_session("s1").agent_state = "EXTRACTION_BANK"
+
+    extractor.seen.clear()
+    session = store.backfill_history("s1", _history(4), extractor)
+    assert extractor.seen == []
+    assert session.agent_state == "EXTRACTION_BANK"
+
+
+def test_backfill_rebuilds_when_history_diverges():
+    store = SessionStore()
+    extractor = CountingExtractor()
+    store.backfill_history("s1", _history(4), extractor)
+
+    edited = _history(5)
+    edited[1] = Message(sender="user", text="something else", timestamp=1)
+    extractor.seen.clear()
+    session = store.backfill_history("s1", edited, extractor)
+    assert len(extractor.seen) == 5
+    assert session.message_count == 5
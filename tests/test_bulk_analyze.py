@@ -0,0 +1,50 @@
+import sys
+import os
+import json
+
+# Add current directory (and scripts/) to path
+sys.path.append(os.getcwd())
+sys.path.append(os.path.join(os.getcwd(), "scripts"))
+
+import bulk_analyze
+
+MESSAGES = [
+    ("m1", "Hi, are we still meeting for lunch tomorrow?"),
+    ("m2", "URGENT: your SBI account is blocked. Share the OTP and pay to kyc.verify@okicici now or face arrest"),
+    ("m3", "Happy birthday! See you at the party"),
+    ("m4", "Dear customer, verify your KYC at http://sbi-kyc-update.xyz/login immediately or your account will be suspended"),
+    ("m5", "ok thanks"),
+]
+SCAMS = {"m2", "m4"}
+
+
+def run(path, fmt, workers):
+    rows = bulk_analyze.read_rows(path, fmt, "text", "msg_id")
+    chunks = bulk_analyze.analyze(bulk_analyze.chunked(rows, 2), workers, "offline")
+    return [result for chunk in chunks for result in chunk]
+
+
+def check(results):
+    assert [r["row"] for r in results] == list(range(len(MESSAGES)))
+    assert [r["id"] for r in results] == [msg_id for msg_id, _ in MESSAGES]
+    assert {r["id"] for r in results if r["scamDetected"]} == SCAMS
+    assert results[3]["allLinks"] and results[1]["upiIds"] == ["kyc.verify@okicici"]
+
+
+def test_csv_and_jsonl_in_process_and_in_pool(tmp_path):
+    csv_path = tmp_path / "messages.csv"
+    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        f.write("msg_id,text\n")
+        f.writelines(f'{msg_id},"{text}"\n' for msg_id, text in MESSAGES)
+    jsonl_path = tmp_path / "messages.jsonl"
+    with open(jsonl_path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps({"msg_id": msg_id, "text": text}) + "\n" for msg_id, text in MESSAGES)
+
+    single = run(str(csv_path), "csv", workers=1)
+    check(single)
+    check(run(str(jsonl_path), "jsonl", workers=1))
+
+    pooled = run(str(csv_path), "csv", workers=2)
+    check(pooled)
+    check(run(str(jsonl_path), "jsonl", workers=2))
+    assert [r["scamType"] for r in pooled] == [r["scamType"] for r in single]
@@ -0,0 +1,47 @@
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from api.intelligence import ScamClassifier, ScamType, UrgencyLevel
+
+
+CONVERSATION = [
+    "Dear customer your SBI account will be blocked today",
+    "I am calling from the cyber cell. You must work from",
+    "home and share the OTP immediately or face legal action",
+    "send money to the upi id now",
+]
+
+INTEL = {"upiIds": ["scam@okicici"], "phishingLinks": [], "suspiciousKeywords": ["otp", "blocked"]}
+
+
+def test_incremental_state_matches_full_text_classification():
+    classifier = ScamClassifier()
+    state = classifier.new_state()
+
+    for i, message in enumerate(CONVERSATION, start=1):
+        classifier.update_state(state, message)
+        full_text = " ".join(CONVERSATION[:i])
+        expected = classifier.classify(full_text, INTEL)
+        assert classifier.classify_state(state, INTEL) == expected
+
+
+def test_phrase_split_across_messages_is_detected():
+    classifier = ScamClassifier()
+    state = classifier.new_state()
+    classifier.update_state(state, "this is a work from")
+    classifier.update_state(state, "home offer")
+
+    assert "work from home" in state.hits[ScamType.JOB_SCAM.value]
+
+
+def test_classify_detects_tactics():
+    analysis = ScamClassifier().classify(" ".join(CONVERSATION), INTEL)
+
+    assert analysis.impersonating == "SBI (State Bank of India)"
+    assert analysis.urgency == UrgencyLevel.HIGH
+    assert "legal action" in analysis.threats
+    assert "OTP" in analysis.asks_for
+    assert analysis.confidence == 70  # UPI 25 + keywords 10 + threats 15 + impersonation 10 + urgency 10
@@ -0,0 +1,61 @@
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from api.agent.context import ContextBuilder, estimate_tokens
+from api.intelligence import SessionStore
+
+
+def add_turns(store, session_id, start, count):
+    for i in range(start, start + count):
+        if i % 2 == 0:
+            text = f"Sir your SBI account is blocked, pay the fee to refund{i % 4}@okicici and share OTP now ({i})"
+            intel = {"upiIds": [f"refund{i % 4}@okicici"], "suspiciousKeywords": ["blocked", "otp"]}
+        else:
+            text = f"oh no, what should i do? my son is not at home ({i})"
+            intel = {}
+        store.add_intelligence(session_id, intel, message={"sender": "scammer" if i % 2 == 0 else "user",
+                                                           "text": text, "timestamp": str(i)})
+    return store.get_session(session_id)
+
+
+def test_context_stays_within_budget_as_conversation_grows():
+    store, builder = SessionStore(), ContextBuilder(window=6, token_budget=250)
+    short = builder.build(add_turns(store, "s1", 0, 10))
+    long = builder.build(add_turns(store, "s1", 10, 190))
+
+    assert estimate_tokens(long) <= 250
+    assert abs(len(long) - len(short)) < 200
+    assert "(194 earlier not shown)" in long
+    assert "(199)" in long and "(150)" not in long  # Latest messages only
+    assert "They gave a UPI ID: refund0@okicici" in long  # From the summary
+
+
+def test_context_rebuilds_after_session_reset():
+    store, builder = SessionStore(), ContextBuilder(window=4)
+    builder.build(add_turns(store, "s1", 0, 6))
+
+    store.clear_session("s1")
+    context = builder.build(add_turns(store, "s1", 100, 2))
+    assert "(5)" not in context and "(101)" in context
+    assert "Latest messages:" in context
+
+
+def test_summary_overflow_keeps_newest_facts_in_order():
+    store, builder = SessionStore(), ContextBuilder(window=2, token_budget=200)
+    for i in range(40):
+        store.add_intelligence("s1", {"upiIds": [f"mule{i:02d}@okaxis"]},
+                               message={"sender": "scammer", "text": f"pay to mule{i:02d}@okaxis",
+                                        "timestamp": str(i)})
+    context = builder.build(store.get_session("s1"))
+    summary = context.split("Latest messages")[0]
+
+    assert estimate_tokens(summary) <= 100
+    assert "They gave a UPI ID: mule39@okaxis" in summary  # Newest fact kept
+    assert "mule00@okaxis" not in summary
+    kept = summary.splitlines()[2:]
+    assert kept == sorted(kept)  # Chronological
+    omitted = len(builder._states["s1"].facts) - len(kept)
+    assert summary.splitlines()[1] == f"- ({omitted} earlier facts omitted)"
@@ -0,0 +1,122 @@
+import sys
+import os
+import asyncio
+import json
+import tempfile
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+# Offline backend and a throwaway outbox, before api.main reads them
+os.environ.setdefault("LLM_BACKEND", "stub")
+os.environ.setdefault("LLM_STUB_LATENCY", "0")
+os.environ.setdefault("CALLBACK_OUTBOX_PATH", os.path.join(tempfile.mkdtemp(), "outbox.db"))
+
+import httpx
+
+from api import main
+
+if main.extractor.link_analyzer:
+    main.extractor.link_analyzer.enable_whois = False
+    main.extractor.link_analyzer.enable_web_search = False
+
+HEADERS = {"x-api-key": main.API_KEY}
+
+
+def item(session_id, text, timestamp="1"):
+    return {"sessionId": session_id, "message": {"sender": "scammer", "text": text, "timestamp": timestamp}}
+
+
+def post(path, json):
+    async def send():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, json=json, headers=HEADERS)
+    return asyncio.run(send())
+
+
+def test_batch_keeps_input_order_and_isolates_failures(monkeypatch):
+    for session_id in ("batch-a", "batch-b", "batch-broken"):
+        main.session_store.clear_session(session_id)
+    blast = "Your SBI account is blocked, pay at http://sbi-kyc.xyz/login"
+    body = [
+        item("batch-a", "hello sir", "1"),
+        item("batch-b", blast, "1"),
+        item("batch-broken", "hello", "1"),
+        item("batch-a", blast, "2"),
+    ]
+
+    add_intelligence = main.session_store.add_intelligence
+    def failing_add(session_id, intel, message=None):
+        if session_id == "batch-broken":
+            raise RuntimeError("store down")
+        return add_intelligence(session_id, intel, message=message)
+    monkeypatch.setattr(main.session_store, "add_intelligence", failing_add)
+
+    response = post("/honeypot/batch", body)
+    assert response.status_code == 200
+    results = response.json()
+    assert [r["sessionId"] for r in results] == ["batch-a", "batch-b", "batch-broken", "batch-a"]
+    assert [r["status"] for r in results] == ["success", "success", "error", "success"]
+    assert all(r["reply"] for r in results if r["status"] == "success")
+
+    # Same-session items ran in input order; the duplicate text did not alias intel
+    session_a = main.session_store.get_session("batch-a")
+    assert [m["text"] for m in session_a.messages] == ["hello sir", blast]
+    assert session_a.phishing_links and main.session_store.get_session("batch-b").message_count == 1
+
+
+def test_batch_over_the_limit_is_rejected(monkeypatch):
+    monkeypatch.setattr(main, "BATCH_MAX_ITEMS", 2)
+    response = post("/honeypot/batch", [item(f"big-{i}", "hi") for i in range(3)])
+    assert response.status_code == 413
+
+
+def sse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n", 1)
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def test_stream_sends_verdict_then_tokens_then_done():
+    main.session_store.clear_session("stream-1")
+    response = post("/honeypot/stream", item("stream-1", "Your account is blocked, share the OTP"))
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = sse_events(response.text)
+    names = [name for name, _ in events]
+    assert names[0] == "verdict" and names[-1] == "done"
+    assert set(names[1:-1]) == {"token"}
+    assert events[0][1]["sessionId"] == "stream-1" and events[0][1]["messageCount"] == 1
+    tokens = "".join(data["text"] for name, data in events if name == "token")
+    assert events[-1][1]["reply"] == tokens.strip()
+
+
+def test_stream_reports_failures_as_error_event(monkeypatch):
+    async def broken_ingest(request, intel=None):
+        raise RuntimeError("store down")
+    monkeypatch.setattr(main, "ingest_turn", broken_ingest)
+
+    events = sse_events(post("/honeypot/stream", item("stream-2", "hello")).text)
+    assert events == [("error", {"status": "error", "detail": "Failed to process message"})]
+
+
+def test_stream_releases_session_lock_before_client_reads_reply():
+    main.session_store.clear_session("stream-3")
+    request = main.HoneypotRequest(**item("stream-3", "Your account is blocked, share the OTP"))
+
+    async def scenario():
+        events = main.stream_turn(request)
+        assert (await events.__anext__()).startswith("event: verdict")
+
+        # The client stalls here; the next turn of the session must not wait for it
+        async def next_turn():
+            async with main.session_store.lock_async("stream-3"):
+                return True
+        assert await asyncio.wait_for(next_turn(), timeout=2)
+        rest = [event async for event in events]
+        assert rest[-1].startswith("event: done")
+
+    asyncio.run(scenario())
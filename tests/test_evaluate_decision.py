@@ -0,0 +1,52 @@
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from decision_maker.decision_engine import DecisionMaker
+from evaluate_decision import evaluate, accuracy_by_intent, load_legacy_report
+
+
+def test_vectorized_evaluation_matches_decision_maker():
+    rng = np.random.default_rng(7)
+    intents = rng.choice(["normal", "other_scam", "impersonation", "Ham"], size=53)
+    labels = rng.choice(["ham", "spam", "scam"], size=53)
+    df = pd.DataFrame({"text": "msg", "intent": intents, "verdict": labels})
+
+    report = evaluate(df, session_size=5)
+
+    dm = DecisionMaker("scam_intent_mapping.csv")
+    for i, row in df.iterrows():
+        res = dm.run(row["text"], row["intent"], f"user_{i // 5}")
+        state = dm.sessions[f"user_{i // 5}"]
+        assert report["verdict"][i] == res["verdict"] and report["command"][i] == res["command"]
+        assert report["message_count"][i] == state["count"] and report["threshold"][i] == state["threshold"]
+
+    table = accuracy_by_intent(report)
+    assert table.loc["ALL", "rows"] == 53
+    expected = (report["verdict"] == "SCAM").to_numpy() == df["verdict"].isin(["spam", "scam"]).to_numpy()
+    assert abs(table.loc["ALL", "accuracy"] - expected.mean() * 100) < 1e-9
+
+
+def test_legacy_reports_load_into_one_schema():
+    analysis = load_legacy_report("final_scam_analysis.csv")
+    clean = load_legacy_report("final_clean_report.csv")
+    assert list(analysis.columns) == list(clean.columns)
+    assert [t.name for t in analysis.dtypes] == [t.name for t in clean.dtypes]
+    assert analysis["risk"].notna().all() and analysis["correct"].notna().all()
+    assert clean["correct"].isna().all() and analysis["threshold"].max() > 5
+
+
+def test_report_falls_back_to_csv_without_pyarrow(tmp_path, monkeypatch):
+    import evaluate_decision
+    monkeypatch.setattr(evaluate_decision, "PYARROW_AVAILABLE", False)
+    path = evaluate_decision.report_path(str(tmp_path / "report.arrow"))
+    assert path.endswith("report.csv")
+
+    report = load_legacy_report("final_clean_report.csv")
+    evaluate_decision.write_report(report, path)
+    assert list(pd.read_csv(path).columns) == list(report.columns)
@@ -0,0 +1,106 @@
+import sys
+import os
+import asyncio
+import time
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from api.intelligence.extractor import IntelligenceExtractor
+from api.intelligence.link_analyzer import LinkAnalyzer, LinkRiskReport, RiskLevel
+
+
+class SlowAnalyzer(LinkAnalyzer):
+    """Pretends every URL needs a network lookup of `delays[url]` seconds."""
+
+    def __init__(self, delays):
+        super().__init__(enable_whois=False, enable_web_search=False)
+        self.delays = delays
+
+    def analyze(self, url, message_context=""):
+        time.sleep(self.delays[url])
+        return LinkRiskReport(url=url, risk=RiskLevel.HIGH_RISK, reasons=["deep"], domain="")
+
+    async def analyze_async(self, url, message_context=""):
+        await asyncio.sleep(self.delays[url])
+        return LinkRiskReport(url=url, risk=RiskLevel.HIGH_RISK, reasons=["deep"], domain="")
+
+
+TEXT = "Pay at http://a.com/x or http://b.com/y or http://c.com/z"
+DELAYS = {"http://a.com/x": 0.2, "http://b.com/y": 0.1, "http://c.com/z": 0.2}
+
+
+def make_extractor(deadline):
+    extractor = IntelligenceExtractor(link_deadline=deadline)
+    extractor.link_analyzer = SlowAnalyzer(DELAYS)
+    return extractor
+
+
+def test_links_are_analyzed_concurrently_in_input_order():
+    extractor = make_extractor(deadline=5)
+    started = time.perf_counter()
+    intel = extractor.extract(TEXT)
+    elapsed = time.perf_counter() - started
+
+    assert [r["url"] for r in intel["linkReports"]] == list(DELAYS)
+    assert all(r["reasons"] == ["deep"] for r in intel["linkReports"])
+    assert elapsed < 0.35  # close to the slowest URL, not the 0.5s sum
+
+
+def test_deadline_falls_back_to_offline_verdict():
+    extractor = make_extractor(deadline=0.15)
+    intel = asyncio.run(extractor.extract_async(TEXT))
+
+    reasons = {r["url"]: r["reasons"] for r in intel["linkReports"]}
+    assert list(reasons) == list(DELAYS)
+    assert reasons["http://b.com/y"] == ["deep"]
+    assert reasons["http://a.com/x"] != ["deep"]  # offline checks only
+
+
+def test_batch_extraction_is_concurrent_and_in_input_order():
+    extractor = make_extractor(deadline=5)
+    texts = [TEXT, "Call 9876543210 now", TEXT, "Pay at http://b.com/y"]
+    started = time.perf_counter()
+    intel_list = asyncio.run(extractor.extract_many_async(texts))
+    elapsed = time.perf_counter() - started
+
+    assert len(intel_list) == 4 and intel_list[0] == intel_list[2]  # blast copies extracted once
+    assert intel_list[0] is not intel_list[2] and intel_list[0]["allLinks"] is not intel_list[2]["allLinks"]
+    assert intel_list[1]["phoneNumbers"] and not intel_list[1]["allLinks"]
+    assert [r["url"] for r in intel_list[3]["linkReports"]] == ["http://b.com/y"]
+    assert elapsed < 0.35
+
+
+def test_deferred_mode_upgrades_session_after_deep_checks():
+    from api.intelligence import DeepCheckScheduler, SessionStore
+    from api.intelligence.link_cache import LinkCache
+
+    url = "http://prize-claim.in/x"
+    text = f"Claim your prize at {url}"
+
+    analyzer = LinkAnalyzer(enable_whois=False, enable_web_search=False, cache=LinkCache())
+    analyzer.enable_whois = True  # pretend WHOIS is available
+    analyzer._check_domain_age = lambda domain: (3, "2026-10-13", RiskLevel.HIGH_RISK, "Domain created only 3 days ago")
+    extractor = IntelligenceExtractor(link_mode="deferred")
+    extractor.link_analyzer = analyzer
+    store = SessionStore()
+    store.deep_checks = DeepCheckScheduler(analyzer, store)
+
+    async def scenario():
+        intel = await extractor.extract_async(text)
+        assert intel["pendingLinks"] == [url]
+        assert intel["phishingLinks"] == []  # offline verdict is clean
+
+        session = store.add_intelligence("s1", intel, message={"sender": "scammer", "text": text, "timestamp": "t1"})
+        before = session.confidence
+        assert await store.deep_checks.drain() == 0
+
+        assert session.link_reports[0]["risk"] == "HIGH_RISK"
+        assert url in session.phishing_links
+        assert session.confidence > before
+
+        # Next time the full verdict comes straight from the cache
+        again = await extractor.extract_async(text)
+        assert again["pendingLinks"] == [] and again["phishingLinks"] == [url]
+
+    asyncio.run(scenario())
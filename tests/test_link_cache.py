@@ -0,0 +1,58 @@
+import sys
+import os
+import time
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from api.intelligence.link_cache import LinkCache, canonicalize_url
+from api.intelligence.link_analyzer import LinkAnalyzer, RiskLevel
+
+
+def test_canonicalize_url():
+    assert canonicalize_url("HTTPS://WWW.Example.com:443/#top") == "https://example.com"
+    assert canonicalize_url("http://example.com:8080/a?b=1") == "http://example.com:8080/a?b=1"
+
+
+def test_lru_eviction_and_negative_ttl():
+    cache = LinkCache(max_entries=2, ttl=60, negative_ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1      # a is now most recent
+    cache.set("c", 3)               # evicts b
+    assert cache.get("b") is LinkCache.MISS
+
+    cache.set("dead", None, negative=True)
+    assert cache.get("dead") is None
+    time.sleep(0.06)
+    assert cache.get("dead") is LinkCache.MISS
+
+
+def test_sqlite_layer_survives_restart(tmp_path):
+    path = str(tmp_path / "links.db")
+    cache = LinkCache(path=path)
+    cache.set("whois:example.com", "2020-01-01T00:00:00+00:00")
+    cache.close()
+
+    reopened = LinkCache(path=path)
+    assert reopened.get("whois:example.com") == "2020-01-01T00:00:00+00:00"
+    reopened.close()
+
+
+def test_analyzer_reuses_cached_report():
+    analyzer = LinkAnalyzer(enable_whois=False, enable_web_search=False, cache=LinkCache())
+    analyzer.enable_whois = True  # pretend WHOIS is available
+    lookups = []
+
+    def fake_age(domain):
+        lookups.append(domain)
+        return (5, "2026-10-11", RiskLevel.HIGH_RISK, "Domain created only 5 days ago")
+
+    analyzer._check_domain_age = fake_age
+    first = analyzer.analyze("http://pay-refund.example/claim")
+    second = analyzer.analyze("HTTP://WWW.pay-refund.example/claim#x")
+
+    assert len(lookups) == 1
+    assert second.risk == first.risk == RiskLevel.HIGH_RISK
+    assert second.url == "HTTP://WWW.pay-refund.example/claim#x"
+    assert second.reasons == first.reasons and second.reasons is not first.reasons
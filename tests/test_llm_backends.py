@@ -0,0 +1,53 @@
+import sys
+import os
+import asyncio
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from api.agent.llm_backends import StubBackend, OpenAIBackend, backend_from_env
+from api.agent.manager import AgentManager
+from api.intelligence import session_store
+
+
+def test_stub_backend_is_deterministic():
+    stub = StubBackend(latency=0.0, jitter=0.5)
+    assert stub.generate("prompt a") == stub.generate("prompt a")
+    assert stub._reply("prompt a") == stub._reply("prompt a")  # Same delay too
+    assert asyncio.run(stub.generate_async("prompt a")) == stub.generate("prompt a")
+
+
+def test_backend_selected_from_env(monkeypatch):
+    monkeypatch.setenv("LLM_BACKEND", "stub")
+    monkeypatch.setenv("LLM_STUB_LATENCY", "0.01")
+    backend = backend_from_env()
+    assert isinstance(backend, StubBackend) and backend.latency == 0.01
+
+    monkeypatch.setenv("LLM_BACKEND", "openai")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.delenv("OPENAI_BASE_URL", raising=False)
+    backend = backend_from_env()
+    assert isinstance(backend, OpenAIBackend) and backend.missing == "OPENAI_API_KEY"
+
+
+def test_agent_replies_offline_with_stub():
+    agent = AgentManager(backend=StubBackend(latency=0.0))
+    session_store.clear_session("stub-1")
+    session_store.add_intelligence("stub-1", {}, message={"sender": "scammer", "text": "Your account is blocked", "timestamp": "1"})
+
+    reply = asyncio.run(agent.generate_response_async("stub-1", "Your account is blocked"))
+    assert reply in StubBackend.REPLIES
+    assert agent.reply_stats["llm"] == 1 and agent.reply_stats["fallback"] == 0
+
+
+def test_agent_streams_stub_reply_in_chunks():
+    agent = AgentManager(backend=StubBackend(latency=0.0))
+    session_store.clear_session("stub-2")
+    session_store.add_intelligence("stub-2", {}, message={"sender": "scammer", "text": "Your account is blocked", "timestamp": "1"})
+
+    async def collect():
+        return [chunk async for chunk in agent.stream_response_async("stub-2", "Your account is blocked")]
+
+    chunks = asyncio.run(collect())
+    assert len(chunks) > 1 and "".join(chunks) in StubBackend.REPLIES
+    assert agent.llm.stats["timeouts"] == 0
@@ -0,0 +1,78 @@
+import sys
+import os
+import asyncio
+import time
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from api.agent.llm_client import LLMClient, TokenBucket
+
+
+def make_client(delays, **kwargs):
+    """Client whose n-th async call sleeps delays[n] seconds, then answers f"reply {n}"."""
+    calls = []
+
+    async def generate_async(prompt):
+        n = len(calls)
+        calls.append(prompt)
+        await asyncio.sleep(delays[min(n, len(delays) - 1)])
+        return f"reply {n}"
+
+    def generate_sync(prompt):
+        time.sleep(delays[0])
+        return "sync reply"
+
+    return LLMClient(generate_sync, generate_async, **kwargs), calls
+
+
+def test_slow_call_returns_none_at_deadline():
+    client, _ = make_client([1.0], deadline=0.05)
+    started = time.monotonic()
+    assert asyncio.run(client.generate_async("hi")) is None
+    assert time.monotonic() - started < 0.5
+    assert client.stats["timeouts"] == 1
+
+    assert client.generate("hi") is None  # Sync path too
+    client.close()
+
+
+def test_hedge_request_wins_over_slow_call():
+    client, calls = make_client([0.5, 0.01], deadline=2.0, hedge_percentile=95)
+    for _ in range(client.latency.min_samples):
+        client.latency.record(0.02)
+
+    assert asyncio.run(client.generate_async("hi")) == "reply 1"
+    assert len(calls) == 2 and client.stats["hedged"] == 1
+
+
+def test_concurrency_limit_and_token_bucket():
+    client, _ = make_client([0.05], deadline=5.0, max_concurrent=2)
+
+    async def burst():
+        return await asyncio.gather(*(client.generate_async("hi") for _ in range(4)))
+
+    started = time.monotonic()
+    assert all(asyncio.run(burst()))
+    assert time.monotonic() - started >= 0.1  # 4 calls, 2 at a time
+
+    bucket = TokenBucket(rate=10, burst=1)
+    assert bucket.acquire_blocking(timeout=0)
+    assert not bucket.acquire_blocking(timeout=0.01)  # Next token in 0.1s
+
+
+def test_stream_stops_at_deadline_with_partial_reply():
+    async def stream_async(prompt):
+        for word in ("one", " two", " three"):
+            await asyncio.sleep(0.04)
+            yield word
+
+    client = LLMClient(lambda p: "", None, stream_async, deadline=0.1)
+
+    async def collect():
+        stream = client.stream_async("hi")
+        return stream, [chunk async for chunk in stream]
+
+    stream, chunks = asyncio.run(collect())
+    assert chunks == ["one", " two"] and stream.text == "one two"
+    assert not stream.complete and client.stats["timeouts"] == 1
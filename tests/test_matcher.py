@@ -0,0 +1,49 @@
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from api.intelligence.matcher import KeywordAutomaton
+from api.intelligence import patterns
+
+
+def test_scan_reports_overlapping_hits_per_table():
+    automaton = KeywordAutomaton()
+    automaton.add_table("asks", ["upi", "upi id", "upi pin"])
+    automaton.add_table("pay", ["pay", "upi"])
+
+    hits = automaton.scan("send upi id and pay")
+    assert hits.keywords("asks") == {"upi", "upi id"}
+    assert hits.keywords("pay") == {"upi", "pay"}
+    assert hits.spans("asks")[0] == (5, 8, "upi")
+    assert "missing" not in hits
+
+
+def test_tables_added_after_a_scan_are_picked_up():
+    automaton = KeywordAutomaton()
+    automaton.add_table("a", ["otp"])
+    assert "b" not in automaton.scan("otp now")
+
+    automaton.add_table("b", ["now"])
+    assert automaton.scan("otp now").keywords("b") == {"now"}
+
+
+def test_suspicious_keywords_match_reference_regex():
+    samples = [
+        "URGENT: your SBI account is BLOCKED, verify now!",
+        "payment pending, pay_now or call cardnumber card number",
+        "Share OTP/PIN immediately; legal action + police arrest",
+        "nowhere to hide, unlinked, repay, İncome tax refund",
+        "",
+    ]
+    for text in samples:
+        expected = {kw.lower() for kw in patterns.SUSPICIOUS_KEYWORDS_PATTERN.findall(text)}
+        assert set(patterns.extract_suspicious_keywords(text)) == expected, text
+
+
+def test_link_analyzer_flags_hyphenated_brand():
+    from api.intelligence.link_analyzer import LinkAnalyzer, RiskLevel
+    report = LinkAnalyzer(enable_whois=False, enable_web_search=False).analyze("http://sbi-kyc.com/x")
+    assert report.risk == RiskLevel.HIGH_RISK
+    assert "Hyphenated brand name: 'sbi-' in domain" in report.reasons
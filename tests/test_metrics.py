@@ -0,0 +1,73 @@
+import sys
+import os
+import asyncio
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from api.metrics import Registry, timed
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    latency = registry.histogram("stage_seconds", "Stage latency", ["stage"], buckets=(0.1, 1.0))
+    latency.observe(0.05, stage="llm")
+    latency.observe(0.5, stage="llm")
+    latency.observe(3.0, stage="llm")
+
+    text = registry.render()
+    assert "# TYPE stage_seconds histogram" in text
+    assert 'stage_seconds_bucket{stage="llm",le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{stage="llm",le="1"} 2' in text
+    assert 'stage_seconds_bucket{stage="llm",le="+Inf"} 3' in text
+    assert 'stage_seconds_sum{stage="llm"} 3.55' in text
+    assert 'stage_seconds_count{stage="llm"} 3' in text
+
+
+def test_timed_decorator_sync_and_async():
+    registry = Registry()
+    latency = registry.histogram("stage_seconds", "Stage latency", ["stage"])
+
+    @timed(latency, stage="sync")
+    def work():
+        return 1
+
+    @timed(latency, stage="async")
+    async def async_work():
+        await asyncio.sleep(0)
+        return 2
+
+    assert work() == 1
+    assert asyncio.run(async_work()) == 2
+    assert latency.count(stage="sync") == 1
+    assert latency.count(stage="async") == 1
+
+
+def test_counters_and_collect_callbacks():
+    registry = Registry()
+    terminations = registry.counter("terminations_total", "Ended sessions", ["scam_detected"])
+    terminations.inc(scam_detected="true")
+    terminations.inc(scam_detected="true")
+    # Declaring the same name again returns the existing metric
+    assert registry.counter("terminations_total", "Ended sessions", ["scam_detected"]) is terminations
+
+    stats = {"hits": 3}
+    registry.counter("cache_hits_total", "Cache hits", ["cache"], collect=lambda: {("link",): stats["hits"]})
+    registry.gauge("sessions_live", "Live sessions", collect=lambda: {(): 7})
+    stats["hits"] = 5  # read at scrape time
+
+    text = registry.render()
+    assert 'terminations_total{scam_detected="true"} 2' in text
+    assert 'cache_hits_total{cache="link"} 5' in text
+    assert "# TYPE sessions_live gauge" in text
+    assert "sessions_live 7" in text
+
+
+def test_failing_collector_only_drops_its_own_series():
+    registry = Registry()
+    registry.gauge("broken", "Raises at scrape time", collect=lambda: 1 / 0)
+    registry.gauge("sessions_live", "Live sessions", collect=lambda: {(): 3})
+
+    text = registry.render()
+    assert "# TYPE broken gauge" in text and "\nbroken " not in text
+    assert "sessions_live 3" in text
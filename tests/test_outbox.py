@@ -0,0 +1,100 @@
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from api.outbox import CallbackOutbox, OutboxDispatcher
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class FakeHttp:
+    """Stands in for requests.Session; fails the first `failures` posts."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.posted = []
+
+    def post(self, url, json=None, timeout=None):
+        if self.failures:
+            self.failures -= 1
+            return FakeResponse(503)
+        self.posted.append(json)
+        return FakeResponse(200)
+
+
+def test_enqueue_is_durable(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    outbox = CallbackOutbox(path)
+    outbox.enqueue("s1", {"sessionId": "s1", "scamDetected": True})
+    outbox.close()
+
+    reopened = CallbackOutbox(path)
+    assert reopened.pending_count() == 1
+    assert reopened.due()[0][1]["sessionId"] == "s1"
+
+
+def test_failed_delivery_is_retried_with_backoff():
+    outbox = CallbackOutbox(":memory:")
+    http = FakeHttp(failures=1)
+    dispatcher = OutboxDispatcher(outbox, "http://guvi.test", http=http, base_backoff=60)
+    outbox.enqueue("s1", {"sessionId": "s1"})
+
+    assert dispatcher.dispatch_once() == 0
+    # Backoff keeps the row out of the next scan...
+    assert outbox.due() == []
+    assert outbox.pending_count() == 1
+
+    # ...until its retry time comes around
+    assert dispatcher.dispatch_once(now=float("inf")) == 1
+    assert http.posted == [{"sessionId": "s1"}]
+    assert outbox.pending_count() == 0
+
+
+def test_payload_is_buried_after_max_attempts():
+    outbox = CallbackOutbox(":memory:")
+    dispatcher = OutboxDispatcher(outbox, "http://guvi.test", http=FakeHttp(failures=10), max_attempts=2)
+    outbox.enqueue("s1", {"sessionId": "s1"})
+
+    dispatcher.dispatch_once(now=float("inf"))
+    dispatcher.dispatch_once(now=float("inf"))
+    assert outbox.pending_count() == 0
+    assert dispatcher.dispatch_once(now=float("inf")) == 0
+
+
+def test_stop_drains_pending_payloads():
+    outbox = CallbackOutbox(":memory:")
+    http = FakeHttp()
+    dispatcher = OutboxDispatcher(outbox, "http://guvi.test", http=http, poll_interval=60)
+    for i in range(5):
+        outbox.enqueue(f"s{i}", {"sessionId": f"s{i}"})
+
+    assert dispatcher.stop(drain=True) == 0
+    assert len(http.posted) == 5
+
+
+def test_workers_sharing_an_outbox_send_each_payload_once(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    first, second = CallbackOutbox(path), CallbackOutbox(path)
+    for i in range(6):
+        first.enqueue(f"s{i}", {"sessionId": f"s{i}"})
+
+    claimed = first.claim(limit=4)
+    assert [payload["sessionId"] for _, payload, _ in claimed] == ["s0", "s1", "s2", "s3"]
+    # The other worker only gets what is left, even when draining
+    http = FakeHttp()
+    assert OutboxDispatcher(second, "http://guvi.test", http=http).stop(drain=True) == 4
+    assert http.posted == [{"sessionId": "s4"}, {"sessionId": "s5"}]
+
+    # A worker that dies mid-delivery loses its lease
+    first.enqueue("s6", {"sessionId": "s6"})
+    assert len(first.claim(lease=-1)) == 1
+    assert [payload["sessionId"] for _, payload, _ in second.claim()] == ["s6"]
@@ -0,0 +1,29 @@
+import sys, os
+sys.path.append(os.getcwd())
+
+from api.intelligence.patterns import (
+    scan_entities, group_entities,
+    extract_urls, extract_upi_ids, extract_phone_numbers,
+    extract_bank_accounts, extract_emails, extract_suspicious_keywords,
+)
+
+
+def test_scan_entities_matches_individual_extractors():
+    text = ("URGENT: your SBI account is blocked. Verify at https://sbi-kyc.xyz/login. "
+            "Pay to refund@okaxis or mail help@sbi-support.com, "
+            "call +91 98765 43210, account number 123456789012")
+    grouped = group_entities(scan_entities(text))
+    phones = extract_phone_numbers(text)
+    assert grouped["url"] == extract_urls(text)
+    assert grouped["upi"] == extract_upi_ids(text)
+    assert grouped["phone"] == phones
+    assert grouped["bank_account"] == extract_bank_accounts(text, phones)
+    assert grouped["email"] == extract_emails(text)
+    assert sorted(grouped["keyword"]) == sorted(extract_suspicious_keywords(text))
+
+
+def test_scan_entities_spans_point_into_text():
+    text = "Send OTP to 9876543210 now"
+    for span in scan_entities(text):
+        if span.kind != "phone":  # phones are normalized to +91
+            assert text[span.start:span.end].lower() == span.value
@@ -0,0 +1,77 @@
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from api.agent.manager import AgentManager
+from api.agent.reply_cache import ReplyCache, normalize_message
+from api.agent.templates import TemplateLibrary
+from api.intelligence import session_store
+
+
+def scam_turn(session_id, text):
+    session_store.clear_session(session_id)
+    session_store.add_intelligence(session_id, {}, message={"sender": "scammer", "text": text, "timestamp": "1"})
+
+
+def test_blast_copies_normalize_to_one_script():
+    a = normalize_message("Dear Ravi, pay Rs 499 to refund12@okicici or visit http://sbi-kyc.xyz/a  now")
+    b = normalize_message("dear ravi, pay Rs 1999 to helpdesk@ybl or visit https://sbi-verify.top now")
+    assert a == b
+
+
+def test_templates_are_deterministic_and_use_persona():
+    library = TemplateLibrary("Rajesh")
+    replies = {library.reply("LEAK_FAKE_INFO", "s1", turn) for turn in range(20)}
+    assert library.reply("LEAK_FAKE_INFO", "s1", 3) == library.reply("LEAK_FAKE_INFO", "s1", 3)
+    assert len(replies) > 1 and not any("{" in r for r in replies)
+    assert library.reply("NO_SUCH_STATE", "s1", 1) is None
+
+
+def test_cache_policy_calls_llm_once_per_script():
+    agent = AgentManager(reply_policy="cache", reply_cache=ReplyCache())
+    prompts = []
+    agent._call_llm = lambda prompt: prompts.append(prompt) or "oh no what happened"
+
+    for i, session_id in enumerate(("blast-1", "blast-2", "blast-3")):
+        text = f"Your SBI account {1000 + i} is blocked, call +91 98765{i}0000"
+        scam_turn(session_id, text)
+        assert agent.generate_response(session_id, text) == "oh no what happened"
+
+    assert len(prompts) == 1
+    assert agent.reply_stats == {"template": 0, "cache": 2, "llm": 1, "fallback": 0}
+
+
+def test_replies_quoting_the_scammers_ids_are_not_reused():
+    agent = AgentManager(reply_policy="cache", reply_cache=ReplyCache())
+    agent._call_llm = lambda prompt: "ok sending to " + prompt.rsplit("pay to ", 1)[1].split()[0]
+
+    first = "Your refund is ready, pay to refund.help@okicici now"
+    second = "Your refund is ready, pay to claims.desk@ybl now"
+    scam_turn("upi-1", first)
+    assert agent.generate_response("upi-1", first) == "ok sending to refund.help@okicici"
+    scam_turn("upi-2", second)
+    assert agent.generate_response("upi-2", second) == "ok sending to claims.desk@ybl"
+    assert agent.reply_stats["cache"] == 0
+
+
+def test_template_policy_never_calls_llm():
+    agent = AgentManager(reply_policy="template")
+    agent._call_llm = lambda prompt: (_ for _ in ()).throw(AssertionError("LLM called"))
+
+    scam_turn("tpl-1", "hello sir this is from bank")
+    assert agent.generate_response("tpl-1", "hello sir this is from bank")
+    assert agent.reply_stats["template"] == 1
+
+
+def test_llm_timeout_falls_back_to_state_template():
+    agent = AgentManager()
+    agent._call_llm = lambda prompt: None  # Deadline exceeded
+
+    scam_turn("slow-1", "Your account is blocked, send OTP")
+    reply = agent.generate_response("slow-1", "Your account is blocked, send OTP")
+
+    session = session_store.get_session("slow-1")
+    assert reply == agent.templates.reply(session.agent_state, "slow-1", session.message_count)
+    assert agent.reply_stats["fallback"] == 1
@@ -0,0 +1,105 @@
+import sys
+import os
+import time
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from api.models import Message
+from api.intelligence import IntelligenceExtractor, SessionStore
+from api.intelligence.session_backends import (
+    MemorySessionBackend,
+    SQLiteSessionBackend,
+    RedisSessionBackend,
+)
+
+
+class DictRedis:
+    """Tiny stand-in for the subset of the redis-py API the backend uses."""
+
+    def __init__(self):
+        self.kv, self.zsets = {}, {}
+
+    def get(self, key):
+        return self.kv.get(key)
+
+    def set(self, key, value, ex=None):
+        self.kv[key] = value
+
+    def expire(self, key, seconds):
+        pass
+
+    def delete(self, key):
+        self.kv.pop(key, None)
+
+    def zadd(self, name, mapping):
+        self.zsets.setdefault(name, {}).update(mapping)
+
+    def zrem(self, name, member):
+        self.zsets.get(name, {}).pop(member, None)
+
+    def zcard(self, name):
+        return len(self.zsets.get(name, {}))
+
+    def zrange(self, name, start, end):
+        return sorted(self.zsets.get(name, {}), key=self.zsets[name].get)[start:end + 1]
+
+    def zremrangebyscore(self, name, low, high):
+        zset = self.zsets.get(name, {})
+        stale = [m for m, score in zset.items() if score <= high]
+        for member in stale:
+            del zset[member]
+        return len(stale)
+
+
+def test_memory_backend_lru_and_ttl():
+    backend = MemorySessionBackend(ttl=0.05, max_sessions=2)
+    backend.put("a", 1)
+    backend.put("b", 2)
+    assert backend.get("a") == 1   # a is now most recent
+    backend.put("c", 3)            # evicts b
+    assert backend.get("b") is None
+
+    time.sleep(0.06)
+    backend.sweep()
+    assert len(backend) == 0
+    assert backend.stats() == {"sessions": 0, "expired": 2, "evicted": 1}
+
+
+def test_sqlite_backend_sweeps_overflow(tmp_path):
+    backend = SQLiteSessionBackend(str(tmp_path / "sessions.db"), ttl=60, max_sessions=2)
+    for name in ("a", "b", "c"):
+        backend.put(name, {"name": name})
+    backend.sweep()
+    assert backend.get("a") is None and backend.get("c") == {"name": "c"}
+    assert backend.stats()["evicted"] == 1
+    backend.close()
+
+
+def test_redis_backend_evicts_least_recently_used():
+    backend = RedisSessionBackend(max_sessions=2, client=DictRedis())
+    backend.put("a", 1)
+    backend.put("b", 2)
+    backend.get("a")
+    backend.put("c", 3)
+    assert backend.get("b") is None and backend.get("a") == 1
+    assert backend.stats() == {"sessions": 2, "expired": 0, "evicted": 1}
+
+
+def test_store_on_sqlite_keeps_backfill_and_agent_state(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    store = SessionStore(SQLiteSessionBackend(path))
+    extractor = IntelligenceExtractor(enable_link_analysis=False)
+    history = [Message(sender="scammer", text=f"message {i} send otp", timestamp=i) for i in range(8)]
+
+    store.backfill_history("s1", history, extractor)
+    session = store.get_session("s1")
+    session.agent_state = "EXTRACTION_LINK"
+    store.save(session)
+
+    # A second store on the same file (another worker) sees the same session
+    other = SessionStore(SQLiteSessionBackend(path))
+    session = other.add_intelligence("s1", extractor.extract("pay now"), message={"sender": "scammer", "text": "pay now", "timestamp": "8"})
+    assert session.message_count == 9
+    assert other.get_session("s1").agent_state == "EXTRACTION_LINK"
+    assert other.get_session("s1").message_fingerprints == session.message_fingerprints
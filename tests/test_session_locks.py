@@ -0,0 +1,76 @@
+import sys
+import os
+import asyncio
+import multiprocessing
+import time
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from api.intelligence import SessionStore
+from api.intelligence.session_backends import SQLiteSessionBackend
+from api.intelligence.session_locks import SessionLocks
+
+
+def _bump(db_path, lock_dir, turns):
+    """One 'worker': read-modify-write the same session under the lock."""
+    store = SessionStore(SQLiteSessionBackend(db_path), SessionLocks(lock_dir))
+    for _ in range(turns):
+        with store.lock("shared"):
+            session = store.get_or_create("shared")
+            count = session.message_count
+            time.sleep(0.001)  # widen the race window
+            session.message_count = count + 1
+            store.save(session)
+
+
+def test_workers_do_not_lose_updates(tmp_path):
+    db_path, lock_dir = str(tmp_path / "sessions.db"), str(tmp_path / "locks")
+    SQLiteSessionBackend(db_path).close()  # create the schema once
+
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_bump, args=(db_path, lock_dir, 25)) for _ in range(3)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join(30)
+
+    store = SessionStore(SQLiteSessionBackend(db_path))
+    assert store.get_session("shared").message_count == 75
+
+
+def test_async_lock_serializes_turns():
+    locks = SessionLocks()
+    order = []
+
+    async def turn(name):
+        async with locks.lock_async("s1"):
+            order.append(f"{name}-start")
+            await asyncio.sleep(0.01)
+            order.append(f"{name}-end")
+
+    async def main():
+        await asyncio.gather(turn("a"), turn("b"))
+
+    asyncio.run(main())
+    assert order == ["a-start", "a-end", "b-start", "b-end"]
+
+
+def test_unrelated_sessions_do_not_wait_for_each_other(tmp_path):
+    # One stripe: every session shares the cross-process lock file
+    locks = SessionLocks(str(tmp_path / "locks"), stripes=1)
+    other_worker = SessionLocks(str(tmp_path / "locks"), stripes=1)
+
+    async def turn(session_id):
+        async with locks.lock_async(session_id):
+            await asyncio.sleep(0.2)
+
+    async def main():
+        started = time.perf_counter()
+        await asyncio.gather(*(turn(f"s{i}") for i in range(10)))
+        return time.perf_counter() - started
+
+    assert asyncio.run(main()) < 1.0
+    assert locks._async_locks == {}  # per-session locks are dropped when unused
+    # The last session released the stripe for other workers
+    assert other_worker._try_flock(other_worker._file(0))
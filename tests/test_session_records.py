@@ -0,0 +1,48 @@
+import sys
+import os
+import pickle
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from api.intelligence import SessionStore
+from api.intelligence.session_records import LinkRecord, MessageLog, extend_unique
+
+
+def test_message_log_compresses_old_messages():
+    log = MessageLog(window=3, limit=10)
+    for i in range(14):
+        log.append("scammer", f"message {i}", str(i), bytes([i]) * MessageLog.FINGERPRINT_SIZE)
+
+    assert len(log) == 14
+    assert len(log.recent()) < 6  # Older messages went into the archive
+    texts = [m.text for m in log]
+    assert texts == [f"message {i}" for i in range(14 - len(texts), 14)]
+    assert len(texts) < 10 + 3 and log.first_retained == 14 - len(texts)
+    assert log.texts_since(12) == ["message 12", "message 13"]
+    assert log.fingerprint(0) == bytes([0]) * MessageLog.FINGERPRINT_SIZE  # Kept past the limit
+
+
+def test_link_record_reads_like_a_report_dict():
+    report = {"url": "http://sbi-kyc.xyz", "risk": "HIGH_RISK", "reasons": ["High-risk TLD: .xyz"],
+              "domain": "sbi-kyc.xyz", "etld_plus_one": "sbi-kyc.xyz", "domain_age_days": None,
+              "creation_date": None, "checks_performed": ["URL parsing"]}
+    record = LinkRecord.from_dict(report)
+
+    assert record["risk"] == "HIGH_RISK" and record.get("missing", 1) == 1
+    assert record.to_dict() == report
+    assert pickle.loads(pickle.dumps(record)) == record
+    assert extend_unique(("a",), ["b", "a", "b"]) == ("a", "b")
+
+
+def test_compact_session_round_trips_through_pickle():
+    store = SessionStore()
+    intel = {"upiIds": ["refund@okicici"], "suspiciousKeywords": ["kyc", "urgent"], "allLinks": []}
+    for i in range(20):
+        store.add_intelligence("s1", intel, message={"sender": "scammer", "text": f"urgent kyc {i}", "timestamp": str(i)})
+
+    session = pickle.loads(pickle.dumps(store.get_session("s1")))
+    assert session.upi_ids == ("refund@okicici",)
+    assert session.messages[-1] == {"sender": "scammer", "text": "urgent kyc 19", "timestamp": "19"}
+    assert session.message_fingerprints == store.get_session("s1").message_fingerprints
+    assert session.confidence == store.get_session("s1").confidence
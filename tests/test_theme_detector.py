@@ -0,0 +1,40 @@
+import sys
+import os
+import pickle
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from decision_maker.theme_detector import ThemeDetector
+
+
+def write_mapping(tmp_path):
+    path = tmp_path / "mapping.csv"
+    path.write_text(
+        "keyword,scam_category,confidence_weight\n"
+        "upi,UPI_SCAM,0.95\n"
+        "job,JOB_SCAM,0.4\n"
+        "salary,JOB_SCAM,0.4\n"
+        "account blocked,BANKING_SCAM,0.9\n"
+        "account,BANKING_SCAM,0.2\n"
+    )
+    return str(path)
+
+
+def test_scores_use_confidence_weight(tmp_path):
+    detector = ThemeDetector(write_mapping(tmp_path))
+    # Two job keywords (0.8) lose to one strong UPI keyword (0.95)
+    assert detector.detect("Job with great SALARY, pay fee by UPI") == "UPI_SCAM"
+    # Overlapping keywords both count, like `kw in text`
+    assert detector.found("your ACCOUNT BLOCKED") == {"account blocked", "account"}
+    assert detector.detect("hello there") == "GENERAL"
+
+
+def test_detect_many_matches_detect(tmp_path):
+    detector = ThemeDetector(write_mapping(tmp_path))
+    texts = ["job salary", "upi now", "account blocked today", "nothing", "", "job upi"]
+    assert detector.detect_many(texts) == [detector.detect(t) for t in texts]
+    assert detector.detect_many([]) == []
+
+    restored = pickle.loads(pickle.dumps(detector))
+    assert restored.detect_many(texts) == detector.detect_many(texts)
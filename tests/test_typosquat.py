@@ -0,0 +1,54 @@
+import sys
+import os
+import random
+import string
+import time
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from api.intelligence.typosquat import TyposquatIndex
+
+BRANDS = {"sbi", "hdfc", "paytm", "google", "apple", "whatsapp"}
+
+
+def test_typos_and_affixes_are_flagged():
+    index = TyposquatIndex(BRANDS)
+    assert index.check_domain("hdlc.com").brand == "hdfc"
+    assert index.check_domain("whatsappweb.in").brand == "whatsapp"
+    assert index.check_domain("verify.paytmkyc.xyz").brand == "paytm"
+    assert index.check_domain("google.com") is None
+    assert index.check_domain("sbionline.com") is None  # too different from "sbi"
+
+
+def test_homoglyphs_and_punycode_fold_to_brand():
+    index = TyposquatIndex(BRANDS)
+    match = index.check_domain("g00gle-login.com")
+    assert match.brand == "google" and match.homoglyph
+
+    match = index.check_domain("xn--pple-43d.com")  # Cyrillic "а"
+    assert match.label == "аpple" and match.brand == "apple" and match.homoglyph
+
+
+def test_look_alikes_beyond_indexed_edits_are_flagged():
+    # More edits than the deletion index covers, still within the ratio
+    index = TyposquatIndex({"phonepe", "google", "icici"})
+    assert index.match("phonnerie").brand == "phonepe"
+    assert index.match("gogllcge").brand == "google"
+    assert index.match("itecicio").brand == "icici"
+
+
+def test_clean_labels_stay_fast_against_a_large_brand_list():
+    # Clean labels take the O(brands) fallback scan; the posting lists keep
+    # it far below running SequenceMatcher against every brand
+    rng = random.Random(7)
+    brands = {"".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 12)))
+              for _ in range(5000)}
+    index = TyposquatIndex(brands)
+    labels = ["mail", "login", "secure", "account", "update",
+              "verify", "customer", "support", "service", "payments"]
+
+    start = time.perf_counter()
+    for _ in range(10):
+        assert all(index.match(label) is None for label in labels)
+    assert time.perf_counter() - start < 1.5
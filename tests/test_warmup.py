@@ -0,0 +1,41 @@
+import sys
+import os
+import asyncio
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from api.agent.llm_backends import StubBackend
+from api.agent.manager import AgentManager
+from api.intelligence import IntelligenceExtractor
+from api.warmup import Warmup
+
+
+class BrokenBackend(StubBackend):
+    async def generate_async(self, prompt, temperature=0.7, max_tokens=150):
+        raise ConnectionError("handshake failed")
+
+
+def make_extractor():
+    extractor = IntelligenceExtractor()
+    extractor.link_analyzer.enable_whois = False
+    extractor.link_analyzer.enable_web_search = False
+    return extractor
+
+
+def test_warmup_checks_every_dependency():
+    warmup = Warmup(make_extractor(), AgentManager(backend=StubBackend(latency=0.0)))
+    assert warmup.state == "pending" and not warmup.ready
+
+    asyncio.run(warmup.run())
+    report = warmup.to_dict()
+    assert warmup.ready and report["status"] == "ready"
+    assert set(report["checks"]) == {"extractor", "classifier", "linkAnalyzer", "llm"}
+    assert all(check["ok"] and check["latencyMs"] >= 0 for check in report["checks"].values())
+
+
+def test_llm_failure_does_not_block_readiness():
+    warmup = Warmup(make_extractor(), AgentManager(backend=BrokenBackend(latency=0.0)))
+    asyncio.run(warmup.run())
+    assert warmup.ready
+    assert warmup.checks["llm"].ok is False and "handshake" in warmup.checks["llm"].error